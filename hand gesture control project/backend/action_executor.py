@@ -0,0 +1,163 @@
+"""
+Action Executor
+===============
+Resolves triggered gestures to commands (LLM round-trip) and runs them on a
+small worker pool, so the detect thread never waits on the network or on
+process start-up.
+
+- submit() never blocks: a trigger is queued (bounded queue) or dropped.
+- De-duplication: a trigger for a gesture that is still queued or running,
+  or that finished less than dedupe_sec ago, is dropped.
+- Every task reports its state changes through on_event as
+  {"type": "action", "id", "gesture", "state", "command", "error", ...},
+  state in queued | running | done | failed | dropped (with "reason").
+
+resolve(gesture) -> command and execute(command) default to
+core.llm_to_command / core.execute_command (imported on first use).
+"""
+
+import collections
+import queue
+import threading
+import time
+import uuid
+
+import metrics
+
+STATES = ("queued", "running", "done", "failed", "dropped")
+
+
+class ActionTask:
+    def __init__(self, gesture: str, source: str = "pose", on_done=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.gesture = gesture
+        self.source = source
+        self.on_done = on_done  # on_done(gesture, command) after a successful run
+        self.state = "queued"
+        self.reason = None
+        self.command = None
+        self.error = None
+        self.created_at = time.time()
+        self._queued = time.perf_counter()
+        self.resolve_sec = None
+        self.execute_sec = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "gesture": self.gesture,
+            "source": self.source,
+            "state": self.state,
+            "reason": self.reason,
+            "command": self.command,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "resolveSec": self.resolve_sec,
+            "executeSec": self.execute_sec,
+        }
+
+
+class ActionExecutor:
+    """Bounded queue + worker threads running ActionTasks."""
+
+    def __init__(self, resolve=None, execute=None, workers: int = 2, max_pending: int = 16,
+                 dedupe_sec: float = 2.0, on_event=None, history: int = 50):
+        self.resolve = resolve
+        self.execute = execute
+        self.workers = workers
+        self.dedupe_sec = dedupe_sec
+        self.on_event = on_event
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._active = {}      # gesture -> queued/running task
+        self._finished = {}    # gesture -> perf_counter() when its last task ended
+        self._recent = collections.deque(maxlen=history)
+        self._counts = {"queued": 0, "done": 0, "failed": 0, "dropped": 0}  # submissions by outcome
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _start_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        for i in range(len(self._threads), self.workers):
+            t = threading.Thread(target=self._run, name=f"action-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, gesture: str, source: str = "pose", on_done=None) -> ActionTask:
+        """Queue gesture for resolve + execute. Returns the task (state "dropped" if not queued)."""
+        task = ActionTask(gesture, source, on_done)
+        with self._lock:
+            if gesture in self._active:
+                task.state, task.reason = "dropped", "duplicate"
+            elif time.perf_counter() - self._finished.get(gesture, float("-inf")) < self.dedupe_sec:
+                task.state, task.reason = "dropped", "recent"
+            elif self._queue.full():  # only submit() puts, under this lock
+                task.state, task.reason = "dropped", "queue_full"
+            self._counts[task.state] += 1
+            self._recent.append(task)
+            # Emitted before the task is queued so "queued" always precedes "running"
+            self._emit(task)
+            if task.state == "queued":
+                self._active[gesture] = task
+                self._queue.put_nowait(task)
+                if len(self._threads) < self.workers:
+                    self._start_workers()
+        return task
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            task.state = "running"
+            self._emit(task)
+            try:
+                self._execute(task)
+                task.state = "done"
+            except Exception as e:
+                task.state = "failed"
+                task.error = f"{type(e).__name__}: {e}"
+                print("ACTION ERROR:", task.gesture, task.error)
+            with self._lock:
+                self._active.pop(task.gesture, None)
+                self._finished[task.gesture] = time.perf_counter()
+                self._counts[task.state] += 1
+            self._emit(task)
+            if task.state == "done" and task.on_done:
+                try:
+                    task.on_done(task.gesture, task.command)
+                except Exception as e:
+                    print("Action callback error:", e)
+
+    def _execute(self, task: ActionTask):
+        if self.resolve is None or self.execute is None:
+            from core import execute_command, llm_to_command
+            self.resolve = self.resolve or llm_to_command
+            self.execute = self.execute or execute_command
+        t0 = time.perf_counter()
+        task.command = self.resolve(task.gesture)
+        t1 = time.perf_counter()
+        self.execute(task.command)
+        t2 = time.perf_counter()
+        task.resolve_sec, task.execute_sec = round(t1 - t0, 4), round(t2 - t1, 4)
+        m = metrics.active()
+        if m:
+            m.observe("action_queue_wait", t0 - task._queued)
+            m.observe("command_resolve", t1 - t0)
+            m.observe("command_execute", t2 - t1)
+            m.observe("gesture_to_command", t2 - task._queued)
+
+    def _emit(self, task: ActionTask):
+        if self.on_event:
+            try:
+                self.on_event({"type": "action", **task.to_dict()})
+            except Exception as e:
+                print("Action event error:", e)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._queue.qsize(),
+                "maxPending": self._queue.maxsize,
+                "dedupeSec": self.dedupe_sec,
+                "counts": dict(self._counts),
+                "recent": [t.to_dict() for t in reversed(self._recent)],
+            }
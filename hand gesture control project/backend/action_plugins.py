@@ -0,0 +1,227 @@
+"""
+Action Plugins
+==============
+Runs gesture commands in-process where possible instead of spawning a
+shell for every trigger. A command with a known scheme prefix goes to its
+plugin; anything else is a shell command, as before.
+
+    key:volumeup                  press a key (desktop_stream.inject_key)
+    hotkey:ctrl+shift+t           key chord: keys down in order, up in reverse
+    mouse:click[ right|middle]    click at the current pointer position
+    mouse:double | down | up      (same optional button)
+    mouse:move 0.5 0.5            move to normalized screen coordinates
+    scroll:-5                     mouse wheel clicks (negative = down)
+    text:hello                    type text
+    http:https://host/path        GET; "http:POST https://host/path {json}"
+    py:name [arg]                 Python callable registered with register_callable()
+
+Shell commands are checked against ExecutableIndex, a cached shutil.which
+(rebuilt when PATH changes), so a trigger does not walk PATH every time.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+import urllib.request
+
+NOT_EXECUTABLE = "NOT_EXECUTABLE"
+SHELL_BUILTINS = ("start", "explorer", "powershell", "cmd", "shutdown", "control")
+HTTP_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+HTTP_TIMEOUT_SEC = 5.0
+
+_plugins = {}    # scheme -> fn(arg)
+_callables = {}  # py: name -> fn
+
+
+def plugin(scheme: str):
+    """Decorator registering fn(arg: str) as the handler for "scheme:arg" commands."""
+    def wrap(fn):
+        _plugins[scheme] = fn
+        return fn
+    return wrap
+
+
+def register_callable(name: str, fn):
+    """Make fn callable from gestures as "py:<name>" (fn()) or "py:<name> <arg>" (fn(arg))."""
+    _callables[name] = fn
+
+
+def schemes() -> list:
+    return sorted(_plugins)
+
+
+def parse(cmd: str) -> tuple[str | None, str]:
+    """(scheme, arg) for a plugin command, else (None, cmd)."""
+    scheme, sep, arg = cmd.partition(":")
+    if sep and scheme.lower() in _plugins:
+        return scheme.lower(), arg.strip()
+    return None, cmd
+
+
+# -----------------------------------------------------------------------------
+# INPUT PLUGINS
+# -----------------------------------------------------------------------------
+
+def _input():
+    import desktop_stream as ds
+    if not ds._import_input():
+        raise RuntimeError("input injection unavailable (pyautogui not installed)")
+    return ds
+
+
+@plugin("key")
+def _key(arg: str):
+    _input().inject_key(arg.strip().lower(), action="press")
+
+
+@plugin("hotkey")
+def _hotkey(arg: str):
+    keys = [k.strip().lower() for k in arg.split("+") if k.strip()]
+    if not keys:
+        raise ValueError("empty hotkey")
+    ds = _input()
+    pressed = []
+    try:
+        for k in keys:
+            ds.inject_key(k, action="down")
+            pressed.append(k)
+    finally:
+        for k in reversed(pressed):
+            ds.inject_key(k, action="up")
+
+
+@plugin("mouse")
+def _mouse(arg: str):
+    parts = arg.split()
+    op = parts[0].lower() if parts else "click"
+    ds = _input()
+    if op == "move":
+        x, y = float(parts[1]), float(parts[2])
+        ds.inject_mouse(x, y, action="move")
+        return
+    if op not in ("click", "double", "down", "up"):
+        raise ValueError(f"unknown mouse op: {op}")
+    button = parts[1].lower() if len(parts) > 1 else "left"
+    for _ in range(2 if op == "double" else 1):
+        ds.inject_mouse(None, None, button=button, action="click" if op == "double" else op)
+
+
+@plugin("scroll")
+def _scroll(arg: str):
+    _input().inject_scroll(int(arg))
+
+
+@plugin("text")
+def _text(arg: str):
+    _input().inject_text(arg)
+
+
+# -----------------------------------------------------------------------------
+# HTTP / PYTHON PLUGINS
+# -----------------------------------------------------------------------------
+
+@plugin("http")
+def _http(arg: str):
+    if arg.startswith("//"):  # a bare "http://..." URL
+        arg = "http:" + arg
+    method, _, rest = arg.partition(" ")
+    if method.upper() in HTTP_METHODS:
+        method = method.upper()
+        url, _, body = rest.strip().partition(" ")
+    else:
+        method, url, body = "GET", arg, ""
+    data = body.strip().encode() if body.strip() else None
+    headers = {}
+    if data:
+        try:
+            json.loads(data)
+            headers["Content-Type"] = "application/json"
+        except ValueError:
+            headers["Content-Type"] = "text/plain"
+    req = urllib.request.Request(url, data=data, method=method, headers=headers)
+    with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_SEC) as resp:
+        print("HTTP ACTION:", method, url, resp.status)
+
+
+@plugin("py")
+def _py(arg: str):
+    name, _, rest = arg.partition(" ")
+    fn = _callables.get(name)
+    if fn is None:
+        raise KeyError(f"no callable registered as {name!r}")
+    return fn(rest) if rest else fn()
+
+
+# -----------------------------------------------------------------------------
+# SHELL FALLBACK
+# -----------------------------------------------------------------------------
+
+class ExecutableIndex:
+    """
+    Cached shutil.which. Results (hits and misses) are kept until PATH
+    changes; misses are re-checked after miss_ttl_sec so a program installed
+    while the server runs is picked up.
+    """
+
+    def __init__(self, miss_ttl_sec: float = 60.0):
+        self.miss_ttl_sec = miss_ttl_sec
+        self._path = None
+        self._found = {}  # normcase(exe) -> (path | None, checked at)
+        self._lock = threading.Lock()
+
+    def which(self, exe: str) -> str | None:
+        key = os.path.normcase(exe)
+        now = time.monotonic()
+        with self._lock:
+            path_env = os.environ.get("PATH", "")
+            if path_env != self._path:
+                self._path = path_env
+                self._found.clear()
+            hit = self._found.get(key)
+            if hit is not None and (hit[0] is not None or now - hit[1] < self.miss_ttl_sec):
+                return hit[0]
+        found = shutil.which(exe)
+        with self._lock:
+            self._found[key] = (found, now)
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._found.clear()
+
+
+executables = ExecutableIndex()
+
+
+def is_executable(cmd: str) -> bool:
+    if cmd == NOT_EXECUTABLE:
+        return False
+    if parse(cmd)[0] is not None:
+        return True
+    parts = cmd.split()
+    if not parts:
+        return False
+    exe = parts[0]
+    if exe.lower() == "ms-settings:":
+        return True
+    if exe.lower() in SHELL_BUILTINS:
+        return True
+    return executables.which(exe) is not None
+
+
+def execute(cmd: str):
+    """Run cmd through its plugin, or as a shell command. Plugin errors propagate."""
+    scheme, arg = parse(cmd)
+    if scheme is not None:
+        print("ACTION:", scheme, arg)
+        return _plugins[scheme](arg)
+    if cmd.startswith("ms-settings:"):
+        cmd = "cmd /c start " + cmd
+    if not is_executable(cmd):
+        print("SYSTEM:", cmd, "is not executable")
+        return
+    print("EXECUTING:", cmd)
+    subprocess.Popen(cmd, shell=True)
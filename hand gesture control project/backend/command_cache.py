@@ -0,0 +1,143 @@
+"""
+Gesture Command Cache
+=====================
+Persistent gesture name -> command cache in front of the LLM resolver
+(core.llm_to_command). At temperature 0 the answer for a gesture name
+never changes, so a trigger on a warm cache costs a dict lookup instead
+of a network round-trip.
+
+- Keyed by normalized gesture name + prompt version: changing the prompt
+  (command_resolver.PROMPT_VERSION) makes old answers miss instead of
+  being reused.
+- LLM answers expire after ttl_sec; entries set by hand (source "manual")
+  never expire.
+- One JSON file (default backend/command_cache.json, or next to the
+  gestures DB, see cache_for_db), rewritten atomically on every change.
+- prefetch() resolves a new gesture in a background thread so its first
+  trigger is already warm.
+"""
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), "command_cache.json")
+DEFAULT_TTL_SEC = 30 * 24 * 3600
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def open_cache(path: str = DEFAULT_CACHE_PATH) -> "CommandCache":
+    """Shared CommandCache for path (one instance per file per process)."""
+    path = os.path.abspath(path)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = CommandCache(path)
+        return cache
+
+
+def cache_for_db(db_path: str) -> str:
+    """Command cache file belonging to a gestures DB file (same directory)."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "command_cache.json")
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+class CommandCache:
+    def __init__(self, path: str, version: str = "1", ttl_sec: float = DEFAULT_TTL_SEC):
+        self.path = path
+        self.version = version
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._entries = self._read()
+        self._inflight = set()
+
+    def _key(self, name: str) -> str:
+        return f"v{self.version}:{_normalize(name)}"
+
+    # -------------------------------------------------------------------------
+    # PERSISTENCE
+    # -------------------------------------------------------------------------
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f).get("entries", {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "entries": self._entries}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    # -------------------------------------------------------------------------
+    # LOOKUP / UPDATE
+    # -------------------------------------------------------------------------
+
+    def get(self, name: str) -> str | None:
+        """Cached command for gesture name, or None (missing or expired)."""
+        entry = self._entries.get(self._key(name))
+        if entry is None:
+            return None
+        if entry["source"] != "manual" and time.time() - entry["resolvedAt"] > self.ttl_sec:
+            return None
+        return entry["command"]
+
+    def put(self, name: str, command: str, source: str = "llm"):
+        """Store command for name. source "manual" entries never expire."""
+        with self._lock:
+            self._entries[self._key(name)] = {"name": name, "command": command, "source": source,
+                                              "resolvedAt": time.time()}
+            self._write()
+
+    def invalidate(self, name: str | None = None) -> int:
+        """Drop name's entry (all prompt versions), or everything if name is None. Returns entries removed."""
+        with self._lock:
+            if name is None:
+                removed = list(self._entries)
+            else:
+                suffix = ":" + _normalize(name)
+                removed = [k for k in self._entries if k.endswith(suffix)]
+            for key in removed:
+                del self._entries[key]
+            if removed:
+                self._write()
+            return len(removed)
+
+    def entries(self) -> list:
+        """Current-version entries: [{name, command, source, resolvedAt, expired}]."""
+        now = time.time()
+        prefix = f"v{self.version}:"
+        return [{**e, "expired": e["source"] != "manual" and now - e["resolvedAt"] > self.ttl_sec}
+                for k, e in list(self._entries.items()) if k.startswith(prefix)]
+
+    def prefetch(self, name: str, resolve) -> bool:
+        """
+        Resolve name in a daemon thread unless cached or already in flight.
+        resolve(name) is expected to store its answer (core.llm_to_command
+        does). Returns True if a resolution was started.
+        """
+        with self._lock:
+            if self.get(name) is not None or self._key(name) in self._inflight:
+                return False
+            self._inflight.add(self._key(name))
+
+        def run():
+            try:
+                resolve(name)
+            except Exception as e:
+                print("Command prefetch failed:", name, e)
+            finally:
+                with self._lock:
+                    self._inflight.discard(self._key(name))
+
+        threading.Thread(target=run, name="command-prefetch", daemon=True).start()
+        return True
@@ -0,0 +1,240 @@
+"""
+Command Resolver Chain
+======================
+Turns a gesture name ("open reddit") into a command, trying cheap local
+sources before the network:
+
+1. CacheResolver   - command_cache.py (exact, normalized name)
+2. IntentIndex     - local table of known intents: gesture_history.json
+                     plus built-in defaults, matched exactly or fuzzily
+                     through a token index (works offline)
+3. LLMResolver     - remote LLM (Groq SDK, or plain HTTP to an
+                     OpenAI-compatible endpoint at GROQ_BASE_URL)
+
+ResolverChain returns the first answer and stores answers from later
+stages in the cache (except NOT_EXECUTABLE, so a failed resolution is
+retried on the next trigger). A resolver that cannot answer returns None; the chain
+then falls through, and "NOT_EXECUTABLE" only comes back if every stage
+gave up (or the LLM itself says so).
+
+llm_stub_server.py serves the LLM endpoint locally (answers from an
+IntentIndex) so the whole chain can be exercised without network access.
+"""
+
+import difflib
+import json
+import os
+import re
+import time
+import urllib.request
+
+import metrics
+
+NOT_EXECUTABLE = "NOT_EXECUTABLE"
+
+# Bump whenever PROMPT changes: cached answers from the old prompt then miss.
+PROMPT_VERSION = "1"
+PROMPT = """
+You are a Windows system command generator.
+Convert a natural language instruction into ONE executable Windows terminal command.
+STRICT RULES: Output EXACTLY ONE LINE. Output ONLY the command. NO explanations. NO markdown. NO quotes.
+If impossible return NOT_EXECUTABLE
+Instruction: {instruction}
+"""
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(__file__), "gesture_history.json")
+
+# Built-in intents, used after the user's own history.
+DEFAULT_INTENTS = (
+    ("open notepad", "notepad"),
+    ("open calculator", "calc"),
+    ("open paint", "mspaint"),
+    ("open file explorer", "explorer"),
+    ("open task manager", "taskmgr"),
+    ("open command prompt", "start cmd"),
+    ("open settings", "cmd /c start ms-settings:"),
+    ("open google chrome", "start chrome"),
+    ("close google chrome", "taskkill /im chrome.exe"),
+    ("open youtube", "start https://www.youtube.com"),
+    ("open google", "start https://www.google.com"),
+    ("open gmail", "start https://mail.google.com"),
+    ("open github", "start https://github.com"),
+    ("open reddit", "start https://www.reddit.com"),
+    ("lock screen", "rundll32.exe user32.dll,LockWorkStation"),
+    # In-process actions (action_plugins.py), no shell
+    ("volume up", "key:volumeup"),
+    ("volume down", "key:volumedown"),
+    ("mute", "key:volumemute"),
+    ("play pause", "key:playpause"),
+    ("next track", "key:nexttrack"),
+    ("previous track", "key:prevtrack"),
+    ("scroll up", "scroll:5"),
+    ("scroll down", "scroll:-5"),
+    ("new tab", "hotkey:ctrl+t"),
+    ("close tab", "hotkey:ctrl+w"),
+    ("switch window", "hotkey:alt+tab"),
+)
+
+_SYNONYMS = {"launch": "open", "start": "open", "run": "open", "show": "open",
+             "quit": "close", "exit": "close", "kill": "close", "stop": "close",
+             "calc": "calculator"}
+_STOPWORDS = {"the", "a", "an", "my", "please", "app", "application"}
+
+
+def normalize_intent(text: str) -> str:
+    """Lowercase, drop punctuation/stopwords, map synonyms ("launch calc" -> "open calculator")."""
+    words = re.findall(r"[a-z0-9.:]+", text.lower())
+    return " ".join(_SYNONYMS.get(w, w) for w in words if w not in _STOPWORDS)
+
+
+def _token_similarity(token: str, others: list) -> float:
+    """Best character similarity of token to any of others; below 0.8 counts as no match."""
+    best = max((1.0 if token == o else difflib.SequenceMatcher(None, token, o).ratio() for o in others), default=0.0)
+    return best if best >= 0.8 else 0.0
+
+
+class CacheResolver:
+    name = "cache"
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def resolve(self, gesture: str) -> str | None:
+        return self.cache.get(gesture)
+
+
+class IntentIndex:
+    """
+    Known intent phrases -> commands. Lookup is an exact match on the
+    normalized phrase, else fuzzy: candidates sharing a token (inverted
+    index), scored by token overlap (typo-tolerant per token) and
+    character similarity of the whole phrase.
+    """
+
+    name = "local"
+
+    def __init__(self, intents=(), min_score: float = 0.8):
+        self.min_score = min_score
+        self._phrases = []     # normalized phrase per intent id
+        self._commands = []
+        self._exact = {}       # normalized phrase -> intent id
+        self._tokens = {}      # token -> set of intent ids
+        for phrase, command in intents:
+            self.add(phrase, command)
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def add(self, phrase: str, command: str):
+        """Add an intent; the first command added for a phrase wins."""
+        key = normalize_intent(phrase)
+        if not key or not command or key in self._exact:
+            return
+        i = len(self._phrases)
+        self._phrases.append(key)
+        self._commands.append(command)
+        self._exact[key] = i
+        for token in set(key.split()):
+            self._tokens.setdefault(token, set()).add(i)
+
+    def load_history(self, path: str = DEFAULT_HISTORY_PATH) -> int:
+        """Add {"gesture", "function"} entries from gesture_history.json. Returns how many were read."""
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        for e in entries:
+            if e.get("function") and e["function"] != NOT_EXECUTABLE:
+                self.add(e.get("gesture", ""), e["function"])
+        return len(entries)
+
+    def match(self, text: str) -> tuple[str | None, float]:
+        """(command, score) of the best intent, or (None, best score) below min_score."""
+        key = normalize_intent(text)
+        if key in self._exact:
+            return self._commands[self._exact[key]], 1.0
+        tokens = key.split()
+        candidates = set()
+        for token in tokens:
+            candidates |= self._tokens.get(token, set())
+        best, best_score = None, 0.0
+        for i in candidates:
+            phrase = self._phrases[i]
+            other = phrase.split()
+            overlap = sum(_token_similarity(t, other) for t in tokens) / max(len(tokens), len(other))
+            score = 0.5 * overlap + 0.5 * difflib.SequenceMatcher(None, key, phrase).ratio()
+            if score > best_score:
+                best, best_score = i, score
+        if best is None or best_score < self.min_score:
+            return None, best_score
+        return self._commands[best], best_score
+
+    def resolve(self, gesture: str) -> str | None:
+        return self.match(gesture)[0]
+
+
+class LLMResolver:
+    """
+    Remote LLM. client_factory() returns a Groq-SDK-style client (or None);
+    without one, and with base_url set, the OpenAI-compatible endpoint
+    {base_url}/openai/v1/chat/completions is called directly over HTTP.
+    """
+
+    name = "llm"
+
+    def __init__(self, client_factory=None, base_url: str | None = None, api_key: str | None = None,
+                 model: str = DEFAULT_MODEL, timeout: float = 10.0):
+        self.client_factory = client_factory
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+    def resolve(self, gesture: str) -> str | None:
+        messages = [{"role": "user", "content": PROMPT.format(instruction=gesture)}]
+        client = self.client_factory() if self.client_factory else None
+        try:
+            if client:
+                completion = client.chat.completions.create(model=self.model, messages=messages, temperature=0)
+                content = completion.choices[0].message.content
+            elif self.base_url:
+                content = self._post(messages)
+            else:
+                return None
+        except Exception as e:
+            print("LLM ERROR:", e)
+            return None
+        return content.strip() or None
+
+    def _post(self, messages: list) -> str:
+        body = json.dumps({"model": self.model, "messages": messages, "temperature": 0}).encode()
+        req = urllib.request.Request(self.base_url + "/openai/v1/chat/completions", data=body,
+                                     headers={"Content-Type": "application/json",
+                                              "Authorization": f"Bearer {self.api_key or ''}"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.load(resp)["choices"][0]["message"]["content"]
+
+
+class ResolverChain:
+    def __init__(self, resolvers, cache=None):
+        """
+        resolvers: tried in order; cache: CommandCache receiving answers from
+        non-cache resolvers (NOT_EXECUTABLE is never cached).
+        """
+        self.resolvers = list(resolvers)
+        self.cache = cache
+
+    def resolve(self, gesture: str) -> tuple[str, str | None]:
+        """(command, name of the resolver that answered); (NOT_EXECUTABLE, None) if none did."""
+        m = metrics.active()
+        for resolver in self.resolvers:
+            t0 = time.perf_counter()
+            command = resolver.resolve(gesture)
+            if m:
+                m.observe(f"resolve_{resolver.name}", time.perf_counter() - t0)
+            if command is not None:
+                if self.cache is not None and resolver.name != "cache" and command != NOT_EXECUTABLE:
+                    self.cache.put(gesture, command, source=resolver.name)
+                return command, resolver.name
+        return NOT_EXECUTABLE, None
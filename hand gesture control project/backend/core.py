@@ -1,91 +1,160 @@
 """
 Shared core components for hand gesture control.
 Used by mediapipe_engine.py and testing.py.
+
+torch is not imported here: GestureANN lives in gesture_model.py and is
+loaded on first access (core.GestureANN), so recognition-only processes
+never pay for torch. The Groq client is likewise created on the first
+llm_to_command() call. llm_to_command() goes through a resolver chain
+(command_resolver.py): on-disk cache, local intent table, then the LLM.
 """
 
 import numpy as np
-import torch
-import torch.nn as nn
-import subprocess
-import shutil
 import os
+import threading
+
+import action_plugins
+from command_cache import DEFAULT_CACHE_PATH, open_cache
+from command_resolver import (
+    DEFAULT_INTENTS,
+    PROMPT_VERSION,
+    CacheResolver,
+    IntentIndex,
+    LLMResolver,
+    ResolverChain,
+)
+
+# Optional: Groq LLM (may fail if groq not installed or no API key).
+# Created lazily by _get_groq_client(); False = tried and unavailable.
+_groq_client = None
+_groq_lock = threading.Lock()
+
+
+def _get_groq_client():
+    global _groq_client
+    if _groq_client is None:
+        with _groq_lock:
+            if _groq_client is None:
+                try:
+                    from groq import Groq
+                    # GROQ_BASE_URL (read by the SDK) points it elsewhere, e.g. llm_stub_server.py
+                    _groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY", "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"))
+                except Exception:
+                    _groq_client = False
+    return _groq_client or None
+
 
-# Optional: Groq LLM (may fail if groq not installed or no API key)
-try:
-    from groq import Groq
-    _groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY", "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"))
-except Exception:
-    _groq_client = None
+def landmarks_to_array(landmarks, out=None) -> np.ndarray:
+    """
+    Copy MediaPipe landmark protos (p.x, p.y, p.z) into a (21, 3) float32
+    array without building intermediate Python lists. Reuses out if given.
+    """
+    if out is None:
+        out = np.empty((21, 3), dtype=np.float32)
+    flat = out.reshape(-1)
+    j = 0
+    for p in landmarks:
+        flat[j] = p.x
+        flat[j + 1] = p.y
+        flat[j + 2] = p.z
+        j += 3
+    return out
 
 
-def normalize_landmarks(lm):
-    """Convert MediaPipe landmarks to 63-element feature vector."""
-    data = np.array(lm)
-    wrist = data[0]
-    data = data - wrist
-    m = np.max(np.abs(data))
+def normalize_landmarks(lm, out=None):
+    """
+    Convert MediaPipe landmarks to 63-element feature vector: subtract the
+    wrist, scale by the largest absolute coordinate.
+    - lm: (21, 3) list/array -> (63,) float32
+    - lm: (N, 21, 3) array   -> (N, 63) float32, each sample scaled separately
+    out: optional preallocated float32 array with lm's shape; the result is
+    written there (no allocation) and a flat view of it is returned.
+    """
+    data = np.asarray(lm, dtype=np.float32)
+    if data.ndim == 3:
+        if out is None:
+            out = np.empty(data.shape, dtype=np.float32)
+        np.subtract(data, data[:, :1], out=out)
+        m = np.abs(out).max(axis=(1, 2), keepdims=True)
+        m[m == 0] = 1
+        np.divide(out, m, out=out)
+        return out.reshape(len(out), -1)
+    if out is None:
+        out = np.empty(data.shape, dtype=np.float32)
+    np.subtract(data, data[0], out=out)
+    m = max(out.max(), -out.min())
     if m > 0:
-        data = data / m
-    return data.flatten()
-
-
-class GestureANN(nn.Module):
-    def __init__(self, input_size=63, num_classes=1):
-        super().__init__()
-        self.net = nn.Sequential(
-            nn.Linear(input_size, 128),
-            nn.ReLU(),
-            nn.Linear(128, 64),
-            nn.ReLU(),
-            nn.Linear(64, num_classes),
-        )
-
-    def forward(self, x):
-        return self.net(x)
-
-
-def llm_to_command(instruction: str) -> str:
-    """Convert gesture name to Windows command via LLM."""
-    if not _groq_client:
-        return "NOT_EXECUTABLE"
-    prompt = f"""
-You are a Windows system command generator.
-Convert a natural language instruction into ONE executable Windows terminal command.
-STRICT RULES: Output EXACTLY ONE LINE. Output ONLY the command. NO explanations. NO markdown. NO quotes.
-If impossible return NOT_EXECUTABLE
-Instruction: {instruction}
-"""
-    try:
-        completion = _groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
-        return completion.choices[0].message.content.strip()
-    except Exception:
-        return "NOT_EXECUTABLE"
+        np.divide(out, m, out=out)
+    return out.reshape(-1)
+
+
+def __getattr__(name):
+    # Lazy torch: `from core import GestureANN` imports gesture_model on demand.
+    if name == "GestureANN":
+        from gesture_model import GestureANN
+        return GestureANN
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def command_cache(path: str | None = None):
+    """Shared CommandCache (default backend/command_cache.json) for the current prompt version."""
+    cache = open_cache(path or DEFAULT_CACHE_PATH)
+    cache.version = PROMPT_VERSION
+    return cache
+
+
+_intents = None
+_llm = None
+_resolvers_lock = threading.Lock()
+
+
+def local_intents() -> IntentIndex:
+    """Shared intent table: gesture_history.json first, then built-in defaults."""
+    global _intents
+    if _intents is None:
+        with _resolvers_lock:
+            if _intents is None:
+                index = IntentIndex()
+                index.load_history()
+                for phrase, command in DEFAULT_INTENTS:
+                    index.add(phrase, command)
+                _intents = index
+    return _intents
+
+
+def reload_intents():
+    """Rebuild the intent table on next use (after gesture_history.json changed)."""
+    global _intents
+    _intents = None
+
+
+def command_chain(cache=None, store: bool = True) -> ResolverChain:
+    """
+    cache -> local intents -> LLM (Groq SDK, or HTTP to GROQ_BASE_URL without
+    it). store=False reads the cache but never writes answers to it.
+    """
+    global _llm
+    if _llm is None:
+        _llm = LLMResolver(client_factory=_get_groq_client, base_url=os.environ.get("GROQ_BASE_URL"),
+                           api_key=os.environ.get("GROQ_API_KEY"))
+    cache = cache or command_cache()
+    return ResolverChain([CacheResolver(cache), local_intents(), _llm], cache=cache if store else None)
+
+
+def llm_to_command(instruction: str, cache=None) -> str:
+    """
+    Convert gesture name to Windows command: cached answer, else the local
+    intent table, else the LLM. New answers are cached (cache: a
+    CommandCache, default command_cache()); failed LLM calls and
+    NOT_EXECUTABLE answers are not.
+    """
+    return command_chain(cache).resolve(instruction)[0]
 
 
 def is_executable(cmd: str) -> bool:
-    if cmd == "NOT_EXECUTABLE":
-        return False
-    parts = cmd.split()
-    if not parts:
-        return False
-    exe = parts[0]
-    if exe.lower() == "ms-settings:":
-        return True
-    if shutil.which(exe):
-        return True
-    builtins = ["start", "explorer", "powershell", "cmd", "shutdown", "control"]
-    return exe.lower() in builtins
+    return action_plugins.is_executable(cmd)
 
 
 def execute_command(cmd: str):
-    if cmd.startswith("ms-settings:"):
-        cmd = "cmd /c start " + cmd
-    if not is_executable(cmd):
-        print("SYSTEM:", cmd, "is not executable")
-        return
-    print("EXECUTING:", cmd)
-    subprocess.Popen(cmd, shell=True)
+    """Run cmd in-process through an action plugin ("key:...", "hotkey:...", ...) or in a shell."""
+    action_plugins.execute(cmd)
@@ -0,0 +1,200 @@
+"""
+Training Dataset Store
+======================
+Persistent, append-only store of recorded training samples, so retraining
+sees every gesture ever recorded instead of only the latest session.
+
+Layout (one directory, default backend/dataset/):
+- index.json      {"version": 1, "gestures": [{"name", "file", "count"}, ...]}
+- <hex>.f32       raw float32 rows of 63 normalized features, one per sample
+
+Each gesture has its own shard; recordings are appended to the end of it.
+index.json is rewritten atomically after every append and holds the number
+of complete rows, so a torn write past that count is ignored (and trimmed
+on the next append). Gesture order in the index is the label order used
+for training.
+
+Reading goes through snapshot(): the shards are memory-mapped at their
+current counts, so training never loads the whole dataset at once and is
+not disturbed by recordings appended while it runs.
+"""
+
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+
+FEATURES = 63
+_ROW_BYTES = FEATURES * 4
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(__file__), "dataset")
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(root: str = DEFAULT_STORE_DIR) -> "DatasetStore":
+    """Shared DatasetStore for root (one instance per directory per process)."""
+    root = os.path.abspath(root)
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = DatasetStore(root)
+        return store
+
+
+def store_for_db(db_path: str) -> str:
+    """Dataset directory belonging to a gestures DB file (sibling "dataset" dir)."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "dataset")
+
+
+class DatasetSnapshot:
+    """Read-only view of the store at one point in time (memmapped shards)."""
+
+    def __init__(self, entries: list):
+        self.names = [name for name, _, _ in entries]
+        self.counts = np.array([count for _, count, _ in entries], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)]).astype(np.int64)
+        self.total = int(self.offsets[-1])
+        self._shards = [np.memmap(path, dtype=np.float32, mode="r", shape=(count, FEATURES))
+                        for _, count, path in entries]
+
+    def label_mapping(self) -> tuple[dict, dict]:
+        """(label_to_id, id_to_label) in store order."""
+        return ({name: i for i, name in enumerate(self.names)},
+                {i: name for i, name in enumerate(self.names)})
+
+    def gesture(self, name: str) -> np.ndarray:
+        """All samples of one gesture (memmap, (count, 63))."""
+        return self._shards[self.names.index(name)]
+
+    def gather(self, idx) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Rows for global sample indices idx (over all shards in label order).
+        Returns (X (n, 63) float32, Y (n,) int64); reads only those rows.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        labels = np.searchsorted(self.offsets, idx, side="right") - 1
+        X = np.empty((len(idx), FEATURES), dtype=np.float32)
+        for label in np.unique(labels):
+            sel = labels == label
+            local = idx[sel] - self.offsets[label]
+            # Sorted reads keep page access sequential within a shard.
+            order = np.argsort(local, kind="stable")
+            rows = np.empty_like(local)
+            rows[order] = np.arange(len(local))
+            X[np.flatnonzero(sel)] = self._shards[label][local[order]][rows]
+        return X, labels.astype(np.int64)
+
+    def iter_minibatches(self, batch_size: int, idx=None, rng=None):
+        """Yield shuffled (X, Y) minibatches over idx (default: every sample)."""
+        if idx is None:
+            idx = np.arange(self.total, dtype=np.int64)
+        rng = rng if rng is not None else np.random.default_rng()
+        perm = rng.permutation(idx)
+        for start in range(0, len(perm), batch_size):
+            yield self.gather(perm[start:start + batch_size])
+
+
+class DatasetStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index = self._read_index()
+
+    # -------------------------------------------------------------------------
+    # INDEX
+    # -------------------------------------------------------------------------
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_path(), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": 1, "gestures": []}
+
+    def _write_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp, self._index_path())
+
+    def _entry(self, name: str) -> dict | None:
+        for g in self._index["gestures"]:
+            if g["name"] == name:
+                return g
+        return None
+
+    # -------------------------------------------------------------------------
+    # WRITE
+    # -------------------------------------------------------------------------
+
+    def append(self, name: str, X) -> int:
+        """Append samples (n, 63) for gesture name. Returns its new sample count."""
+        X = np.ascontiguousarray(X, dtype=np.float32).reshape(-1, FEATURES)
+        with self._lock:
+            entry = self._entry(name)
+            if entry is None:
+                entry = {"name": name, "file": uuid.uuid4().hex + ".f32", "count": 0}
+                self._index["gestures"].append(entry)
+            if len(X):
+                os.makedirs(self.root, exist_ok=True)
+                path = os.path.join(self.root, entry["file"])
+                with open(path, "ab") as f:
+                    # Drop a torn tail left by an interrupted append.
+                    if f.tell() != entry["count"] * _ROW_BYTES:
+                        f.truncate(entry["count"] * _ROW_BYTES)
+                        f.seek(0, os.SEEK_END)
+                    f.write(X.tobytes())
+            entry["count"] += len(X)
+            self._write_index()
+            return entry["count"]
+
+    def remove(self, name: str) -> bool:
+        """Drop a gesture and its samples. Returns True if it was present."""
+        with self._lock:
+            entry = self._entry(name)
+            if entry is None:
+                return False
+            self._index["gestures"].remove(entry)
+            self._write_index()
+        try:
+            os.remove(os.path.join(self.root, entry["file"]))
+        except OSError:
+            pass  # still memory-mapped (Windows) or already gone; index no longer references it
+        return True
+
+    # -------------------------------------------------------------------------
+    # READ
+    # -------------------------------------------------------------------------
+
+    def names(self) -> list:
+        """Gesture names in label order."""
+        with self._lock:
+            return [g["name"] for g in self._index["gestures"]]
+
+    def count(self, name: str | None = None) -> int:
+        """Samples for one gesture, or in total."""
+        with self._lock:
+            if name is None:
+                return sum(g["count"] for g in self._index["gestures"])
+            entry = self._entry(name)
+            return entry["count"] if entry else 0
+
+    def snapshot(self) -> DatasetSnapshot:
+        """Memory-mapped view of all non-empty gestures at their current counts."""
+        with self._lock:
+            entries = [(g["name"], g["count"], os.path.join(self.root, g["file"]))
+                       for g in self._index["gestures"] if g["count"] > 0]
+        return DatasetSnapshot(entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"root": self.root,
+                    "gestures": {g["name"]: g["count"] for g in self._index["gestures"]},
+                    "total": sum(g["count"] for g in self._index["gestures"])}
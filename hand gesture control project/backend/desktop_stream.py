@@ -4,39 +4,57 @@ Desktop Stream Module
 Captures the live PC desktop in real time and streams it as MJPEG.
 Provides mouse and keyboard input injection via pyautogui.
 
+Frames are only grabbed and encoded while a /api/desktop/feed client is
+connected (see frame_broadcast.py); all clients share one encoded frame.
+
 Lifecycle: start() -> capture loop runs in thread -> stop() releases resources.
 Independent of MediaPipe (camera) - does not conflict with gesture recognition.
+mss, pyautogui and cv2 are imported on first start() / input injection.
 """
 
 import threading
 import time
 import numpy as np
 
-# Desktop capture: mss is fast and cross-platform (works on Windows)
-try:
-    import mss
-except ImportError:
-    mss = None
-
-# Input injection
-try:
-    import pyautogui
-    pyautogui.FAILSAFE = False  # Allow remote control from web UI
-except ImportError:
-    pyautogui = None
-
-# JPEG encoding
-try:
-    import cv2
-except ImportError:
-    cv2 = None
+from frame_broadcast import FrameBroadcaster
+from pacing import FramePacer
+import metrics
+import lazy_imports
+
+# Optional dependencies, imported lazily by _import_capture() / _import_input():
+# mss (fast, cross-platform desktop capture), pyautogui (input injection),
+# cv2 (color conversion). None until imported or if unavailable.
+mss = None
+pyautogui = None
+cv2 = None
+
+
+def _import_capture():
+    global mss, cv2
+    if mss is None:
+        mss = lazy_imports.load("mss", optional=True)
+    if cv2 is None:
+        cv2 = lazy_imports.load("cv2", optional=True)
+    return mss is not None and cv2 is not None
+
+
+def _import_input():
+    global pyautogui
+    if pyautogui is None:
+        pyautogui = lazy_imports.load("pyautogui", optional=True)
+        if pyautogui:
+            pyautogui.FAILSAFE = False  # Allow remote control from web UI
+    return pyautogui
 
 # -----------------------------------------------------------------------------
 # STATE
 # -----------------------------------------------------------------------------
 _running = False
 _thread = None
-_last_desktop_frame = None
+_broadcast = FrameBroadcaster()
+_fps = 25  # desktop capture target rate
+_pacer = FramePacer(_fps)
+_stop_event = threading.Event()
 _screen_width = 1920
 _screen_height = 1080
 _lock = threading.Lock()
@@ -44,10 +62,11 @@ _lock = threading.Lock()
 
 def _capture_loop():
     """
-    Capture loop: grab desktop, encode to JPEG, store in _last_desktop_frame.
+    Capture loop: grab desktop, encode to JPEG once, publish to _broadcast.
+    Idles without grabbing while no feed client is connected.
     Runs in background thread. Exits when _running becomes False.
     """
-    global _last_desktop_frame, _screen_width, _screen_height
+    global _screen_width, _screen_height
     if not mss or not cv2:
         return
 
@@ -58,16 +77,29 @@ def _capture_loop():
         _screen_height = mon["height"]
 
         while _running:
+            if _pacer.wait(_stop_event):
+                break
+            if not _broadcast.has_subscribers:
+                continue
+            m = metrics.active()
             try:
+                if m:
+                    t0 = time.perf_counter()
                 screenshot = sct.grab(mon)
                 # mss returns BGRA; convert to BGR for OpenCV
                 frame = np.array(screenshot)
+                if m:
+                    t1 = time.perf_counter()
+                    m.observe("desktop_grab", t1 - t0)
                 frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                _, jpeg = cv2.imencode(".jpg", frame)
-                _last_desktop_frame = jpeg.tobytes()
+                if m:
+                    t2 = time.perf_counter()
+                    m.observe("desktop_color_convert", t2 - t1)
+                _broadcast.publish(frame)
+                if m:
+                    m.observe("desktop_jpeg_encode", time.perf_counter() - t2)
             except Exception as e:
                 print("Desktop capture error:", e)
-            time.sleep(0.04)  # ~25 FPS
 
 
 def start():
@@ -79,9 +111,10 @@ def start():
     with _lock:
         if _running:
             return True
-        if not mss or not cv2:
+        if not _import_capture():
             return False
         _running = True
+        _stop_event.clear()
         _thread = threading.Thread(target=_capture_loop, daemon=True)
         _thread.start()
     return True
@@ -91,24 +124,42 @@ def stop():
     """
     Stop desktop capture, release resources. No zombie threads.
     """
-    global _running, _thread, _last_desktop_frame
+    global _running, _thread
     with _lock:
         _running = False
+        _stop_event.set()
     if _thread:
         _thread.join(timeout=2)
         _thread = None
-    _last_desktop_frame = None
+    _broadcast.clear()
 
 
 def get_last_frame():
-    """Return latest JPEG frame bytes, or None if not running."""
-    return _last_desktop_frame
+    """Return latest JPEG frame bytes, or None if not running / not watched."""
+    return _broadcast.latest()
+
+
+def get_broadcaster() -> FrameBroadcaster:
+    """Broadcaster feeding /api/desktop/feed clients."""
+    return _broadcast
 
 
 def is_running():
     return _running
 
 
+def set_fps(fps: float):
+    """Change desktop capture target rate (applies from the next frame)."""
+    global _fps
+    _fps = fps
+    _pacer.set_fps(fps)
+
+
+def get_stats() -> dict:
+    """Capture pacing (target/achieved FPS, overruns) and broadcaster counters."""
+    return {"running": _running, "pacing": _pacer.to_dict(), "broadcast": _broadcast.stats()}
+
+
 def get_screen_size():
     """Return (width, height) of primary monitor."""
     return _screen_width, _screen_height
@@ -118,20 +169,24 @@ def get_screen_size():
 # INPUT INJECTION
 # -----------------------------------------------------------------------------
 
-def inject_mouse(x: float, y: float, button: str = "left", action: str = "click"):
+def inject_mouse(x: float | None, y: float | None, button: str = "left", action: str = "click"):
     """
     Inject mouse event on the physical screen.
     x, y: normalized 0-1 coordinates, or absolute pixel coords if screen size known.
+          None for both: at the current pointer position.
     button: "left", "right", "middle"
     action: "click", "down", "up", "move"
     """
-    if not pyautogui:
+    if not _import_input():
         return
-    # Map normalized (0-1) to screen pixels
-    px = int(x * _screen_width) if 0 <= x <= 1 else int(x)
-    py = int(y * _screen_height) if 0 <= y <= 1 else int(y)
-    px = max(0, min(px, _screen_width - 1))
-    py = max(0, min(py, _screen_height - 1))
+    if x is None or y is None:
+        px = py = None
+    else:
+        # Map normalized (0-1) to screen pixels
+        px = int(x * _screen_width) if 0 <= x <= 1 else int(x)
+        py = int(y * _screen_height) if 0 <= y <= 1 else int(y)
+        px = max(0, min(px, _screen_width - 1))
+        py = max(0, min(py, _screen_height - 1))
 
     if action == "move":
         pyautogui.moveTo(px, py)
@@ -149,7 +204,7 @@ def inject_key(key: str, action: str = "press"):
     key: key name (e.g. "enter", "space", "a", "ctrl")
     action: "press", "down", "up"
     """
-    if not pyautogui:
+    if not _import_input():
         return
     if action == "down":
         pyautogui.keyDown(key)
@@ -159,7 +214,13 @@ def inject_key(key: str, action: str = "press"):
         pyautogui.press(key)
 
 
+def inject_scroll(clicks: int):
+    """Scroll the mouse wheel; positive clicks scroll up, negative down."""
+    if _import_input():
+        pyautogui.scroll(int(clicks))
+
+
 def inject_text(text: str):
     """Type a string of characters."""
-    if pyautogui:
+    if _import_input():
         pyautogui.write(text, interval=0.02)
@@ -0,0 +1,235 @@
+"""
+Dynamic (Motion) Gestures
+=========================
+Recognizes hand motions (swipes, circles) on top of the per-frame pose
+classifier. Runs on the detect thread at constant cost per frame:
+
+- MotionWindow: ring buffer of the last window_sec of frames (palm position
+  in image coordinates, velocity, normalized pose) with running sums of
+  path length, turning angle and enclosed (shoelace) area. Each frame adds
+  one entry and subtracts what falls out of the window; nothing is
+  recomputed over the whole buffer (except an exact re-sum once per buffer
+  wrap, against float drift).
+- MotionHeuristics (default model): decides from the running sums alone.
+  swipe_*: long, straight, little turning. circle_cw / circle_ccw: about a
+  full turn on a closed path enclosing real area, so a still, jittering
+  hand does not count (clockwise as seen in the camera image).
+- NpzMotionModel (optional): a small MLP (inference.NumpyClassifier weights)
+  over the last `frames` window entries, for motions beyond the built-ins.
+
+DynamicGestureRecognizer.update() returns (motion, confidence) once when a
+motion completes, then clears the window so it is not reported twice.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+MOTIONS = ("swipe_left", "swipe_right", "swipe_up", "swipe_down", "circle_cw", "circle_ccw")
+_PALM = [0, 5, 9, 13, 17]  # wrist + finger MCPs
+_MIN_STEP = 0.004          # image fraction; smaller steps are jitter and do not turn
+
+
+class MotionWindow:
+    def __init__(self, window_sec: float = 1.2, capacity: int = 64, max_gap_sec: float = 0.25):
+        self.window_sec = window_sec
+        self.capacity = capacity
+        self.max_gap_sec = max_gap_sec
+        self.t = np.zeros(capacity)
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.dist = np.zeros(capacity)   # |pos - previous pos|
+        self.turn = np.zeros(capacity)   # signed angle between previous step and this one
+        self.cross = np.zeros(capacity)  # previous pos x this pos (shoelace term)
+        self.pose = np.zeros((capacity, 63), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self._head = 0   # next slot to write
+        self.size = 0
+        self.path = 0.0  # sum of dist over the window
+        self.turning = 0.0  # sum of turn over the window
+        self._area2 = 0.0   # sum of cross over the window
+
+    def _slot(self, age: int) -> int:
+        """Ring slot of the entry `age` frames before the newest (0 = newest)."""
+        return (self._head - 1 - age) % self.capacity
+
+    def _drop_links(self, i: int, step: bool):
+        """Remove entry i's link to an evicted predecessor from the sums."""
+        self.turning -= self.turn[i]
+        self.turn[i] = 0.0
+        if step:
+            self.path -= self.dist[i]
+            self._area2 -= self.cross[i]
+            self.dist[i] = self.cross[i] = 0.0
+            self.vel[i] = 0.0
+
+    def _evict(self):
+        self.size -= 1
+        if self.size:
+            self._drop_links(self._slot(self.size - 1), step=True)
+        if self.size > 1:
+            self._drop_links(self._slot(self.size - 2), step=False)
+
+    def push(self, now: float, palm, pose=None):
+        """Add one frame: palm (x, y) in image coordinates, pose = normalized features."""
+        if self.size and now - self.t[self._slot(0)] > self.max_gap_sec:
+            self.reset()
+        while self.size and (self.size == self.capacity or now - self.t[self._slot(self.size - 1)] > self.window_sec):
+            self._evict()
+        i = self._head
+        self.t[i] = now
+        self.pos[i] = palm
+        self.dist[i] = self.turn[i] = self.cross[i] = 0.0
+        self.vel[i] = 0.0
+        if self.size:
+            p = self._slot(0)
+            step = self.pos[i] - self.pos[p]
+            self.dist[i] = math.hypot(step[0], step[1])
+            self.cross[i] = self.pos[p][0] * self.pos[i][1] - self.pos[p][1] * self.pos[i][0]
+            dt = now - self.t[p]
+            if dt > 0:
+                self.vel[i] = step / dt
+            if self.size > 1 and self.dist[i] > _MIN_STEP and self.dist[p] > _MIN_STEP:
+                prev = self.pos[p] - self.pos[self._slot(1)]
+                self.turn[i] = math.atan2(prev[0] * step[1] - prev[1] * step[0], prev @ step)
+        if pose is not None:
+            self.pose[i] = pose
+        self.path += self.dist[i]
+        self.turning += self.turn[i]
+        self._area2 += self.cross[i]
+        self._head = (i + 1) % self.capacity
+        self.size += 1
+        if self._head == 0:
+            self._resum()
+
+    def _resum(self):
+        idx = [self._slot(a) for a in range(self.size)]
+        self.path = float(self.dist[idx].sum())
+        self.turning = float(self.turn[idx].sum())
+        self._area2 = float(self.cross[idx].sum())
+
+    @property
+    def span_sec(self) -> float:
+        return float(self.t[self._slot(0)] - self.t[self._slot(self.size - 1)]) if self.size > 1 else 0.0
+
+    @property
+    def area(self) -> float:
+        """Signed area of the trajectory closed from newest back to oldest (> 0: clockwise on screen)."""
+        if self.size < 3:
+            return 0.0
+        a, b = self.pos[self._slot(0)], self.pos[self._slot(self.size - 1)]
+        return 0.5 * (self._area2 + a[0] * b[1] - a[1] * b[0])
+
+    @property
+    def displacement(self) -> np.ndarray:
+        """Newest minus oldest palm position."""
+        if self.size < 2:
+            return np.zeros(2)
+        return self.pos[self._slot(0)] - self.pos[self._slot(self.size - 1)]
+
+    def frames(self, n: int) -> np.ndarray | None:
+        """
+        Last n entries, oldest first, as (n, 67): pose (63), palm position
+        relative to the newest frame (2), velocity (2). None if fewer stored.
+        """
+        if self.size < n:
+            return None
+        idx = [self._slot(a) for a in range(n - 1, -1, -1)]
+        rel = self.pos[idx] - self.pos[idx[-1]]
+        return np.concatenate([self.pose[idx], rel, self.vel[idx]], axis=1).astype(np.float32)
+
+
+class MotionHeuristics:
+    """Swipe / circle detection from the window's running sums (no training)."""
+
+    def __init__(self, min_swipe: float = 0.25, min_straightness: float = 0.9,
+                 max_swipe_turn: float = math.pi / 4, min_circle_path: float = 0.4,
+                 min_circle_turn: float = 1.6 * math.pi, min_circle_area: float = 0.01,
+                 max_circle_gap: float = 0.35, min_span_sec: float = 0.12):
+        self.min_swipe = min_swipe
+        self.min_straightness = min_straightness
+        self.max_swipe_turn = max_swipe_turn
+        self.min_circle_path = min_circle_path
+        self.min_circle_turn = min_circle_turn
+        self.min_circle_area = min_circle_area
+        self.max_circle_gap = max_circle_gap
+        self.min_span_sec = min_span_sec
+
+    def predict(self, w: MotionWindow) -> tuple[str | None, float]:
+        if w.size < 3 or w.span_sec < self.min_span_sec or w.path <= 0:
+            return None, 0.0
+        dx, dy = w.displacement
+        net = math.hypot(dx, dy)
+        area = w.area
+        if (abs(w.turning) >= self.min_circle_turn and abs(area) >= self.min_circle_area
+                and area * w.turning > 0 and w.path >= self.min_circle_path
+                and net <= self.max_circle_gap * w.path):
+            # Image y points down, so a positive turn is clockwise on screen
+            return ("circle_cw" if w.turning > 0 else "circle_ccw"), min(1.0, abs(w.turning) / (2 * math.pi))
+        straightness = float(net / w.path)
+        if net >= self.min_swipe and straightness >= self.min_straightness and abs(w.turning) <= self.max_swipe_turn:
+            if abs(dx) >= abs(dy):
+                return ("swipe_right" if dx > 0 else "swipe_left"), straightness
+            return ("swipe_down" if dy > 0 else "swipe_up"), straightness
+        return None, 0.0
+
+
+class NpzMotionModel:
+    """
+    Learned motion classifier: inference.NumpyClassifier weights (.npz) over
+    the flattened last `frames` window entries (frames * 67 inputs). Labels
+    and frame count come from the sibling .json file:
+    {"labels": ["wave", ...], "frames": 16}.
+    """
+
+    def __init__(self, path: str):
+        from inference import NumpyClassifier
+        self.clf = NumpyClassifier.load(path)
+        with open(os.path.splitext(path)[0] + ".json", "r") as f:
+            meta = json.load(f)
+        self.labels = list(meta["labels"])
+        self.frames = int(meta["frames"])
+
+    def predict(self, w: MotionWindow) -> tuple[str | None, float]:
+        X = w.frames(self.frames)
+        if X is None:
+            return None, 0.0
+        i, conf = self.clf.predict(X.reshape(-1))
+        return self.labels[i], conf
+
+
+class DynamicGestureRecognizer:
+    def __init__(self, model=None, window_sec: float = 1.2, min_confidence: float = 0.8,
+                 min_interval_sec: float = 0.8):
+        """model: object with predict(MotionWindow) -> (motion | None, conf); default MotionHeuristics()."""
+        self.window = MotionWindow(window_sec=window_sec)
+        self.model = model or MotionHeuristics()
+        self.min_confidence = min_confidence
+        self.min_interval_sec = min_interval_sec
+        self._last_hit = -math.inf
+
+    def reset(self):
+        self.window.reset()
+
+    def update(self, pts, features, now: float) -> tuple[str, float] | None:
+        """
+        One frame with a hand: pts (21, 3) landmarks in image coordinates,
+        features the normalized pose. Returns (motion, confidence) when a
+        motion completes, else None.
+        """
+        pts = np.asarray(pts, dtype=np.float32).reshape(21, 3)
+        self.window.push(now, pts[_PALM, :2].mean(axis=0), features)
+        motion, conf = self.model.predict(self.window)
+        if motion is None or conf < self.min_confidence or now - self._last_hit < self.min_interval_sec:
+            return None
+        self._last_hit = now
+        self.window.reset()
+        return motion, conf
+
+    def to_dict(self) -> dict:
+        return {"model": type(self.model).__name__, "windowSec": self.window.window_sec,
+                "minConfidence": self.min_confidence}
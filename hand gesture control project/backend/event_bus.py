@@ -0,0 +1,103 @@
+"""
+Event Bus
+=========
+Fan-out of server events (predictions, training progress, actions) to the
+/api/events SSE streams:
+- Every subscriber (SSE connection) has its own bounded ring buffer, so two
+  tabs both see every event instead of taking turns on one queue.
+- A slow client loses its oldest events (counted in "dropped"); publish()
+  never blocks the producer (detect thread, training job, action worker).
+- publish() with nobody subscribed discards the event, so a server with no
+  browser attached does not accumulate a prediction per frame.
+- At most max_subscribers streams: a new one closes the oldest (typically a
+  tab that was closed without the connection noticing yet). Memory is
+  bounded by max_subscribers * buffer_size events.
+"""
+
+import collections
+import threading
+
+
+class _Subscriber:
+    def __init__(self, buffer_size: int):
+        self.events = collections.deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.closed = False
+
+
+class EventBus:
+    """Many producers, many SSE consumers; each consumer gets every event."""
+
+    def __init__(self, buffer_size: int = 256, max_subscribers: int = 8):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._cond = threading.Condition()
+        self._subscribers = []  # oldest first
+        self.published = 0
+        self.discarded = 0  # published with no subscriber
+        self.dropped = 0    # overwritten in a full subscriber buffer
+        self.evicted = 0    # subscribers closed to stay under max_subscribers
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: dict):
+        """Append event to every subscriber's buffer (dropping its oldest if full)."""
+        with self._cond:
+            self.published += 1
+            if not self._subscribers:
+                self.discarded += 1
+                return
+            for sub in self._subscribers:
+                if len(sub.events) == self.buffer_size:
+                    sub.dropped += 1
+                    self.dropped += 1
+                sub.events.append(event)
+            self._cond.notify_all()
+
+    def _subscribe(self) -> _Subscriber:
+        sub = _Subscriber(self.buffer_size)
+        with self._cond:
+            while len(self._subscribers) >= self.max_subscribers:
+                self._subscribers.pop(0).closed = True
+                self.evicted += 1
+            self._subscribers.append(sub)
+            self._cond.notify_all()  # wake an evicted subscriber so it ends
+        return sub
+
+    def _unsubscribe(self, sub: _Subscriber):
+        with self._cond:
+            sub.closed = True
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def events(self, timeout: float = 1.0):
+        """
+        Generator for one SSE stream. Counts as a subscriber while iterated;
+        yields each event, or None after timeout seconds without one (send a
+        heartbeat). Ends when the subscriber is evicted.
+        """
+        sub = self._subscribe()
+        try:
+            while True:
+                with self._cond:
+                    if not sub.events and not sub.closed:
+                        self._cond.wait(timeout)
+                    if sub.closed:
+                        return
+                    batch = list(sub.events)
+                    sub.events.clear()
+                if not batch:
+                    yield None
+                for ev in batch:
+                    yield ev
+        finally:
+            self._unsubscribe(sub)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"subscribers": len(self._subscribers), "bufferSize": self.buffer_size,
+                    "maxSubscribers": self.max_subscribers, "published": self.published,
+                    "discarded": self.discarded, "dropped": self.dropped, "evicted": self.evicted,
+                    "pending": [len(s.events) for s in self._subscribers]}
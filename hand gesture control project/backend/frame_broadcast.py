@@ -0,0 +1,106 @@
+"""
+Frame Broadcaster
+=================
+Subscriber-aware JPEG encoding for MJPEG feeds (/api/video/feed,
+/api/desktop/feed):
+- Tracks how many stream consumers are connected.
+- publish() skips encoding entirely when nobody is watching.
+- Each new frame is encoded once; every client receives the same bytes
+  object (the full multipart part is built once, not per client).
+- Optional max_fps caps the stream rate (frames over budget are not encoded).
+cv2 is imported on the first encode, not at import time.
+"""
+
+import threading
+
+import lazy_imports
+from pacing import FramePacer
+
+MJPEG_PART_HEADER = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
+
+
+class FrameBroadcaster:
+    """One producer (capture/render thread), many MJPEG consumers."""
+
+    def __init__(self, jpeg_quality: int | None = None, max_fps: float | None = None):
+        self.pacer = FramePacer(max_fps)
+        self._jpeg_quality = jpeg_quality
+        self._params = None  # cv2.imencode params, built on first encode
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._seq = 0
+        self._jpeg = None
+        self._part = None
+        self.encoded = 0
+        self.skipped = 0
+
+    @property
+    def has_subscribers(self) -> bool:
+        return self._subscribers > 0
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def publish(self, frame) -> bytes | None:
+        """
+        Encode a BGR frame once and hand it to all subscribers.
+        Returns the JPEG bytes, or None if skipped (no subscribers).
+        """
+        if not self._subscribers or not self.pacer.ready():
+            self.skipped += 1
+            return None
+        cv2 = lazy_imports.load("cv2")
+        if self._params is None:
+            self._params = [cv2.IMWRITE_JPEG_QUALITY, self._jpeg_quality] if self._jpeg_quality else []
+        ok, buf = cv2.imencode(".jpg", frame, self._params)
+        if not ok:
+            return None
+        return self.publish_jpeg(buf.tobytes())
+
+    def publish_jpeg(self, jpeg: bytes) -> bytes:
+        """Publish already-encoded JPEG bytes."""
+        part = MJPEG_PART_HEADER + jpeg + b"\r\n"
+        with self._cond:
+            self._jpeg = jpeg
+            self._part = part
+            self._seq += 1
+            self.encoded += 1
+            self._cond.notify_all()
+        return jpeg
+
+    def latest(self) -> bytes | None:
+        """Most recent JPEG, or None."""
+        return self._jpeg
+
+    def clear(self):
+        """Forget the last frame (source stopped)."""
+        with self._cond:
+            self._jpeg = None
+            self._part = None
+
+    def mjpeg_parts(self, timeout: float = 1.0):
+        """
+        Generator for a multipart/x-mixed-replace response. Counts as a
+        subscriber while iterated; yields each new frame's shared part once.
+        """
+        with self._cond:
+            self._subscribers += 1
+        try:
+            last = -1
+            while True:
+                with self._cond:
+                    if self._seq == last or self._part is None:
+                        self._cond.wait(timeout)
+                    if self._seq == last or self._part is None:
+                        continue
+                    last = self._seq
+                    part = self._part
+                yield part
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+
+    def stats(self) -> dict:
+        return {"subscribers": self._subscribers, "encoded": self.encoded, "skipped": self.skipped,
+                "pacing": self.pacer.to_dict()}
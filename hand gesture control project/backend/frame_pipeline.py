@@ -0,0 +1,89 @@
+"""
+Frame Pipeline Primitives
+=========================
+Small building blocks for the staged MediaPipe engine:
+- LatestSlot: bounded (size 1) hand-off between two threads. A newer item
+  replaces an unread one (latest-frame-wins), so a slow consumer always
+  works on the freshest frame instead of a growing backlog.
+- StageStats: per-stage processed / dropped counters.
+
+Used by mediapipe_engine.py (capture -> detect/classify -> render).
+"""
+
+import threading
+
+
+class LatestSlot:
+    """
+    Single-item hand-off. put() does not block by default; if the previous
+    item was not consumed yet it is replaced and counted as dropped.
+    get() blocks up to timeout and returns None when empty or closed.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._cond = threading.Condition()
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item, wait: bool = False):
+        """
+        Store item, replacing (and counting) any unread one.
+        wait=True applies backpressure instead: block until the slot is free
+        (used for lossless, as-fast-as-possible file playback).
+        """
+        with self._cond:
+            while wait and self._has_item and not self._closed:
+                self._cond.wait(0.1)
+            if self._closed:
+                return
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self.put_count += 1
+            self._cond.notify_all()
+
+    def get(self, timeout: float | None = None):
+        """Take the latest item, or None if nothing arrived before timeout."""
+        with self._cond:
+            if not self._has_item and not self._closed:
+                self._cond.wait(timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Wake any waiting consumer; further put() calls are ignored."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        """True once closed and drained (consumer can exit)."""
+        with self._cond:
+            return self._closed and not self._has_item
+
+
+class StageStats:
+    """Counters for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.errors = 0
+
+    def to_dict(self, slot: LatestSlot | None = None) -> dict:
+        """Snapshot; includes drops of the slot feeding this stage if given."""
+        out = {"processed": self.processed, "errors": self.errors}
+        if slot is not None:
+            out["dropped"] = slot.dropped
+        return out
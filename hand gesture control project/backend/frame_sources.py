@@ -0,0 +1,239 @@
+"""
+Frame Sources
+=============
+Pluggable inputs for MediaPipeEngine so it can run without a webcam:
+- CameraSource: live cv2.VideoCapture (default, camera index)
+- VideoFileSource: any video file OpenCV can decode
+- ImageDirSource: a directory of still images, played in name order
+- LandmarkReplaySource: pre-recorded (N, 21, 3) landmarks or a recorded
+  session directory (session_recorder.py); bypasses MediaPipe
+
+All sources accept max_size=(width, height) to cap capture resolution:
+the camera is asked for it, and larger frames are downscaled.
+
+File-based sources play "as fast as possible" by default, or real-time paced
+(realtime=True) against monotonic deadlines. Their timestamps always follow
+media time, so timer/cooldown logic behaves identically in both modes.
+
+Use open_source(spec) to build a source from a camera index or a path.
+"""
+
+import os
+import time
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from session_recorder import SessionReader, is_session
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+LANDMARK_EXTENSIONS = (".npy", ".npz")
+
+
+class SourceFrame(NamedTuple):
+    """One captured frame. landmarks is a (21, 3) float32 array only for landmark sources."""
+    image: np.ndarray
+    timestamp: float
+    landmarks: np.ndarray | None = None
+
+
+def _fit(frame, max_size):
+    """Downscale frame to fit within max_size (width, height), keeping aspect."""
+    if not max_size or frame is None:
+        return frame
+    h, w = frame.shape[:2]
+    scale = min(max_size[0] / w, max_size[1] / h)
+    if scale >= 1:
+        return frame
+    return cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+class FrameSource:
+    """
+    Base class. read() returns a SourceFrame, or None when the source is
+    exhausted or failed. provides_landmarks=True means frames already carry
+    landmarks and MediaPipe detection is skipped. lossless=True means every
+    frame should be processed (no latest-frame-wins dropping).
+    """
+
+    provides_landmarks = False
+    lossless = False
+    max_size = None
+
+    def read(self) -> SourceFrame | None:
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    """Live camera via cv2.VideoCapture. Paced by the camera itself."""
+
+    def __init__(self, index: int = 0, max_size: tuple[int, int] | None = None):
+        self.index = index
+        self.max_size = max_size
+        self.cap = cv2.VideoCapture(index)
+        if max_size:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, max_size[0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, max_size[1])
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        return SourceFrame(_fit(frame, self.max_size), time.time())
+
+    def release(self):
+        self.cap.release()
+
+
+class _PlaybackSource(FrameSource):
+    """Shared playback clock for file-based sources (media time -> wall time)."""
+
+    def __init__(self, fps: float, realtime: bool, loop: bool):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self.loop = loop
+        # As-fast-as-possible playback is a benchmark/replay: keep every frame.
+        self.lossless = not realtime
+        self._pos = 0
+        self._wall_start = time.time()
+        self._mono_start = time.monotonic()
+
+    def _stamp(self, media_t: float | None = None) -> float:
+        """Advance the clock; sleep until the frame's deadline in real-time mode."""
+        if media_t is None:
+            media_t = self._pos / self.fps
+        self._pos += 1
+        if self.realtime:
+            delay = self._mono_start + media_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return self._wall_start + media_t
+
+
+class VideoFileSource(_PlaybackSource):
+    """Decode a video file. Uses the container FPS for media time."""
+
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False,
+                 max_size: tuple[int, int] | None = None):
+        self.path = path
+        self.max_size = max_size
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS), realtime, loop)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            return None
+        return SourceFrame(_fit(frame, self.max_size), self._stamp())
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource(_PlaybackSource):
+    """Play still images from a directory (sorted by filename) at a fixed FPS."""
+
+    def __init__(self, path: str, fps: float = 30.0, realtime: bool = False, loop: bool = False,
+                 max_size: tuple[int, int] | None = None):
+        super().__init__(fps, realtime, loop)
+        self.max_size = max_size
+        self.files = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self._idx = 0
+
+    def read(self):
+        if self._idx >= len(self.files):
+            if not self.loop or not self.files:
+                return None
+            self._idx = 0
+        frame = cv2.imread(self.files[self._idx])
+        self._idx += 1
+        if frame is None:
+            return None
+        return SourceFrame(_fit(frame, self.max_size), self._stamp())
+
+
+class LandmarkReplaySource(_PlaybackSource):
+    """
+    Replay recorded landmarks without MediaPipe.
+    Accepts .npy of shape (N, 21, 3), .npz with "landmarks" (N, 21, 3) and
+    optional "timestamps" (N,) in seconds, or a session directory.
+    Rows containing NaN mean "no hand".
+    Frames are blank canvases so the MJPEG stream still shows the overlay.
+    """
+
+    provides_landmarks = True
+
+    def __init__(self, path: str, fps: float = 30.0, realtime: bool = False, loop: bool = False,
+                 frame_size: tuple[int, int] = (640, 480)):
+        super().__init__(fps, realtime, loop)
+        timestamps = None
+        if is_session(path):
+            reader = SessionReader(path)
+            landmarks = reader.landmarks_3d()
+            timestamps = np.asarray(reader.timestamp, dtype=np.float64)
+        elif path.endswith(".npz"):
+            with np.load(path) as data:
+                landmarks = data["landmarks"]
+                if "timestamps" in data:
+                    timestamps = data["timestamps"].astype(np.float64)
+        else:
+            landmarks = np.load(path, mmap_mode="r")
+        self.landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3)
+        self.timestamps = timestamps - timestamps[0] if timestamps is not None and len(timestamps) else None
+        self.frame_size = frame_size
+        self._idx = 0
+        self._loop_offset = 0.0
+
+    def read(self):
+        n = len(self.landmarks)
+        if self._idx >= n:
+            if not self.loop or not n:
+                return None
+            self._loop_offset = self._media_time(n - 1) + 1.0 / self.fps
+            self._idx = 0
+        pts = self.landmarks[self._idx]
+        media_t = self._media_time(self._idx) + self._loop_offset
+        self._idx += 1
+        w, h = self.frame_size
+        canvas = np.zeros((h, w, 3), dtype=np.uint8)
+        hand = None if np.isnan(pts).any() else pts
+        return SourceFrame(canvas, self._stamp(media_t), hand)
+
+    def _media_time(self, idx: int) -> float:
+        if self.timestamps is not None:
+            return float(self.timestamps[idx])
+        return idx / self.fps
+
+
+def open_source(spec, realtime: bool = False, loop: bool = False, fps: float = 30.0,
+                max_size: tuple[int, int] | None = None) -> FrameSource:
+    """
+    Build a FrameSource from a spec:
+    - int or digit string -> camera index
+    - FrameSource instance -> returned as is
+    - session directory (session_recorder.py) -> LandmarkReplaySource
+    - other directory -> ImageDirSource
+    - .npy / .npz -> LandmarkReplaySource
+    - any other path -> VideoFileSource
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(int(spec), max_size=max_size)
+    if is_session(spec):
+        return LandmarkReplaySource(spec, fps=fps, realtime=realtime, loop=loop)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, fps=fps, realtime=realtime, loop=loop, max_size=max_size)
+    if spec.lower().endswith(LANDMARK_EXTENSIONS):
+        return LandmarkReplaySource(spec, fps=fps, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop, max_size=max_size)
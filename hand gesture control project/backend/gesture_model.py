@@ -0,0 +1,23 @@
+"""
+Gesture Classifier Model (PyTorch)
+==================================
+GestureANN definition. Only needed for training and for exporting weights;
+recognition runs on the torch-free backend in inference.py.
+"""
+
+import torch.nn as nn
+
+
+class GestureANN(nn.Module):
+    def __init__(self, input_size=63, num_classes=1):
+        super().__init__()
+        self.net = nn.Sequential(
+            nn.Linear(input_size, 128),
+            nn.ReLU(),
+            nn.Linear(128, 64),
+            nn.ReLU(),
+            nn.Linear(64, num_classes),
+        )
+
+    def forward(self, x):
+        return self.net(x)
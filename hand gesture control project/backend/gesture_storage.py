@@ -2,7 +2,10 @@
 Gesture Storage Module
 ======================
 Central JSON-based database for gestures. Used by server.py and frontend APIs.
-Each gesture has: id, name, image, hittingTime (seconds).
+Each gesture has: id, name, image, hittingTime (seconds) and optionally
+motion (a dynamic_gestures.MOTIONS name, e.g. "swipe_left", that also fires it).
+Deleting a gesture also drops its recorded samples from the training
+dataset store next to the DB file (see dataset_store.py).
 """
 
 import json
@@ -44,7 +47,16 @@ def save_gestures(gestures: list, path=DEFAULT_DB_PATH):
         json.dump(gestures, f, indent=2)
 
 
-def add_gesture(name: str, image: str = "", hitting_time: float = 3, path=DEFAULT_DB_PATH) -> dict:
+def _prune_dataset(name: str, path):
+    """Remove a deleted gesture's training samples (imported lazily: numpy)."""
+    from dataset_store import open_store, store_for_db
+    root = store_for_db(path)
+    if os.path.isdir(root):
+        open_store(root).remove(name)
+
+
+def add_gesture(name: str, image: str = "", hitting_time: float = 3, path=DEFAULT_DB_PATH,
+                motion: str | None = None) -> dict:
     """
     Add a new gesture. Returns the added gesture with id.
     """
@@ -58,6 +70,8 @@ def add_gesture(name: str, image: str = "", hitting_time: float = 3, path=DEFAUL
         "image": image or "",
         "hittingTime": float(hitting_time),
     }
+    if motion:
+        g["motion"] = motion
     gestures.append(g)
     save_gestures(gestures, path)
     return g
@@ -67,9 +81,12 @@ def delete_gesture_by_id(gesture_id: str, path=DEFAULT_DB_PATH) -> bool:
     """Remove gesture by id. Returns True if removed."""
     gestures = load_gestures(path)
     before = len(gestures)
+    removed = [g for g in gestures if g.get("id") == gesture_id]
     gestures = [g for g in gestures if g.get("id") != gesture_id]
     if len(gestures) < before:
         save_gestures(gestures, path)
+        for g in removed:
+            _prune_dataset(g["name"], path)
         return True
     return False
 
@@ -81,6 +98,7 @@ def delete_gesture_by_name(name: str, path=DEFAULT_DB_PATH) -> bool:
     gestures = [g for g in gestures if g.get("name") != name]
     if len(gestures) < before:
         save_gestures(gestures, path)
+        _prune_dataset(name, path)
         return True
     return False
 
@@ -95,6 +113,7 @@ def delete_latest_gesture(path=DEFAULT_DB_PATH) -> dict | None:
         return None
     removed = gestures.pop()
     save_gestures(gestures, path)
+    _prune_dataset(removed["name"], path)
     return removed
 
 
@@ -125,3 +144,24 @@ def update_gesture_image(gesture_id: str, image: str, path=DEFAULT_DB_PATH) -> b
             save_gestures(gestures, path)
             return True
     return False
+
+
+def set_gesture_motion(gesture_id: str, motion: str | None, path=DEFAULT_DB_PATH) -> bool:
+    """
+    Bind a motion (e.g. "swipe_left") to a gesture by id, or unbind with None.
+    A motion fires at most one gesture: it is removed from any other gesture.
+    Returns True if the gesture exists.
+    """
+    gestures = load_gestures(path)
+    if not any(g.get("id") == gesture_id for g in gestures):
+        return False
+    for g in gestures:
+        if g.get("id") == gesture_id:
+            if motion:
+                g["motion"] = motion
+            else:
+                g.pop("motion", None)
+        elif motion and g.get("motion") == motion:
+            g.pop("motion")
+    save_gestures(gestures, path)
+    return True
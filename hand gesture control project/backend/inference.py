@@ -0,0 +1,438 @@
+"""
+Gesture Classifier Inference Backends
+=====================================
+Recognition needs only three small Linear layers, so the default backend
+runs the forward pass, softmax and argmax in pure NumPy with preallocated
+buffers. torch is imported only by the torch/torchscript backends and when
+an artifact has to be (re)exported from model.pt.
+
+Backends:
+- numpy:       model.npz, pure NumPy
+- torch:       eager GestureANN from model.pt
+- torchscript: model.ts (traced GestureANN + softmax)
+- onnx:        model.onnx on onnxruntime's CPU provider (if installed)
+- int8:        model.int8.ts, dynamic int8 quantization of the Linear layers.
+               Built after training and only activated if it agrees with the
+               float model on held-out samples (model.int8.json); otherwise
+               load_classifier falls back to numpy
+- auto:        times every available backend once per model and machine,
+               caches the winner in inference_choice.json
+
+Backends share one interface:
+- predict_proba(features) -> (num_classes,) probabilities
+- predict(features)       -> (class id, confidence)
+- predict_proba_batch(X)  -> (N, num_classes)
+
+Weights: model.pt (state_dict, written by training) is exported to
+model.npz / model.ts / model.onnx next to it (export_all); load_classifier()
+re-exports an artifact when it is missing or older than model.pt. model.npz
+records the SHA-256 of the model.pt it came from and is re-exported when
+that no longer matches (file mtimes are arbitrary after a clone/checkout).
+"""
+
+import hashlib
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+BACKENDS = ("numpy", "torch", "torchscript", "onnx", "int8", "auto")
+
+# Minimum top-1 agreement between the int8 and float models on held-out samples
+QUANT_MIN_AGREEMENT = 0.98
+
+# Linear layer indices inside GestureANN.net (Linear, ReLU, Linear, ReLU, Linear)
+_LINEAR_LAYERS = (0, 2, 4)
+
+
+def model_digest(model_pt: str) -> str:
+    """SHA-256 of model.pt's bytes (identifies the weights an artifact was exported from)."""
+    with open(model_pt, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def npz_path_for(model_pt: str) -> str:
+    return os.path.splitext(model_pt)[0] + ".npz"
+
+
+def torchscript_path_for(model_pt: str) -> str:
+    return os.path.splitext(model_pt)[0] + ".ts"
+
+
+def onnx_path_for(model_pt: str) -> str:
+    return os.path.splitext(model_pt)[0] + ".onnx"
+
+
+def int8_path_for(model_pt: str) -> str:
+    return os.path.splitext(model_pt)[0] + ".int8.ts"
+
+
+def int8_report_path_for(model_pt: str) -> str:
+    return os.path.splitext(model_pt)[0] + ".int8.json"
+
+
+def _with_softmax(model):
+    """GestureANN followed by softmax, so exported graphs return probabilities."""
+    import torch.nn as nn
+    return nn.Sequential(model, nn.Softmax(dim=1)).eval()
+
+
+def export_torchscript(model, path: str):
+    """Trace model (+ softmax) to a TorchScript file."""
+    import torch
+    example = torch.zeros(1, model.net[0].in_features)
+    with torch.no_grad():
+        traced = torch.jit.trace(_with_softmax(model), example)
+    tmp = path + ".tmp"
+    traced.save(tmp)
+    os.replace(tmp, path)
+
+
+def export_onnx(model, path: str):
+    """Export model (+ softmax) to ONNX with a dynamic batch dimension."""
+    import torch
+    example = torch.zeros(1, model.net[0].in_features)
+    tmp = path + ".tmp"
+    kwargs = dict(input_names=["features"], output_names=["probs"],
+                  dynamic_axes={"features": {0: "batch"}, "probs": {0: "batch"}})
+    try:
+        torch.onnx.export(_with_softmax(model), example, tmp, dynamo=False, **kwargs)
+    except TypeError:  # older torch without the dynamo switch
+        torch.onnx.export(_with_softmax(model), example, tmp, **kwargs)
+    os.replace(tmp, path)
+
+
+def export_all(model, model_pt: str) -> dict:
+    """
+    Write every inference artifact for a trained GestureANN. npz is required;
+    TorchScript/ONNX are best-effort. Returns {backend: path or error string}.
+    """
+    out = {}
+    export_npz(model.state_dict(), npz_path_for(model_pt),
+               model_digest(model_pt) if os.path.exists(model_pt) else None)
+    out["numpy"] = npz_path_for(model_pt)
+    for name, fn, path in (("torchscript", export_torchscript, torchscript_path_for(model_pt)),
+                           ("onnx", export_onnx, onnx_path_for(model_pt))):
+        try:
+            fn(model, path)
+            out[name] = path
+        except Exception as e:
+            print(f"{name} export failed:", e)
+            out[name] = f"error: {e}"
+    return out
+
+
+def quantize_dynamic(model):
+    """Dynamic int8 quantization of GestureANN's Linear layers (weights int8, activations quantized per call)."""
+    import torch
+    import torch.nn as nn
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8).eval()
+
+
+def build_int8(model, model_pt: str, X_check, min_agreement: float = QUANT_MIN_AGREEMENT) -> dict:
+    """
+    Quantize a trained float GestureANN and compare top-1 predictions of both
+    models on X_check (held-out samples). The int8 artifact is written only if
+    agreement >= min_agreement; otherwise any previous one is removed so the
+    int8 backend cannot load a model that does not match model.pt.
+    Returns the report (also saved as model.int8.json).
+    """
+    import torch
+    path = int8_path_for(model_pt)
+    report = {"accepted": False, "agreement": None, "minAgreement": min_agreement,
+              "samples": int(len(X_check))}
+    try:
+        qmodel = quantize_dynamic(model)
+        x = torch.from_numpy(np.ascontiguousarray(X_check, dtype=np.float32))
+        with torch.no_grad():
+            ref = model(x).argmax(dim=1)
+            got = qmodel(x).argmax(dim=1)
+        report["agreement"] = round(float((ref == got).float().mean()), 4) if len(x) else None
+        report["accepted"] = report["agreement"] is not None and report["agreement"] >= min_agreement
+        if report["accepted"]:
+            with torch.no_grad():
+                traced = torch.jit.trace(_with_softmax(qmodel), x[:1])
+            traced.save(path + ".tmp")
+            os.replace(path + ".tmp", path)
+    except Exception as e:
+        report["error"] = str(e)
+    if not report["accepted"] and os.path.exists(path):
+        os.remove(path)
+    report_path = int8_report_path_for(model_pt)
+    with open(report_path + ".tmp", "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(report_path + ".tmp", report_path)
+    return report
+
+
+def export_npz(state_dict, path: str, source_digest: str | None = None):
+    """
+    Write GestureANN weights as w0,b0,w1,b1,w2,b2 (weights transposed for
+    x @ w), plus source_sha256 = model_digest() of the model.pt they came from.
+    """
+    arrays = {"source_sha256": np.array(source_digest or "")}
+    for i, layer in enumerate(_LINEAR_LAYERS):
+        w = state_dict[f"net.{layer}.weight"]
+        b = state_dict[f"net.{layer}.bias"]
+        arrays[f"w{i}"] = np.ascontiguousarray(w.detach().cpu().numpy().T, dtype=np.float32)
+        arrays[f"b{i}"] = b.detach().cpu().numpy().astype(np.float32)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+class _Classifier:
+    """Shared predict(): argmax + confidence over predict_proba()."""
+
+    def predict(self, features) -> tuple[int, float]:
+        probs = self.predict_proba(features)
+        i = int(probs.argmax())
+        return i, float(probs[i])
+
+
+class NumpyClassifier(_Classifier):
+    """Torch-free forward pass. Single-sample calls reuse preallocated buffers."""
+
+    backend = "numpy"
+
+    def __init__(self, weights: dict):
+        self.w = [np.ascontiguousarray(weights[f"w{i}"], dtype=np.float32) for i in range(3)]
+        self.b = [np.asarray(weights[f"b{i}"], dtype=np.float32).reshape(1, -1) for i in range(3)]
+        self.num_classes = self.w[2].shape[1]
+        self._h = [np.empty((1, w.shape[1]), dtype=np.float32) for w in self.w]
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyClassifier":
+        with np.load(path) as data:
+            return cls({k: data[k] for k in data.files if k != "source_sha256"})
+
+    def predict_proba(self, features) -> np.ndarray:
+        """Probabilities for one 63-element feature vector (view into an internal buffer)."""
+        x = np.asarray(features, dtype=np.float32).reshape(1, -1)
+        for i in range(3):
+            h = self._h[i]
+            np.matmul(x, self.w[i], out=h)
+            h += self.b[i]
+            if i < 2:
+                np.maximum(h, 0, out=h)
+            x = h
+        # Softmax in place on the logits buffer
+        x -= x.max()
+        np.exp(x, out=x)
+        x /= x.sum()
+        return x[0]
+
+    def predict_proba_batch(self, X) -> np.ndarray:
+        x = np.asarray(X, dtype=np.float32)
+        for i in range(3):
+            x = x @ self.w[i] + self.b[i]
+            if i < 2:
+                np.maximum(x, 0, out=x)
+        x = np.exp(x - x.max(axis=1, keepdims=True))
+        return x / x.sum(axis=1, keepdims=True)
+
+
+class TorchClassifier(_Classifier):
+    """Eager PyTorch wrapper with the same interface."""
+
+    backend = "torch"
+
+    def __init__(self, model):
+        import torch
+        self._torch = torch
+        self.model = model.eval()
+        self.num_classes = model.net[4].out_features
+
+    def predict_proba(self, features) -> np.ndarray:
+        torch = self._torch
+        x = torch.from_numpy(np.asarray(features, dtype=np.float32)).reshape(1, -1)  # zero-copy view
+        with torch.no_grad():
+            return torch.softmax(self.model(x), dim=1)[0].numpy()
+
+    def predict_proba_batch(self, X) -> np.ndarray:
+        torch = self._torch
+        with torch.no_grad():
+            x = torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32))
+            return torch.softmax(self.model(x), dim=1).numpy()
+
+
+class TorchScriptClassifier(_Classifier):
+    """Traced GestureANN + softmax (model.ts)."""
+
+    backend = "torchscript"
+
+    def __init__(self, path: str):
+        import torch
+        self._torch = torch
+        self.module = torch.jit.load(path, map_location="cpu").eval()
+
+    def predict_proba(self, features) -> np.ndarray:
+        x = self._torch.from_numpy(np.asarray(features, dtype=np.float32)).reshape(1, -1)
+        with self._torch.no_grad():
+            return self.module(x)[0].numpy()
+
+    def predict_proba_batch(self, X) -> np.ndarray:
+        with self._torch.no_grad():
+            return self.module(self._torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32))).numpy()
+
+
+class Int8Classifier(TorchScriptClassifier):
+    """Dynamically quantized GestureANN + softmax (model.int8.ts)."""
+
+    backend = "int8"
+
+
+class OnnxClassifier(_Classifier):
+    """GestureANN + softmax (model.onnx) on onnxruntime's CPU provider."""
+
+    backend = "onnx"
+
+    def __init__(self, path: str):
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        # Tiny graph: thread pools cost more than they save.
+        opts.intra_op_num_threads = 1
+        opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self._input = self.session.get_inputs()[0].name
+
+    def predict_proba(self, features) -> np.ndarray:
+        x = np.asarray(features, dtype=np.float32).reshape(1, -1)
+        return self.session.run(None, {self._input: x})[0][0]
+
+    def predict_proba_batch(self, X) -> np.ndarray:
+        return self.session.run(None, {self._input: np.ascontiguousarray(X, dtype=np.float32)})[0]
+
+
+def _load_state_dict(model_pt: str):
+    import torch
+    return torch.load(model_pt, map_location="cpu")
+
+
+def _load_torch_model(model_pt: str, num_classes: int):
+    from gesture_model import GestureANN
+    state = _load_state_dict(model_pt)
+    model = GestureANN(num_classes=state["net.4.bias"].shape[0] if "net.4.bias" in state else num_classes)
+    model.load_state_dict(state)
+    return model.eval()
+
+
+def _npz_digest(path: str) -> str | None:
+    try:
+        with np.load(path) as data:
+            return str(data["source_sha256"]) if "source_sha256" in data.files else None
+    except (OSError, ValueError):
+        return None
+
+
+def _stale(artifact: str, model_pt: str) -> bool:
+    if not os.path.exists(artifact):
+        return True
+    return os.path.exists(model_pt) and os.path.getmtime(artifact) < os.path.getmtime(model_pt)
+
+
+def _load_backend(model_pt: str, num_classes: int, backend: str):
+    has_pt = os.path.exists(model_pt)
+    if backend == "numpy":
+        npz = npz_path_for(model_pt)
+        if has_pt:
+            digest = model_digest(model_pt)
+            if _npz_digest(npz) != digest:
+                export_npz(_load_state_dict(model_pt), npz, digest)
+        elif not os.path.exists(npz):
+            return None
+        return NumpyClassifier.load(npz)
+    if not has_pt:
+        return None
+    if backend == "torch":
+        return TorchClassifier(_load_torch_model(model_pt, num_classes))
+    if backend == "torchscript":
+        path = torchscript_path_for(model_pt)
+        if _stale(path, model_pt):
+            export_torchscript(_load_torch_model(model_pt, num_classes), path)
+        return TorchScriptClassifier(path)
+    if backend == "onnx":
+        path = onnx_path_for(model_pt)
+        if _stale(path, model_pt):
+            export_onnx(_load_torch_model(model_pt, num_classes), path)
+        return OnnxClassifier(path)
+    if backend == "int8":
+        # Never re-quantized here: without held-out samples the accuracy
+        # check cannot run, so only an artifact accepted by build_int8 loads.
+        path = int8_path_for(model_pt)
+        if _stale(path, model_pt):
+            return None
+        return Int8Classifier(path)
+    raise ValueError(f"Unknown inference backend '{backend}'")
+
+
+def time_classifier(clf, features, number: int = 300) -> float:
+    """Median-of-3 per-call latency of clf.predict in microseconds."""
+    clf.predict(features)
+    rounds = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            clf.predict(features)
+        rounds.append((time.perf_counter() - t0) / number * 1e6)
+    return sorted(rounds)[1]
+
+
+def _choice_path(model_pt: str) -> str:
+    return os.path.join(os.path.dirname(model_pt), "inference_choice.json")
+
+
+def _select_fastest(model_pt: str, num_classes: int):
+    """
+    Time every loadable backend on this machine and return the fastest.
+    The choice is cached per model file + host so later starts skip timing
+    (and never import runtimes they will not use).
+    """
+    key = {"model_sha256": model_digest(model_pt) if os.path.exists(model_pt) else None,
+           "host": platform.node()}
+    try:
+        with open(_choice_path(model_pt), "r") as f:
+            cached = json.load(f)
+        if all(cached.get(k) == v for k, v in key.items()):
+            clf = _load_backend(model_pt, num_classes, cached["backend"])
+            if clf is not None:
+                return clf
+    except Exception:
+        pass
+
+    sample = np.random.default_rng(0).uniform(-1, 1, 63).astype(np.float32)
+    timings, best = {}, None
+    for name in ("numpy", "onnx", "int8", "torchscript", "torch"):
+        try:
+            clf = _load_backend(model_pt, num_classes, name)
+        except Exception as e:
+            timings[name] = f"unavailable: {e}"
+            continue
+        if clf is None:
+            continue
+        timings[name] = round(time_classifier(clf, sample), 2)
+        if best is None or timings[name] < timings[best.backend]:
+            best = clf
+    if best is not None:
+        with open(_choice_path(model_pt), "w") as f:
+            json.dump({**key, "backend": best.backend, "timingsUs": timings}, f, indent=2)
+    return best
+
+
+def load_classifier(model_pt: str, num_classes: int, backend: str = "numpy"):
+    """
+    Load the classifier for model_pt with the given backend, or None if no
+    model exists. Artifacts are (re)exported from model.pt when stale; for
+    the numpy backend that is the only time torch is imported.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' (expected one of {BACKENDS})")
+    if backend == "auto":
+        return _select_fastest(model_pt, num_classes)
+    clf = _load_backend(model_pt, num_classes, backend)
+    if clf is None and backend == "int8" and os.path.exists(model_pt):
+        print("No accepted int8 model for", model_pt, "- using numpy backend")
+        return _load_backend(model_pt, num_classes, "numpy")
+    return clf
@@ -0,0 +1,213 @@
+"""
+Nearest-Neighbour Gesture Classifier
+====================================
+Few-shot alternative to the trained MLP: stores normalized landmark vectors
+(core.normalize_landmarks, 63 floats) per gesture and classifies a frame by
+k-nearest-neighbour vote. A gesture is usable the moment it is recorded and
+disappears the moment it is deleted; no training run.
+
+- Exact search: one vectorized squared-distance pass over every stored
+  vector (|X|^2 precomputed; a single matrix-vector product per frame).
+- Approximate search (large sets, default above 20k vectors): each gesture
+  is summarized by a few k-means centroids; a frame is only compared with
+  the samples of the n_probe gestures owning the nearest centroids.
+- Rejection: neighbours farther than reject_distance do not vote. By default
+  the distance is derived from the data (reject_scale x the median
+  nearest-neighbour spacing inside a gesture), so a hand pose unlike any
+  recorded gesture reports confidence 0 instead of the closest label.
+
+Instances are immutable: with_gesture()/without_gesture() return a new
+classifier (unchanged gestures share their arrays), which fits the engine's
+swap_model(). Same interface as inference.py backends: predict_proba,
+predict (returns (-1, 0.0) when rejected) and predict_proba_batch.
+"""
+
+import numpy as np
+
+FEATURES = 63
+
+
+def _subsample(X, limit: int) -> np.ndarray:
+    """Copy of X (in-memory, float32) with at most limit evenly spaced rows."""
+    X = np.asarray(X, dtype=np.float32).reshape(-1, FEATURES)
+    if limit and len(X) > limit:
+        X = X[np.linspace(0, len(X) - 1, limit).astype(np.int64)]
+    return np.array(X, dtype=np.float32)
+
+
+def _nn_spacing(X, limit: int = 200) -> float:
+    """Median distance from a sample to its nearest other sample of the same gesture."""
+    if len(X) < 2:
+        return 0.0
+    S = X[np.linspace(0, len(X) - 1, min(len(X), limit)).astype(np.int64)]
+    sq = (S * S).sum(axis=1)
+    d2 = sq[:, None] - 2 * S @ S.T + sq[None, :]
+    np.fill_diagonal(d2, np.inf)
+    return float(np.median(np.sqrt(np.maximum(d2.min(axis=1), 0))))
+
+
+def _centroids(X, count: int, iters: int = 5) -> np.ndarray:
+    """A few Lloyd iterations from evenly spaced seeds (deterministic)."""
+    count = max(1, min(count, len(X)))
+    C = X[np.linspace(0, len(X) - 1, count).astype(np.int64)].copy()
+    for _ in range(iters):
+        assign = ((X[:, None, :] - C[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        for j in range(count):
+            members = X[assign == j]
+            if len(members):
+                C[j] = members.mean(axis=0)
+    return C
+
+
+class KNNClassifier:
+    backend = "knn"
+
+    def __init__(self, gestures=None, k: int = 5, reject_distance: float | None = None,
+                 reject_scale: float = 3.0, approximate: bool | None = None,
+                 approx_threshold: int = 20000, centroids_per_gesture: int = 4,
+                 n_probe: int = 8, max_per_gesture: int = 300):
+        """
+        gestures: {name: (n, 63) samples}, order = label ids. approximate:
+        True/False forces the search mode, None switches to approximate above
+        approx_threshold stored vectors.
+        """
+        self.k = k
+        self.reject_scale = reject_scale
+        self.max_per_gesture = max_per_gesture
+        self.approx_threshold = approx_threshold
+        self.centroids_per_gesture = centroids_per_gesture
+        self.n_probe = n_probe
+        self._approximate = approximate
+        self._reject_distance = reject_distance
+        # name -> (nn spacing, centroids); reused by derived instances
+        self._stats = {}
+        self._gestures = {}
+        for name, X in (gestures or {}).items():
+            self._gestures[name] = _subsample(X, max_per_gesture)
+        self._build()
+
+    # -------------------------------------------------------------------------
+    # INDEX
+    # -------------------------------------------------------------------------
+
+    def _build(self):
+        names = list(self._gestures)
+        self.label_to_id = {name: i for i, name in enumerate(names)}
+        self.id_to_label = {i: name for i, name in enumerate(names)}
+        self.num_classes = len(names)
+        counts = [len(self._gestures[n]) for n in names]
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        if names:
+            self._X = np.concatenate([self._gestures[n] for n in names])
+            self._y = np.repeat(np.arange(len(names)), counts)
+        else:
+            self._X = np.zeros((0, FEATURES), dtype=np.float32)
+            self._y = np.zeros(0, dtype=np.int64)
+        self._sq = (self._X * self._X).sum(axis=1)
+
+        for name in names:
+            if name not in self._stats:
+                X = self._gestures[name]
+                self._stats[name] = (_nn_spacing(X), _centroids(X, self.centroids_per_gesture) if len(X) else X)
+        self._stats = {n: self._stats[n] for n in names}
+
+        if self._reject_distance is not None:
+            self.reject_distance = self._reject_distance
+        else:
+            spacings = [s for s, _ in self._stats.values() if s > 0]
+            self.reject_distance = self.reject_scale * float(np.median(spacings)) if spacings else np.inf
+
+        self.approximate = (self._approximate if self._approximate is not None
+                            else len(self._X) > self.approx_threshold) and self.num_classes > self.n_probe
+        if self.approximate:
+            cents = [self._stats[n][1] for n in names]
+            self._cent = np.concatenate(cents)
+            self._cent_owner = np.repeat(np.arange(len(names)), [len(c) for c in cents])
+            self._cent_sq = (self._cent * self._cent).sum(axis=1)
+
+    def _derive(self, gestures: dict, stale=()) -> "KNNClassifier":
+        """Same settings, new gesture set; cached stats are reused except for stale names."""
+        clf = KNNClassifier.__new__(KNNClassifier)
+        for attr in ("k", "reject_scale", "max_per_gesture", "approx_threshold", "centroids_per_gesture",
+                     "n_probe", "_approximate", "_reject_distance"):
+            setattr(clf, attr, getattr(self, attr))
+        clf._stats = {n: s for n, s in self._stats.items() if n not in stale}
+        clf._gestures = gestures
+        clf._build()
+        return clf
+
+    def with_gesture(self, name: str, X) -> "KNNClassifier":
+        """New classifier with gesture name set to samples X (added, or replaced in place)."""
+        gestures = dict(self._gestures)
+        gestures[name] = _subsample(X, self.max_per_gesture)
+        return self._derive(gestures, stale=(name,))
+
+    def without_gesture(self, name: str) -> "KNNClassifier":
+        """New classifier without gesture name (unchanged if absent)."""
+        if name not in self._gestures:
+            return self
+        gestures = {n: X for n, X in self._gestures.items() if n != name}
+        return self._derive(gestures)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, **kwargs) -> "KNNClassifier":
+        """Build from a dataset_store.DatasetSnapshot (every stored gesture)."""
+        return cls({name: snapshot.gesture(name) for name in snapshot.names}, **kwargs)
+
+    def stats(self) -> dict:
+        return {"gestures": self.num_classes, "vectors": int(len(self._X)), "k": self.k,
+                "rejectDistance": None if np.isinf(self.reject_distance) else round(self.reject_distance, 4),
+                "approximate": bool(self.approximate)}
+
+    # -------------------------------------------------------------------------
+    # QUERY
+    # -------------------------------------------------------------------------
+
+    def _candidates(self, x) -> np.ndarray | None:
+        """Row indices to search (approximate mode), or None for all rows."""
+        if not self.approximate:
+            return None
+        d2 = self._cent_sq - 2 * (self._cent @ x)
+        owners = self._cent_owner[np.argsort(d2)]
+        # First n_probe distinct gestures, nearest centroid first
+        _, first = np.unique(owners, return_index=True)
+        probe = owners[np.sort(first)[:self.n_probe]]
+        return np.concatenate([np.arange(self._offsets[g], self._offsets[g + 1]) for g in probe])
+
+    def _neighbors(self, x) -> tuple[np.ndarray, np.ndarray]:
+        """(distances, label ids) of the k nearest stored vectors, nearest first."""
+        rows = self._candidates(x)
+        X, sq, y = (self._X, self._sq, self._y) if rows is None else (self._X[rows], self._sq[rows], self._y[rows])
+        d2 = sq - 2 * (X @ x) + float(x @ x)
+        k = min(self.k, len(d2))
+        nearest = np.argpartition(d2, k - 1)[:k] if k < len(d2) else np.arange(len(d2))
+        nearest = nearest[np.argsort(d2[nearest])]
+        return np.sqrt(np.maximum(d2[nearest], 0)), y[nearest]
+
+    def predict_proba(self, features) -> np.ndarray:
+        """
+        Distance-weighted vote of the k nearest neighbours. Neighbours beyond
+        reject_distance still count towards the total weight but vote for
+        nothing, so far-away frames get low (or zero) confidence.
+        """
+        probs = np.zeros(self.num_classes, dtype=np.float32)
+        if not len(self._X):
+            return probs
+        x = np.asarray(features, dtype=np.float32).reshape(-1)
+        dist, labels = self._neighbors(x)
+        weights = 1.0 / (dist + 1e-3)
+        accepted = dist <= self.reject_distance
+        np.add.at(probs, labels[accepted], weights[accepted])
+        probs /= weights.sum()
+        return probs
+
+    def predict(self, features) -> tuple[int, float]:
+        probs = self.predict_proba(features)
+        if not probs.size or probs.max() <= 0:
+            return -1, 0.0
+        i = int(probs.argmax())
+        return i, float(probs[i])
+
+    def predict_proba_batch(self, X) -> np.ndarray:
+        return np.stack([self.predict_proba(x) for x in np.asarray(X, dtype=np.float32)]) \
+            if len(X) else np.zeros((0, self.num_classes), dtype=np.float32)
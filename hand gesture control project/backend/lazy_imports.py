@@ -0,0 +1,94 @@
+"""
+Lazy Imports
+============
+Heavy dependencies (cv2, mediapipe, torch, pyautogui, mss, groq) are
+imported on first use instead of when the server starts, so gesture CRUD
+and static files are served right away.
+
+    cv2 = lazy_imports.load("cv2")                  # imported once, then cached
+    pyautogui = lazy_imports.load("pyautogui", optional=True)   # None if unavailable
+    lazy_imports.prewarm(["cv2", "mediapipe"])      # background thread
+
+Every import made through load() is timed; report() (served at
+/api/startup) lists how long each one took, in which thread, and any
+startup milestones recorded with mark().
+"""
+
+import importlib
+import sys
+import threading
+import time
+
+_T0 = time.perf_counter()
+_imports = {}  # name -> {seconds, atSec, thread[, error]}
+_marks = {}    # milestone -> seconds since this module was imported
+_prewarm = {"state": "off", "modules": []}
+
+
+def load(name: str, optional: bool = False):
+    """
+    Import module `name` (timed on first import). With optional=True a
+    failing import returns None instead of raising; some packages (e.g.
+    pyautogui without a display) fail with errors other than ImportError.
+    """
+    mod = sys.modules.get(name)
+    if mod is not None:
+        return mod
+    t0 = time.perf_counter()
+    try:
+        mod = importlib.import_module(name)
+    except Exception as e:
+        _imports.setdefault(name, {"seconds": round(time.perf_counter() - t0, 4),
+                                   "atSec": round(t0 - _T0, 4),
+                                   "thread": threading.current_thread().name,
+                                   "error": f"{type(e).__name__}: {e}"})
+        if optional:
+            return None
+        raise
+    # Two threads may race on the same module; Python's import lock makes
+    # the second one wait, and only the first timing is kept.
+    _imports.setdefault(name, {"seconds": round(time.perf_counter() - t0, 4),
+                               "atSec": round(t0 - _T0, 4),
+                               "thread": threading.current_thread().name})
+    return mod
+
+
+def mark(event: str):
+    """Record a startup milestone (e.g. "listening") relative to module import."""
+    _marks[event] = round(time.perf_counter() - _T0, 4)
+
+
+def prewarm(names, wait_for=None) -> threading.Thread:
+    """
+    Import names in a daemon thread. wait_for: optional blocking callable run
+    first (e.g. wait until the HTTP socket accepts connections). Failures are
+    recorded in report() and never propagate.
+    """
+    def run():
+        if wait_for is not None:
+            wait_for()
+        _prewarm["state"] = "running"
+        mark("prewarm_start")
+        for name in names:
+            load(name, optional=True)
+        mark("prewarm_done")
+        _prewarm["state"] = "done"
+        print("Prewarmed:", ", ".join(
+            f"{n} {_imports[n]['seconds']:.2f}s" + (" (failed)" if "error" in _imports[n] else "")
+            for n in names if n in _imports))
+
+    _prewarm["state"] = "pending"
+    _prewarm["modules"] = list(names)
+    t = threading.Thread(target=run, name="prewarm", daemon=True)
+    t.start()
+    return t
+
+
+def report() -> dict:
+    """Import timings, startup milestones and prewarm state."""
+    return {
+        "uptimeSec": round(time.perf_counter() - _T0, 3),
+        "marks": dict(_marks),
+        "imports": {name: dict(info) for name, info in _imports.items()},
+        "prewarm": dict(_prewarm),
+    }
@@ -0,0 +1,88 @@
+"""
+Local LLM Stand-in
+==================
+Minimal OpenAI-compatible chat completions endpoint for running and testing
+the command resolver chain without network access or an API key. Answers
+the "Instruction: ..." line of the prompt from an IntentIndex (built-in
+intents + gesture_history.json), or NOT_EXECUTABLE.
+
+    python backend/llm_stub_server.py --port 8765 [--delay 0.3]
+    GROQ_BASE_URL=http://127.0.0.1:8765 python server.py
+
+Serves POST /openai/v1/chat/completions (the Groq SDK path) and
+/v1/chat/completions. --delay simulates network latency.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(__file__))
+from command_resolver import DEFAULT_INTENTS, NOT_EXECUTABLE, IntentIndex
+
+_INSTRUCTION = re.compile(r"Instruction:\s*(.*)")
+
+
+def make_server(port: int = 0, index: IntentIndex | None = None, delay: float = 0.0,
+                host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """HTTP server answering from index (default: history + built-ins). port=0 picks a free port."""
+    if index is None:
+        index = IntentIndex()
+        index.load_history()
+        for phrase, command in DEFAULT_INTENTS:
+            index.add(phrase, command)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                prompt = body["messages"][-1]["content"]
+            except (ValueError, KeyError, IndexError):
+                self.send_error(400)
+                return
+            found = _INSTRUCTION.search(prompt)
+            command = index.match(found.group(1))[0] if found else None
+            if delay:
+                time.sleep(delay)
+            out = json.dumps({
+                "object": "chat.completion",
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": command or NOT_EXECUTABLE}}],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve_in_background(**kwargs) -> ThreadingHTTPServer:
+    """Start make_server(**kwargs) in a daemon thread; base URL: http://127.0.0.1:<server.server_port>."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    args = ap.parse_args()
+    httpd = make_server(args.port, delay=args.delay, host=args.host)
+    print(f"LLM stub on http://{args.host}:{httpd.server_port} (set GROQ_BASE_URL to this)")
+    httpd.serve_forever()
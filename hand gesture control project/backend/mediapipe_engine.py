@@ -2,38 +2,109 @@
 MediaPipe + ANN Engine
 ======================
 Extracted and refactored from testing.py. Runs MediaPipe hand detection
-and ANN gesture recognition. Supports:
-- Frame callbacks (for MJPEG stream)
+and ANN gesture recognition as a staged pipeline:
+capture thread -> detect/classify thread -> render/encode thread,
+connected by latest-frame-wins slots (see frame_pipeline.py). Supports:
+- Frame broadcaster / callbacks (for MJPEG stream; encoded only when watched)
 - Prediction callbacks (gesture, confidence)
 - Recording mode (collects landmarks for training)
+- Pluggable frame sources (camera, video file, image dir, landmark replay;
+  see frame_sources.py)
+- Session recording of every frame's landmarks/predictions (session_recorder.py)
+- Hand-ROI detection: crop around the previous frame's hand and downscale
+  before MediaPipe; full-frame detection when tracking is lost
+- Idle rate governor: low detection FPS when no hand for a while (rate_governor.py)
+- Deadline-based pacing to a target detection FPS (pacing.py)
+- Per-stage latency histograms (metrics.py, served at /api/metrics)
+- Selectable inference backend: torch-free NumPy (default), PyTorch,
+  TorchScript, ONNX Runtime or "auto" (fastest on this machine; inference.py).
+  torch is only imported for training or the torch-based backends
+- Dynamic int8 quantized model built after training, activated only if it
+  matches the float model on held-out samples (backend="int8")
+- Recordings accumulate in a persistent dataset store; training always uses
+  every stored sample, in minibatches (dataset_store.py, trainer.py)
+- Hot swap of classifier, labels and hitting times on a running engine
+  (swap_model / load_model); the camera stays open
+- classifier_mode="knn": few-shot nearest-neighbour classifier over the
+  dataset store; gestures are added/removed instantly, no training
+  (knn_classifier.py)
+- Trigger stability from time-smoothed class probabilities (EMA or windowed
+  mean) with thresholds in seconds, independent of frame rate
+  (temporal_filter.py)
+- Optional dynamic gestures (swipes, circles) from a sliding window of palm
+  positions; a recognized motion fires the gesture bound to it via
+  motion_bindings (dynamic_gestures.py)
+- Triggered gestures are resolved and executed on a worker pool
+  (action_executor.py); the detect thread never waits on the LLM
 """
 
 import cv2
-import mediapipe as mp
 import numpy as np
-import torch
-import torch.nn as nn
 import threading
 import time
 import os
+from typing import NamedTuple
 
 # Import shared components from core (avoids importing testing.py which blocks)
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
+from frame_pipeline import LatestSlot, StageStats
+from frame_sources import open_source
+from session_recorder import SessionRecorder
+from rate_governor import RateGovernor
+from pacing import FramePacer
+import lazy_imports
+import metrics
+from inference import QUANT_MIN_AGREEMENT, load_classifier
+from trainer import DEFAULT_MODEL_PATH, artifacts_lock, labels_path_for, train_and_export
+from dataset_store import DEFAULT_STORE_DIR, open_store
+from knn_classifier import KNNClassifier
+from temporal_filter import TemporalFilter
+from dynamic_gestures import DynamicGestureRecognizer
+from action_executor import ActionExecutor
 from core import (
-    GestureANN,
+    landmarks_to_array,
     normalize_landmarks,
     llm_to_command,
     execute_command,
 )
 
 
+# Hand skeleton edges (same as mediapipe.solutions.hands.HAND_CONNECTIONS), for
+# drawing without importing MediaPipe (landmark sources never load it).
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),          # thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),          # index
+    (5, 9), (9, 10), (10, 11), (11, 12),     # middle
+    (9, 13), (13, 14), (14, 15), (15, 16),   # ring
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),  # pinky + palm base
+)
+
+
+class ModelState(NamedTuple):
+    """
+    Everything prediction needs, swapped as one reference. The detect thread
+    reads engine._model_state once per frame, so a frame never mixes an old
+    classifier with new labels; swap_model() builds a new instance instead of
+    mutating this one.
+    """
+    classifier: object | None
+    label_to_id: dict
+    id_to_label: dict
+    hitting_times: dict  # {gesture_name: seconds}
+    version: int = 0
+
+
 class MediaPipeEngine:
     """
-    MediaPipe + ANN engine. Runs in a background thread.
-    - frame_callback: (frame_jpeg_bytes, hand_detected: bool) called each frame
+    MediaPipe + ANN engine. Runs as a pipeline of background threads.
+    - broadcaster: FrameBroadcaster that receives rendered frames; overlay and
+      JPEG encoding are skipped while it has no subscribers
+    - frame_callback: (frame_jpeg_bytes or None, hand_detected: bool) called each frame
+      (bytes are None when a broadcaster skipped encoding)
     - prediction_callback: (gesture: str, confidence: float) when gesture detected
     - recording_callback: (done: bool) when recording finishes
+    - trigger_callback: (gesture: str, timestamp: float) when a gesture's timer completes
     """
 
     def __init__(
@@ -42,31 +113,114 @@ class MediaPipeEngine:
         prediction_callback=None,
         recording_callback=None,
         llm_execute_callback=None,
+        trigger_callback=None,
         use_separate_window=False,
         camera_index=0,
+        source=None,
+        realtime=False,
+        broadcaster=None,
+        roi_mode=False,
+        roi_margin=0.3,
+        roi_size=256,
+        detect_max_side=None,
+        capture_max_size=None,
+        model_complexity=1,
+        idle_fps=3.0,
+        idle_after_sec=10.0,
+        target_fps=None,
+        inference_backend="numpy",
+        quantize=True,
+        quant_min_agreement=QUANT_MIN_AGREEMENT,
+        quant_holdout=0.2,
+        dataset_dir=None,
+        classifier_mode="mlp",
+        smoothing="ema",
+        smoothing_window_sec=0.5,
+        stable_sec=0.2,
+        dynamic_gestures=False,
+        action_executor=None,
     ):
         self.frame_callback = frame_callback
+        self.broadcaster = broadcaster
         self.prediction_callback = prediction_callback
         self.recording_callback = recording_callback
         self.llm_execute_callback = llm_execute_callback
+        self.trigger_callback = trigger_callback
+        # False: report triggers only, never run commands (replay / dry run)
+        self.execute_actions = True
+        # Resolves + runs commands off the detect thread (may be shared between engines)
+        self.actions = action_executor or ActionExecutor(resolve=llm_to_command, execute=execute_command)
         self.use_separate_window = use_separate_window
         self.camera_index = camera_index
+        # Frame source spec: None -> camera_index; else path / FrameSource (see open_source)
+        self.source = source
+        self.realtime = realtime
+        # Capture resolution cap (width, height); larger frames are downscaled
+        self.capture_max_size = capture_max_size
+
+        # Detection input: ROI crop (square, roi_size px) around the last hand,
+        # full frame downscaled to detect_max_side px otherwise.
+        self.roi_mode = roi_mode
+        self.roi_margin = roi_margin
+        self.roi_size = roi_size
+        self.detect_max_side = detect_max_side
+        self.model_complexity = model_complexity
+        self._roi_hands = None
+        self._roi_box = None  # (x0, y0, side) in pixels, from previous frame
+        self.roi_hits = 0
+        self.roi_misses = 0
+
+        # Preallocated per-frame buffers (detect stage only). Landmark buffers
+        # rotate so the one handed to the render stage is not overwritten
+        # while it is still being drawn.
+        self._lm_pool = np.zeros((4, 21, 3), dtype=np.float32)
+        self._lm_next = 0
+        self._features = np.zeros((21, 3), dtype=np.float32)
+
+        # Detection rate: full while a hand is present, idle_fps after
+        # idle_after_sec without one. idle_fps=0 disables throttling.
+        self.governor = RateGovernor(idle_fps, idle_after_sec) if idle_fps else None
+        # Active detection rate cap; None = as fast as the source delivers.
+        self.target_fps = target_fps
+        self.pacer = FramePacer(target_fps)
 
         self._running = False
         self._thread = None
+        self._threads = []
         self._lock = threading.Lock()
+        self._stop_event = threading.Event()
 
-        # MediaPipe
-        self.mp_hands = mp.solutions.hands
-        self.hands = None
-        self.mp_draw = mp.solutions.drawing_utils
-        self.cap = None
+        # Pipeline hand-offs (created in start())
+        self._capture_slot = None
+        self._render_slot = None
+        self._stats = {}
 
-        # ANN model
-        self.model = None
-        self.label_to_id = {}
-        self.id_to_label = {}
-        self.model_path = os.path.join(os.path.dirname(__file__), "model.pt")
+        # MediaPipe hands solution, imported in start() for image sources only
+        self.mp_hands = None
+        self.hands = None
+        self.cap = None  # active FrameSource
+        self._source_landmarks = False  # source skips MediaPipe detection
+
+        # ANN model: classifier object from inference.py (predict / predict_proba),
+        # labels and hitting times, published together (see ModelState).
+        # model / label_to_id / id_to_label / gesture_hitting_times are views of it.
+        self.inference_backend = inference_backend
+        self._model_state = ModelState(None, {}, {}, {})
+        self._swap_lock = threading.Lock()
+        self.model_path = DEFAULT_MODEL_PATH
+        # int8 quantization after training: fraction of recorded samples held
+        # out of training for the float-vs-int8 agreement check.
+        self.quantize = quantize
+        self.quant_min_agreement = quant_min_agreement
+        self.quant_holdout = quant_holdout
+        self.int8_report = None
+        # Every recording is appended here; training reads all of it.
+        self.dataset = open_store(dataset_dir or DEFAULT_STORE_DIR)
+        # "mlp": trained GestureANN (model.pt); "knn": KNNClassifier built
+        # from the dataset store, updated per gesture. knn_options are passed
+        # to KNNClassifier (k, reject_distance, approximate, ...).
+        self.classifier_mode = classifier_mode
+        self.knn_options = {}
 
         # Recording state
         self.recording = False
@@ -75,95 +229,281 @@ class MediaPipeEngine:
         self.Y_data = []
         self.recording_duration_sec = 4  # default
 
-        # Prediction state
-        self.confidence_threshold = 0.85
-        self.stable_frames_required = 8
-        self.gesture_counter = 0
+        # Prediction state: a gesture is stable once its smoothed probability
+        # stays above the threshold for stable_sec
+        self.temporal_filter = TemporalFilter(mode=smoothing, window_sec=smoothing_window_sec,
+                                              threshold=0.85, stable_sec=stable_sec)
+        self._filter_version = None  # model version the filter's history belongs to
+        # Motion gestures: motion name (dynamic_gestures.MOTIONS) -> gesture name to fire
+        self.motion = DynamicGestureRecognizer() if dynamic_gestures else None
+        self.motion_bindings = {}
         self.current_detected = None
         self.last_exec_time = 0
         self.cooldown_sec = 4
 
         # Timer state (for LLM execution)
-        self.gesture_hitting_times = {}  # {gesture_name: seconds}
         self.timer_active_gesture = None
         self.timer_start_time = None
         self.timer_duration = 3
 
-    def load_model(self):
-        """Load ANN model and label mapping from disk if available."""
+        # Session recording (see start_session_recording)
+        self.session_recorder = None
+
+    # -------------------------------------------------------------------------
+    # MODEL STATE (hot swap)
+    # -------------------------------------------------------------------------
+
+    @property
+    def model_state(self) -> ModelState:
+        return self._model_state
+
+    def swap_model(self, keep_label=None, **changes) -> ModelState:
+        """
+        Atomically replace any of classifier, label_to_id, id_to_label,
+        hitting_times. Takes effect from the next frame; safe to call from
+        any thread while the engine runs. Dicts are copied, so callers may
+        keep mutating theirs.
+        keep_label(name) -> bool drops labels from the id_to_label being
+        swapped in, or else from the state current at swap time (under the
+        lock, so a concurrent swap, e.g. a finished training job, is filtered
+        instead of overwritten with stale labels).
+        """
+        for key in ("label_to_id", "id_to_label", "hitting_times"):
+            if key in changes:
+                changes[key] = dict(changes[key])
+        with self._swap_lock:
+            if keep_label is not None:
+                labels = changes.get("id_to_label", self._model_state.id_to_label)
+                id_to_label = {i: n for i, n in labels.items() if keep_label(n)}
+                changes["id_to_label"] = id_to_label
+                changes["label_to_id"] = {n: i for i, n in id_to_label.items()}
+            state = self._model_state._replace(version=self._model_state.version + 1, **changes)
+            self._model_state = state
+        rec = self.session_recorder
+        if rec and "id_to_label" in changes:
+            rec.set_labels(state.id_to_label)
+        return state
+
+    @property
+    def model(self):
+        return self._model_state.classifier
+
+    @model.setter
+    def model(self, classifier):
+        self.swap_model(classifier=classifier)
+
+    @property
+    def label_to_id(self) -> dict:
+        return self._model_state.label_to_id
+
+    @label_to_id.setter
+    def label_to_id(self, label_to_id: dict):
+        self.swap_model(label_to_id=label_to_id)
+
+    @property
+    def id_to_label(self) -> dict:
+        return self._model_state.id_to_label
+
+    @id_to_label.setter
+    def id_to_label(self, id_to_label: dict):
+        self.swap_model(id_to_label=id_to_label)
+
+    @property
+    def gesture_hitting_times(self) -> dict:
+        return self._model_state.hitting_times
+
+    @gesture_hitting_times.setter
+    def gesture_hitting_times(self, hitting_times: dict):
+        self.swap_model(hitting_times=hitting_times)
+
+    def load_model(self, keep_label=None):
+        """
+        Load ANN model and label mapping from disk if available and swap them
+        in together (works on a running engine; the camera stays open).
+        In knn mode the index is rebuilt from the dataset store instead.
+        keep_label: passed to swap_model, so labels of gestures deleted since
+        the model was trained are dropped in the same swap.
+        """
+        if self.classifier_mode == "knn":
+            knn = KNNClassifier.from_snapshot(self.dataset.snapshot(), **self.knn_options)
+            self.swap_model(keep_label=keep_label, classifier=knn, label_to_id=knn.label_to_id,
+                            id_to_label=knn.id_to_label)
+            return knn.num_classes > 0
         model_pt = self.model_path
-        labels_path = os.path.join(os.path.dirname(__file__), "label_mapping.json")
-        if os.path.exists(model_pt) and os.path.exists(labels_path):
+        labels_path = labels_path_for(model_pt)
+        with artifacts_lock:
+            if not (os.path.exists(model_pt) and os.path.exists(labels_path)):
+                return False
             import json
             with open(labels_path, "r") as f:
                 mapping = json.load(f)
-            self.label_to_id = mapping.get("label_to_id", {})
-            self.id_to_label = {int(k): v for k, v in mapping.get("id_to_label", {}).items()}
-            num_classes = max(len(self.label_to_id), 1)
-            self.model = GestureANN(num_classes=num_classes)
-            self.model.load_state_dict(torch.load(model_pt, map_location="cpu"))
-            self.model.eval()
-            return True
-        return False
+            label_to_id = mapping.get("label_to_id", {})
+            id_to_label = {int(k): v for k, v in mapping.get("id_to_label", {}).items()}
+            num_classes = max(len(label_to_id), 1)
+            classifier = load_classifier(model_pt, num_classes, self.inference_backend)
+        self.swap_model(keep_label=keep_label, classifier=classifier, label_to_id=label_to_id,
+                        id_to_label=id_to_label)
+        return classifier is not None
 
     def set_label_mapping(self, label_to_id: dict, id_to_label: dict):
         """Set label mapping (from gesture DB)."""
-        self.label_to_id = label_to_id
-        self.id_to_label = id_to_label
+        self.swap_model(label_to_id=label_to_id, id_to_label=id_to_label)
 
     def set_hitting_times(self, hitting_times: dict):
         """Set gesture hitting times: {gesture_name: seconds}."""
-        self.gesture_hitting_times = hitting_times
+        self.swap_model(hitting_times=hitting_times)
 
     def start(self):
-        """Start the engine in a background thread."""
+        """
+        Start the engine. Three background threads form the pipeline:
+        capture -> detect/classify -> render. Stages hand frames over through
+        latest-frame-wins slots, so a slow stage drops stale frames instead of
+        queueing them.
+        """
         with self._lock:
             if self._running:
                 return
             self._running = True
-        self.hands = self.mp_hands.Hands(
+        self._stop_event.clear()
+        spec = self.camera_index if self.source is None else self.source
+        self.cap = open_source(spec, realtime=self.realtime, max_size=self.capture_max_size)
+        self._source_landmarks = self.cap.provides_landmarks
+        if not self._source_landmarks:
+            try:
+                self.hands = self._new_hands()
+                # Separate instance for ROI crops: each graph always sees one input size.
+                if self.roi_mode:
+                    self._roi_hands = self._new_hands()
+            except Exception:
+                self.stop()
+                raise
+        self._roi_box = None
+        self._capture_slot = LatestSlot("capture")
+        self._render_slot = LatestSlot("render")
+        self._stats = {name: StageStats(name) for name in ("capture", "detect", "render")}
+        self._threads = [
+            threading.Thread(target=self._capture_loop, daemon=True),
+            threading.Thread(target=self._process_loop, daemon=True),
+            threading.Thread(target=self._render_loop, daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        self._thread = self._threads[1]
+
+    def wait_until_done(self, timeout: float | None = None) -> bool:
+        """
+        Block until the detect stage has consumed a finite source (video,
+        image dir, landmark replay). Returns True if it finished in time.
+        """
+        t = self._thread
+        if t:
+            t.join(timeout)
+            return not t.is_alive()
+        return True
+
+    def _new_hands(self):
+        if self.mp_hands is None:
+            mp = lazy_imports.load("mediapipe")
+            if not hasattr(mp, "solutions"):
+                raise RuntimeError("camera/video sources need mediapipe.solutions.hands "
+                                   f"(not in mediapipe {getattr(mp, '__version__', '?')}); "
+                                   "landmark recordings (.npy/.npz/.session) work without it")
+            self.mp_hands = mp.solutions.hands
+        return self.mp_hands.Hands(
             static_image_mode=False,
             max_num_hands=1,
-            model_complexity=1,
+            model_complexity=self.model_complexity,
             min_detection_confidence=0.6,
             min_tracking_confidence=0.6,
         )
-        self.cap = cv2.VideoCapture(self.camera_index)
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
 
     def stop(self):
         """
-        Stop MediaPipe loop, release camera, clean up threads.
-        Sets _running=False so _run_loop exits; joins thread; releases resources.
+        Stop MediaPipe pipeline, release camera, clean up threads.
+        Sets _stop_event so all stage loops exit; joins threads; releases resources.
         """
         with self._lock:
             if not self._running:
                 return
             self._running = False
-        if self._thread:
-            self._thread.join(timeout=3)
-            self._thread = None
+        self._stop_event.set()
+        if self._capture_slot:
+            self._capture_slot.close()
+        if self._render_slot:
+            self._render_slot.close()
+        for t in self._threads:
+            t.join(timeout=3)
+        self._threads = []
+        self._thread = None
         if self.cap:
             try:
                 self.cap.release()
             except Exception:
                 pass
             self.cap = None
-        if self.hands:
-            try:
-                self.hands.close()
-            except Exception:
-                pass
-            self.hands = None
+        for hands in (self.hands, self._roi_hands):
+            if hands:
+                try:
+                    hands.close()
+                except Exception:
+                    pass
+        self.hands = None
+        self._roi_hands = None
+        self.stop_session_recording()
         cv2.destroyAllWindows()
 
+    def is_running(self) -> bool:
+        """
+        True while the pipeline is delivering frames. False once the stage
+        threads have exited (finite source consumed, camera read failed, or
+        'q' pressed) even before stop() has released the source.
+        """
+        return self._running and bool(self._threads) and all(t.is_alive() for t in self._threads)
+
+    def get_status(self) -> dict:
+        """Runtime status for /api/status: governor state, measured FPS, pipeline counters."""
+        governor = self.governor.to_dict() if self.governor else None
+        if governor:
+            governor["measuredFps"] = round(self.pacer.achieved_fps, 1)
+        return {
+            "running": self.is_running(),
+            "governor": governor,
+            "pacing": self.pacer.to_dict(),
+            "pipeline": self.get_pipeline_stats(),
+            "inference": {"backend": getattr(self.model, "backend", None), "int8": self.int8_report,
+                          "modelVersion": self._model_state.version,
+                          "knn": self.model.stats() if isinstance(self.model, KNNClassifier) else None},
+            "smoothing": self.temporal_filter.to_dict(),
+            "dynamic": {**self.motion.to_dict(), "bindings": dict(self.motion_bindings)} if self.motion else None,
+        }
+
+    def get_pipeline_stats(self) -> dict:
+        """Per-stage processed/dropped counters: {stage: {processed, errors, dropped}}."""
+        return {
+            "capture": self._stats["capture"].to_dict(),
+            "detect": self._stats["detect"].to_dict(self._capture_slot),
+            "render": self._stats["render"].to_dict(self._render_slot),
+        } if self._stats else {}
+
+    def start_session_recording(self, path: str):
+        """Record every processed frame (landmarks, prediction, trigger) to a session dir."""
+        self.stop_session_recording()
+        self.session_recorder = SessionRecorder(path, id_to_label=self.id_to_label)
+
+    def stop_session_recording(self):
+        """Flush and close the active session recording, if any."""
+        rec, self.session_recorder = self.session_recorder, None
+        if rec:
+            rec.set_labels(self.id_to_label)
+            rec.close()
+
     def start_recording(self, label: str, duration_sec: float = 4):
         """Start recording landmarks for the given gesture label."""
-        if label not in self.label_to_id:
-            idx = len(self.label_to_id)
-            self.label_to_id[label] = idx
-            self.id_to_label[idx] = label
+        state = self._model_state
+        if label not in state.label_to_id:
+            idx = len(state.label_to_id)
+            self.swap_model(label_to_id={**state.label_to_id, label: idx},
+                            id_to_label={**state.id_to_label, idx: label})
         self.current_label = label
         self.recording = True
         self.X_data = []
@@ -171,152 +511,417 @@ class MediaPipeEngine:
         self.recording_duration_sec = duration_sec
 
     def stop_recording(self) -> tuple[list, list]:
-        """Stop recording and return (X_data, Y_data)."""
+        """Stop recording, append the samples to the dataset store and return (X_data, Y_data)."""
         self.recording = False
         x, y = self.X_data[:], self.Y_data[:]
+        if x and self.current_label:
+            self.dataset.append(self.current_label, np.asarray(x, dtype=np.float32))
+            if self.classifier_mode == "knn":
+                self._knn_update(self.current_label)
         self.current_label = None
         if self.recording_callback:
             self.recording_callback(done=True)
         return x, y
 
-    def train_and_save(self, X_data: list, Y_data: list):
-        """Train ANN and save model + label mapping."""
-        if not self.label_to_id:
-            return
-        import json
-        X = torch.tensor(np.array(X_data), dtype=torch.float32)
-        Y = torch.tensor(Y_data, dtype=torch.long)
-        self.model = GestureANN(num_classes=len(self.label_to_id))
-        opt = torch.optim.Adam(self.model.parameters(), lr=0.001)
-        loss_fn = nn.CrossEntropyLoss()
-        for _ in range(50):
-            out = self.model(X)
-            loss = loss_fn(out, Y)
-            opt.zero_grad()
-            loss.backward()
-            opt.step()
-        self.model.eval()
-        torch.save(self.model.state_dict(), self.model_path)
-        labels_path = os.path.join(os.path.dirname(__file__), "label_mapping.json")
-        with open(labels_path, "w") as f:
-            json.dump({
-                "label_to_id": self.label_to_id,
-                "id_to_label": {str(k): v for k, v in self.id_to_label.items()},
-            }, f, indent=2)
-
-    def _run_loop(self):
-        """Main processing loop (runs in thread)."""
-        while self._running and self.cap and self.hands:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb)
-            hand_detected = results.multi_hand_landmarks is not None
-
-            display_text = "IDLE"
-
-            if results.multi_hand_landmarks:
-                lm = results.multi_hand_landmarks[0]
-                self.mp_draw.draw_landmarks(frame, lm, self.mp_hands.HAND_CONNECTIONS)
-
-                landmark_list = [[p.x, p.y, p.z] for p in lm.landmark]
-                features = normalize_landmarks(landmark_list)
-
-                if self.recording and self.current_label:
-                    self.X_data.append(features)
-                    self.Y_data.append(self.label_to_id[self.current_label])
-                    display_text = f"REC {self.current_label}"
-
-                elif not self.recording and self.model and self.label_to_id:
-                    tensor = torch.tensor(features, dtype=torch.float32).unsqueeze(0)
-                    with torch.no_grad():
-                        out = self.model(tensor)
-                        probs = torch.softmax(out, dim=1)
-                        conf, pred = torch.max(probs, dim=1)
-                    conf_val = conf.item()
-                    pred_id = pred.item()
-                    gesture = self.id_to_label.get(pred_id, "Unknown")
-
-                    hitting_time = self.gesture_hitting_times.get(gesture, 3)
-                    timer_elapsed = 0.0
-                    now = time.time()
-
-                    if conf_val > self.confidence_threshold:
-                        display_text = gesture
-
-                        if gesture == self.current_detected:
-                            self.gesture_counter += 1
-                        else:
-                            self.current_detected = gesture
-                            self.gesture_counter = 1
-
-                        if self.gesture_counter >= self.stable_frames_required:
-                            # Check cooldown
-                            if now - self.last_exec_time > self.cooldown_sec:
-                                # Start timer: LLM executes only after hitting_time seconds
-                                if not self.timer_active_gesture or self.timer_active_gesture != gesture:
-                                    self.timer_active_gesture = gesture
-                                    self.timer_start_time = now
-                                    self.timer_duration = hitting_time
-
-                                timer_elapsed = now - self.timer_start_time
-
-                                if timer_elapsed >= hitting_time:
-                                    # Timer completed - execute LLM
-                                    try:
-                                        cmd = llm_to_command(gesture)
-                                        execute_command(cmd)
-                                        if self.llm_execute_callback:
-                                            self.llm_execute_callback(gesture, cmd)
-                                    except Exception as e:
-                                        print("LLM ERROR:", e)
-                                    self.last_exec_time = now
-                                    self.timer_active_gesture = None
-                                    self.gesture_counter = 0
-                        else:
-                            # Gesture stable but timer not started yet
-                            if self.timer_active_gesture == gesture and self.timer_start_time:
-                                timer_elapsed = now - self.timer_start_time
-
-                    else:
-                        self.gesture_counter = 0
-                        self.current_detected = None
-
-                    # Report prediction + confidence + timer to frontend
-                    if self.prediction_callback:
-                        self.prediction_callback(gesture, conf_val, hitting_time, timer_elapsed)
-            else:
-                self.gesture_counter = 0
-                self.current_detected = None
-                self.timer_active_gesture = None
-                if self.prediction_callback:
-                    self.prediction_callback("None", 0.0, 3.0, 0.0)
+    def _knn_update(self, name: str):
+        """Put every stored sample of gesture name into the k-NN index (instant, no training)."""
+        knn = self._model_state.classifier
+        if not isinstance(knn, KNNClassifier):
+            knn = KNNClassifier(**self.knn_options)
+        knn = knn.with_gesture(name, self.dataset.snapshot().gesture(name))
+        self.swap_model(classifier=knn, label_to_id=knn.label_to_id, id_to_label=knn.id_to_label)
 
+    def remove_gesture(self, name: str):
+        """
+        Forget a deleted gesture. knn mode: dropped from the index at once.
+        mlp mode: its label is dropped (the class can no longer trigger);
+        the class itself goes away with the next training run.
+        """
+        state = self._model_state
+        if isinstance(state.classifier, KNNClassifier):
+            knn = state.classifier.without_gesture(name)
+            self.swap_model(classifier=knn, label_to_id=knn.label_to_id, id_to_label=knn.id_to_label)
+        elif name in state.label_to_id:
+            self.swap_model(keep_label=lambda n: n != name)
+
+    def train_and_save(self, progress=None, should_stop=None) -> dict | None:
+        """
+        Train the ANN on the whole dataset store (every gesture recorded so
+        far, labels in store order) and save model + label mapping.
+        progress(step, total_steps, loss) is called after each epoch;
+        should_stop() cancels (trainer.TrainingCancelled) before anything is
+        written. Safe to run in a background thread while the engine keeps
+        recording. Returns a summary dict, or None if the store is empty.
+        knn mode: rebuilds the k-NN index from the store instead (no torch).
+        """
+        if self.classifier_mode == "knn":
+            self.load_model()
+            knn = self._model_state.classifier
+            return {"classifier": "knn", **knn.stats(), "labels": list(knn.label_to_id)}
+        # Training (trainer.train_and_export) is the only recognition-side path that needs torch.
+        summary = train_and_export(self.dataset.snapshot(), self.model_path, quantize=self.quantize,
+                                   quant_holdout=self.quant_holdout,
+                                   quant_min_agreement=self.quant_min_agreement,
+                                   progress=progress, should_stop=should_stop)
+        if summary is None:
+            return None
+        if summary["int8"] is not None:
+            self.int8_report = summary["int8"]
+        id_to_label = dict(enumerate(summary["labels"]))
+        with artifacts_lock:
+            classifier = load_classifier(self.model_path, len(id_to_label), self.inference_backend)
+        self.swap_model(classifier=classifier, id_to_label=id_to_label,
+                        label_to_id={name: i for i, name in id_to_label.items()})
+        return summary
+
+    # -------------------------------------------------------------------------
+    # PIPELINE STAGES
+    # -------------------------------------------------------------------------
+
+    def _capture_loop(self):
+        """Stage 1: read source frames into the latest-frame-wins capture slot."""
+        stats = self._stats["capture"]
+        lossless = self.cap.lossless
+        while not self._stop_event.is_set() and self.cap:
+            m = metrics.active()
+            if m:
+                t0 = time.perf_counter()
+            frame = self.cap.read()
+            if frame is None:
+                break
+            if m:
+                m.observe("capture", time.perf_counter() - t0)
+            stats.processed += 1
+            self._capture_slot.put(frame, wait=lossless)
+        # Source ended/failed or stop requested: let downstream stages drain and exit.
+        self._capture_slot.close()
+
+    def _process_loop(self):
+        """Stage 2: MediaPipe detection + ANN classification on the freshest frame."""
+        stats = self._stats["detect"]
+        # Lossless playback (benchmarks/replay) must not be throttled.
+        governor = None if self.cap.lossless else self.governor
+        pacer = self.pacer
+        pacer.set_fps(None if self.cap.lossless else self.target_fps)
+        while not self._stop_event.is_set():
+            if governor:
+                pacer.set_fps(governor.target_fps(self.target_fps))
+            if pacer.wait(self._stop_event):
+                break
+            item = self._capture_slot.get(timeout=0.1)
+            if item is None:
+                if self._capture_slot.closed:
+                    break
+                continue
+            m = metrics.active()
+            if m:
+                t0 = time.perf_counter()
+            try:
+                pts, display_text = self._process_frame(item)
+            except Exception as e:
+                stats.errors += 1
+                print("Engine processing error:", e)
+                continue
+            if m:
+                m.observe("detect_total", time.perf_counter() - t0)
+            stats.processed += 1
+            if governor:
+                governor.update(pts is not None)
+            self._render_slot.put((item.image, pts, display_text))
+        self._render_slot.close()
+
+    def _render_loop(self):
+        """Stage 3: draw overlay, JPEG-encode, deliver frame (and optional window)."""
+        stats = self._stats["render"]
+        while not self._stop_event.is_set():
+            item = self._render_slot.get(timeout=0.1)
+            if item is None:
+                if self._render_slot.closed:
+                    break
+                continue
+            frame, pts, display_text = item
+            bc = self.broadcaster
+            watched = bc is None or bc.has_subscribers
+            if not watched and not self.use_separate_window:
+                # Nobody is looking at the feed: skip overlay and encoding.
+                if self.frame_callback:
+                    self.frame_callback(None, pts is not None)
+                stats.processed += 1
+                continue
+
+            m = metrics.active()
+            if m:
+                t0 = time.perf_counter()
+            if pts is not None:
+                self._draw_landmarks(frame, pts)
             cv2.putText(frame, display_text, (20, 50),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+            if m:
+                t1 = time.perf_counter()
+                m.observe("draw", t1 - t0)
 
-            # Send frame to callback (MJPEG)
-            _, jpeg = cv2.imencode(".jpg", frame)
+            # Send frame to broadcaster / callback (MJPEG)
+            if bc is not None:
+                jpeg = bc.publish(frame)
+            else:
+                _, buf = cv2.imencode(".jpg", frame)
+                jpeg = buf.tobytes()
+            if m:
+                t2 = time.perf_counter()
+                m.observe("jpeg_encode", t2 - t1)
             if self.frame_callback:
-                self.frame_callback(jpeg.tobytes(), hand_detected)
+                self.frame_callback(jpeg, pts is not None)
+            if m:
+                m.observe("frame_callback", time.perf_counter() - t2)
+            stats.processed += 1
 
             # Optional: show OpenCV window (for Focus mode separate window - small/minimized)
             if self.use_separate_window:
                 small = cv2.resize(frame, (320, 240))
                 cv2.imshow("MediaPipe Hand Detection", small)
                 if cv2.waitKey(1) & 0xFF == ord("q"):
+                    # Wind every stage down, then release camera and trackers
+                    # from another thread (stop() joins this one).
+                    self._stop_event.set()
+                    self._capture_slot.close()
+                    threading.Thread(target=self.stop, daemon=True).start()
                     break
-            else:
-                time.sleep(0.03)  # ~30 FPS cap
+        if self.use_separate_window:
+            cv2.destroyAllWindows()
+
+    def _draw_landmarks(self, frame, pts):
+        """Draw hand skeleton from (21, 3) normalized landmarks onto frame."""
+        h, w = frame.shape[:2]
+        xy = [(int(x * w), int(y * h)) for x, y, _ in pts]
+        for a, b in HAND_CONNECTIONS:
+            cv2.line(frame, xy[a], xy[b], (255, 255, 255), 2)
+        for p in xy:
+            cv2.circle(frame, p, 4, (0, 0, 255), -1)
+
+    def _detect(self, frame) -> np.ndarray | None:
+        """
+        Hand landmarks for one source frame as (21, 3) array in full-frame
+        normalized coordinates, or None if no hand.
+        """
+        if self._source_landmarks:
+            return frame.landmarks
+        img = frame.image
+        if self.roi_mode and self._roi_box:
+            pts = self._detect_roi(img, self._roi_box)
+            if pts is not None:
+                self.roi_hits += 1
+                self._roi_box = self._next_roi(pts, img.shape)
+                return pts
+            # Tracking lost: fall back to full-frame palm detection.
+            self.roi_misses += 1
+        pts = self._run_hands(self.hands, img, self.detect_max_side)
+        if self.roi_mode:
+            self._roi_box = self._next_roi(pts, img.shape) if pts is not None else None
+        return pts
+
+    def _run_hands(self, hands, img, max_side=None) -> np.ndarray | None:
+        """Run MediaPipe on img (optionally downscaled). Landmarks normalized to img."""
+        h, w = img.shape[:2]
+        if max_side and max(h, w) > max_side:
+            scale = max_side / max(h, w)
+            img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        m = metrics.active()
+        if m:
+            t0 = time.perf_counter()
+        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        if m:
+            t1 = time.perf_counter()
+            m.observe("color_convert", t1 - t0)
+        results = hands.process(rgb)
+        if m:
+            m.observe("hands_process", time.perf_counter() - t1)
+        if not results.multi_hand_landmarks:
+            return None
+        buf = self._lm_pool[self._lm_next]
+        self._lm_next = (self._lm_next + 1) % len(self._lm_pool)
+        return landmarks_to_array(results.multi_hand_landmarks[0].landmark, out=buf)
+
+    def _detect_roi(self, img, box) -> np.ndarray | None:
+        """Detect inside a square crop resized to roi_size; map back to full frame."""
+        x0, y0, side = box
+        crop = cv2.resize(img[y0:y0 + side, x0:x0 + side], (self.roi_size, self.roi_size),
+                          interpolation=cv2.INTER_AREA)
+        pts = self._run_hands(self._roi_hands, crop)
+        if pts is None:
+            return None
+        h, w = img.shape[:2]
+        pts[:, 0] = (pts[:, 0] * side + x0) / w
+        pts[:, 1] = (pts[:, 1] * side + y0) / h
+        pts[:, 2] *= side / w  # MediaPipe z uses the same scale as x
+        return pts
+
+    def _next_roi(self, pts, shape):
+        """Square pixel box around the landmarks' bounding box plus margin, kept inside the frame."""
+        h, w = shape[:2]
+        xs = pts[:, 0] * w
+        ys = pts[:, 1] * h
+        cx, cy = (xs.min() + xs.max()) / 2, (ys.min() + ys.max()) / 2
+        side = max(xs.max() - xs.min(), ys.max() - ys.min()) * (1 + 2 * self.roi_margin)
+        side = int(min(max(side, 32), w, h))
+        x0 = int(min(max(cx - side / 2, 0), w - side))
+        y0 = int(min(max(cy - side / 2, 0), h - side))
+        return x0, y0, side
+
+    def _process_frame(self, frame):
+        """Detect + classify one SourceFrame. Returns (landmarks or None, display_text)."""
+        pts = self._detect(frame)
+        return pts, self.process_landmarks(pts, frame.timestamp)
+
+    def process_landmarks(self, pts, now: float) -> str:
+        """
+        Handle one frame's landmarks ((21, 3) or None if no hand) captured at
+        time now. Drives training recording, session recording, prediction
+        callbacks and the stability/timer logic. Returns the overlay text.
+        Also the offline entry point used by session replay.
+        """
+        if pts is None:
+            self._reset_detection()
+            if self.prediction_callback:
+                self.prediction_callback("None", 0.0, 3.0, 0.0)
+            self._record_session(now, None)
+            return "IDLE"
+
+        m = metrics.active()
+        if m:
+            t0 = time.perf_counter()
+        # Normalized in place into a reused buffer; copy before keeping it.
+        features = normalize_landmarks(pts, out=self._features)
+        if m:
+            m.observe("normalize_landmarks", time.perf_counter() - t0)
+
+        # One model snapshot per frame; swaps land between frames.
+        state = self._model_state
+        if self.recording and self.current_label:
+            self.X_data.append(features.copy())
+            self.Y_data.append(state.label_to_id.get(self.current_label, -1))
+            self._record_session(now, pts)
+            return f"REC {self.current_label}"
+
+        if self.motion is not None:
+            if m:
+                t0 = time.perf_counter()
+            hit = self.motion.update(pts, features, now)
+            if m:
+                m.observe("dynamic_gesture", time.perf_counter() - t0)
+            if hit:
+                self._fire_motion(hit[0], now)
+
+        display_text = "IDLE"
+        if not self.recording and state.classifier and state.label_to_id:
+            if m:
+                t0 = time.perf_counter()
+            gesture, conf_val, stable = self._classify(features, now, state)
+            if m:
+                m.observe("model_forward", time.perf_counter() - t0)
+            display_text, hitting_time, timer_elapsed = self._update_trigger(gesture, conf_val, stable, now, state)
+            # Report prediction + confidence + timer to frontend
+            if self.prediction_callback:
+                if m:
+                    t0 = time.perf_counter()
+                self.prediction_callback(gesture, conf_val, hitting_time, timer_elapsed)
+                if m:
+                    m.observe("prediction_callback", time.perf_counter() - t0)
+            self._record_session(now, pts, state.label_to_id.get(gesture, -1), conf_val,
+                                 self.last_exec_time == now)
+        else:
+            self._record_session(now, pts)
+        return display_text
+
+    def _record_session(self, now, pts, pred=-1, conf=0.0, fired=False):
+        rec = self.session_recorder
+        if rec:
+            rec.append(now, pts, pred, conf, fired)
+
+    def _classify(self, features, now: float, state: ModelState | None = None) -> tuple[str, float, bool]:
+        """
+        Run the classifier on one 63-element feature vector and smooth the
+        probabilities over time. Returns (gesture, smoothed confidence,
+        stable); classes without a label (e.g. a gesture deleted since
+        training) come back as ("Unknown", 0.0, False) so they never trigger.
+        """
+        state = state or self._model_state
+        if state.version != self._filter_version:
+            # Class ids may mean something else after a swap
+            self.temporal_filter.reset()
+            self._filter_version = state.version
+        pred, conf, stable = self.temporal_filter.update(state.classifier.predict_proba(features), now)
+        label = state.id_to_label.get(pred)
+        if label is None:
+            return "Unknown", 0.0, False
+        return label, conf, stable
+
+    def _reset_detection(self):
+        """Hand lost: reset smoothing history, motion window and any running timer."""
+        self.temporal_filter.reset()
+        if self.motion is not None:
+            self.motion.reset()
+        self.current_detected = None
+        self.timer_active_gesture = None
 
-        # Loop exited: release resources. Do NOT call self.stop() (would deadlock:
-        # stop() joins this thread, but we are IN this thread).
-        if self.cap:
-            self.cap.release()
-            self.cap = None
-        if self.hands:
-            self.hands.close()
-            self.hands = None
-        cv2.destroyAllWindows()
+    def _update_trigger(self, gesture: str, conf_val: float, stable: bool, now: float,
+                        state: ModelState | None = None):
+        """
+        Stability + cooldown + hitting-time timer. Fires the gesture's action
+        once the timer completes. Returns (display_text, hitting_time, timer_elapsed).
+        """
+        hitting_time = (state or self._model_state).hitting_times.get(gesture, 3)
+        timer_elapsed = 0.0
+
+        if not stable and conf_val <= self.temporal_filter.threshold:
+            self.current_detected = None
+            return "IDLE", hitting_time, timer_elapsed
+        self.current_detected = gesture
+
+        if stable:
+            # Check cooldown
+            if now - self.last_exec_time > self.cooldown_sec:
+                # Start timer: LLM executes only after hitting_time seconds
+                if not self.timer_active_gesture or self.timer_active_gesture != gesture:
+                    self.timer_active_gesture = gesture
+                    self.timer_start_time = now
+                    self.timer_duration = hitting_time
+
+                timer_elapsed = now - self.timer_start_time
+
+                if timer_elapsed >= hitting_time:
+                    # Timer completed - execute LLM
+                    self._fire(gesture, now)
+                    self.last_exec_time = now
+                    self.timer_active_gesture = None
+                    self.temporal_filter.reset()
+        else:
+            # Gesture stable but timer not started yet
+            if self.timer_active_gesture == gesture and self.timer_start_time:
+                timer_elapsed = now - self.timer_start_time
+
+        return gesture, hitting_time, timer_elapsed
+
+    def _fire_motion(self, motion: str, now: float):
+        """
+        A motion completed: fire its bound gesture (no hitting-time timer;
+        motions are deliberate). Shares the pose triggers' cooldown.
+        """
+        gesture = self.motion_bindings.get(motion)
+        if not gesture or now - self.last_exec_time <= self.cooldown_sec:
+            return
+        self._fire(gesture, now, source="motion")
+        # The static pose held during the motion must not fire right after it
+        self.last_exec_time = now
+        self.timer_active_gesture = None
+        self.temporal_filter.reset()
+
+    def _fire(self, gesture: str, now: float, source: str = "pose"):
+        """
+        Report the trigger and hand the gesture to the action executor, which
+        resolves it via LLM and executes it in the background (never blocks).
+        """
+        if self.trigger_callback:
+            self.trigger_callback(gesture, now)
+        if not self.execute_actions:
+            return
+        self.actions.submit(gesture, source, on_done=self.llm_execute_callback)
@@ -0,0 +1,122 @@
+"""
+Latency Metrics
+===============
+Low-overhead, fixed-bucket latency histograms for the recognition hot path
+and the desktop stream. Served by /api/metrics as JSON or Prometheus text.
+
+Hot-path usage (nothing is timed while metrics are disabled):
+
+    m = metrics.active()
+    if m:
+        t0 = time.perf_counter()
+    ...work...
+    if m:
+        m.observe("hands_process", time.perf_counter() - t0)
+
+Enable/disable with GESTURE_METRICS=1|0 (default on) or METRICS.enabled.
+"""
+
+import bisect
+import os
+import threading
+
+# Upper bounds in seconds (100 us .. 5 s); one overflow bucket above the last.
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram. observe() is a bisect plus three increments."""
+
+    def __init__(self, name: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate (linear within bucket) of the q-quantile in seconds."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                lo = self.bounds[i - 1] if i > 0 else 0.0
+                hi = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lo + (hi - lo) * (target - seen) / c
+            seen += c
+        return self.bounds[-1]
+
+    def to_dict(self) -> dict:
+        ms = lambda v: round(v * 1000, 3) if v is not None else None
+        return {
+            "count": self.count,
+            "meanMs": ms(self.sum / self.count) if self.count else None,
+            "p50Ms": ms(self.quantile(0.5)),
+            "p90Ms": ms(self.quantile(0.9)),
+            "p99Ms": ms(self.quantile(0.99)),
+            # [upper bound in seconds, count] pairs; a list keeps bucket order in JSON
+            "buckets": [[b, c] for b, c in zip(self.bounds + ("+Inf",), self.counts)],
+        }
+
+
+class Metrics:
+    """Registry of named histograms."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        h = self._histograms.get(name)
+        if h is None:
+            with self._lock:
+                h = self._histograms.setdefault(name, Histogram(name))
+        return h
+
+    def observe(self, name: str, seconds: float):
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "stages": {name: h.to_dict() for name, h in sorted(self._histograms.items())},
+        }
+
+    def to_prometheus(self, metric: str = "gesture_stage_seconds") -> str:
+        """Prometheus text exposition format (cumulative buckets)."""
+        lines = [
+            f"# HELP {metric} Per-stage latency of the gesture recognition path.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, h in sorted(self._histograms.items()):
+            cumulative = 0
+            for bound, c in zip(h.bounds + ("+Inf",), h.counts):
+                cumulative += c
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {h.sum}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics(enabled=os.environ.get("GESTURE_METRICS", "1") == "1")
+
+
+def active() -> Metrics | None:
+    """The registry if metrics are enabled, else None (cheap hot-path guard)."""
+    return METRICS if METRICS.enabled else None
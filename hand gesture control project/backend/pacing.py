@@ -0,0 +1,94 @@
+"""
+Frame Pacing
+============
+Deadline-based frame scheduler shared by the engine, the desktop capture
+loop and the MJPEG broadcasters.
+
+Instead of sleeping a fixed amount after each frame (which adds processing
+time on top of the sleep), FramePacer keeps a monotonic deadline per frame:
+- wait() sleeps only for what is left of the frame period.
+- A frame that finishes late is absorbed by the next deadline, so the
+  average rate stays on target.
+- If a frame overruns by more than a whole period the schedule is resynced
+  (counted in overruns) instead of bursting to catch up.
+fps=None/0 means unpaced; achieved FPS is still measured.
+"""
+
+import time
+
+
+class FramePacer:
+    def __init__(self, fps: float | None = None):
+        self.fps = fps
+        self.frames = 0
+        self.overruns = 0
+        self.achieved_fps = 0.0
+        self._next = None
+        self._window_start = None
+        self._window_count = 0
+
+    def set_fps(self, fps: float | None):
+        """Change target rate; the new period applies from the next frame."""
+        if fps != self.fps:
+            self.fps = fps
+            self._next = None
+
+    def wait(self, stop_event=None) -> bool:
+        """
+        Block until this frame's deadline. stop_event (threading.Event) makes
+        the wait interruptible. Returns True if stop_event was set.
+        """
+        now = time.monotonic()
+        if self.fps:
+            period = 1.0 / self.fps
+            if self._next is None:
+                self._next = now
+            delay = self._next - now
+            if delay > 0:
+                if stop_event is not None:
+                    if stop_event.wait(delay):
+                        return True
+                else:
+                    time.sleep(delay)
+                now = time.monotonic()
+            elif -delay > period:
+                self.overruns += 1
+                self._next = now
+            self._next += period
+        self._tick(now)
+        return False
+
+    def ready(self) -> bool:
+        """
+        Non-blocking variant for producers that must not sleep: True if the
+        current deadline has passed (and consumes it), False to skip this frame.
+        """
+        now = time.monotonic()
+        if self.fps:
+            period = 1.0 / self.fps
+            if self._next is not None and now < self._next:
+                return False
+            if self._next is None or now - self._next > period:
+                self._next = now
+            self._next += period
+        self._tick(now)
+        return True
+
+    def _tick(self, now: float):
+        self.frames += 1
+        if self._window_start is None:
+            self._window_start = now
+        self._window_count += 1
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.achieved_fps = (self._window_count - 1) / elapsed
+            self._window_start = now
+            self._window_count = 1
+
+    def to_dict(self) -> dict:
+        return {
+            "targetFps": self.fps,
+            "achievedFps": round(self.achieved_fps, 1),
+            "frames": self.frames,
+            "overruns": self.overruns,
+        }
@@ -0,0 +1,41 @@
+"""
+Inference Rate Governor
+=======================
+Decides how fast the engine runs hand detection:
+- "active": full rate (engine target FPS) while a hand is present.
+- "idle":   idle_fps after idle_after_sec without a hand, to cut CPU/power
+            on kiosks that sit unattended for hours.
+A single detection switches straight back to "active".
+
+The rate itself is enforced by the engine's FramePacer (pacing.py).
+"""
+
+import time
+
+
+class RateGovernor:
+    def __init__(self, idle_fps: float = 3.0, idle_after_sec: float = 10.0):
+        self.idle_fps = idle_fps
+        self.idle_after_sec = idle_after_sec
+        self.state = "active"
+        self._last_hand = time.monotonic()
+
+    def update(self, hand_detected: bool, now: float | None = None):
+        """Record one detection result; switches state as needed."""
+        now = time.monotonic() if now is None else now
+        if hand_detected:
+            self._last_hand = now
+            self.state = "active"
+        elif now - self._last_hand >= self.idle_after_sec:
+            self.state = "idle"
+
+    def target_fps(self, active_fps: float | None) -> float | None:
+        """Detection rate for the current state (active_fps None = unpaced)."""
+        return self.idle_fps if self.state == "idle" else active_fps
+
+    def to_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "idleFps": self.idle_fps,
+            "idleAfterSec": self.idle_after_sec,
+        }
@@ -0,0 +1,224 @@
+"""
+Landmark Session Recorder / Replayer
+====================================
+Captures what the engine saw, frame by frame, into a compact columnar
+session directory that can be memory-mapped back without parsing:
+
+  <name>.session/
+    meta.json        version, chunk size, label mapping
+    timestamp.f64    (N,)     capture time (seconds since epoch)
+    present.u8       (N,)     1 if a hand was detected
+    landmarks.f32    (N, 63)  21x3 landmarks (NaN when no hand)
+    pred.i32         (N,)     predicted class id (-1 if not classified)
+    conf.f32         (N,)     prediction confidence
+    fired.u8         (N,)     1 if the gesture action fired on this frame
+
+Rows are buffered in preallocated chunks and appended as raw little-endian
+arrays, so the row count is derived from file sizes (a crashed session is
+still readable up to its last flushed chunk).
+
+replay_session() feeds a recording back through normalize_landmarks, the
+classifier and the stability/timer logic of a MediaPipeEngine, as fast as
+possible, and reports triggers and agreement with the recorded predictions.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+SESSION_VERSION = 1
+SESSION_SUFFIX = ".session"
+
+# column name -> (dtype, values per row)
+COLUMNS = {
+    "timestamp": ("<f8", 1),
+    "present": ("u1", 1),
+    "landmarks": ("<f4", 63),
+    "pred": ("<i4", 1),
+    "conf": ("<f4", 1),
+    "fired": ("u1", 1),
+}
+
+
+def _column_path(path: str, name: str) -> str:
+    dtype, _ = COLUMNS[name]
+    ext = {"<f8": "f64", "u1": "u8", "<f4": "f32", "<i4": "i32"}[dtype]
+    return os.path.join(path, f"{name}.{ext}")
+
+
+def is_session(path: str) -> bool:
+    """True if path is a recorded session directory."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+
+class SessionRecorder:
+    """
+    Append-only writer. append() is called from the engine's detect stage;
+    rows are flushed to disk every chunk_size frames. close() and
+    set_labels() may come from other threads: one lock serializes them with
+    append/flush, and append() after close() is ignored.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 256, id_to_label: dict | None = None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.id_to_label = dict(id_to_label or {})
+        self.frames = 0
+        self._n = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._buf = {
+            name: np.zeros((chunk_size, width) if width > 1 else chunk_size, dtype=dtype)
+            for name, (dtype, width) in COLUMNS.items()
+        }
+        os.makedirs(path, exist_ok=True)
+        self._files = {name: open(_column_path(path, name), "ab") for name in COLUMNS}
+        self._write_meta()
+
+    def append(self, timestamp: float, landmarks=None, pred: int = -1, conf: float = 0.0, fired: bool = False):
+        """Add one frame. landmarks: (21, 3) array-like or None when no hand."""
+        with self._lock:
+            if self._closed:
+                return
+            self._append(timestamp, landmarks, pred, conf, fired)
+
+    def _append(self, timestamp, landmarks, pred, conf, fired):
+        i = self._n
+        b = self._buf
+        b["timestamp"][i] = timestamp
+        if landmarks is None:
+            b["present"][i] = 0
+            b["landmarks"][i] = np.nan
+        else:
+            b["present"][i] = 1
+            b["landmarks"][i] = np.asarray(landmarks, dtype=np.float32).reshape(63)
+        b["pred"][i] = pred
+        b["conf"][i] = conf
+        b["fired"][i] = fired
+        self._n += 1
+        self.frames += 1
+        if self._n == self.chunk_size:
+            self._flush()
+
+    def set_labels(self, id_to_label: dict):
+        """Record the label mapping predictions refer to."""
+        with self._lock:
+            self.id_to_label = dict(id_to_label)
+            self._write_meta()
+
+    def flush(self):
+        """Write buffered rows to the column files."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._n and not self._closed:
+            for name, f in self._files.items():
+                self._buf[name][:self._n].tofile(f)
+                f.flush()
+            self._n = 0
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._closed = True
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+            self._write_meta()
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({
+                "version": SESSION_VERSION,
+                "chunk_size": self.chunk_size,
+                "frames": self.frames,
+                "id_to_label": {str(k): v for k, v in self.id_to_label.items()},
+            }, f, indent=2)
+
+
+class SessionReader:
+    """Memory-mapped read access to a recorded session."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.id_to_label = {int(k): v for k, v in self.meta.get("id_to_label", {}).items()}
+        sizes = []
+        for name, (dtype, width) in COLUMNS.items():
+            p = _column_path(path, name)
+            sizes.append(os.path.getsize(p) // (np.dtype(dtype).itemsize * width) if os.path.exists(p) else 0)
+        # Columns are flushed together; min() guards against a torn final write.
+        self.frames = min(sizes)
+        for name, (dtype, width) in COLUMNS.items():
+            shape = (self.frames, width) if width > 1 else (self.frames,)
+            arr = np.memmap(_column_path(path, name), dtype=dtype, mode="r", shape=shape) \
+                if self.frames else np.zeros(shape, dtype=dtype)
+            setattr(self, name, arr)
+
+    def __len__(self):
+        return self.frames
+
+    def landmarks_3d(self) -> np.ndarray:
+        """(N, 21, 3) view of the landmark column (NaN rows = no hand)."""
+        return self.landmarks.reshape(-1, 21, 3)
+
+
+def replay_session(path: str, engine) -> dict:
+    """
+    Run a recorded session through engine (a MediaPipeEngine with a loaded
+    model) without camera, MediaPipe or sleeping. Actions are never executed:
+    the engine's callbacks are redirected for the duration of the replay.
+    Returns a summary with triggers and agreement vs. recorded predictions.
+    """
+    reader = SessionReader(path)
+    triggers = []
+    preds = []
+    saved = (engine.prediction_callback, engine.trigger_callback, engine.execute_actions)
+    engine.prediction_callback = lambda g, c, h, t: preds.append((g, c))
+    engine.trigger_callback = lambda g, ts: triggers.append({"gesture": g, "timestamp": ts})
+    engine.execute_actions = False
+    agree = compared = 0
+    t0 = time.perf_counter()
+    try:
+        present = reader.present
+        lms = reader.landmarks_3d()
+        for i in range(len(reader)):
+            del preds[:]
+            pts = lms[i] if present[i] else None
+            engine.process_landmarks(pts, float(reader.timestamp[i]))
+            rec = int(reader.pred[i])
+            if rec >= 0 and preds:
+                compared += 1
+                agree += preds[-1][0] == reader.id_to_label.get(rec)
+    finally:
+        engine.prediction_callback, engine.trigger_callback, engine.execute_actions = saved
+    wall = time.perf_counter() - t0
+    duration = float(reader.timestamp[-1] - reader.timestamp[0]) if len(reader) > 1 else 0.0
+    return {
+        "frames": len(reader),
+        "handFrames": int(np.count_nonzero(reader.present)),
+        "recordedTriggers": int(np.count_nonzero(reader.fired)),
+        "triggers": triggers,
+        "agreement": agree / compared if compared else None,
+        "wallSeconds": wall,
+        "speedup": duration / wall if wall > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python session_recorder.py <session dir>
+    sys.path.insert(0, os.path.dirname(__file__))
+    from mediapipe_engine import MediaPipeEngine
+
+    eng = MediaPipeEngine()
+    if not eng.load_model():
+        sys.exit("No model.pt / label_mapping.json to replay against")
+    print(json.dumps(replay_session(sys.argv[1], eng), indent=2))
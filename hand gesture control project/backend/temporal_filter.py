@@ -0,0 +1,100 @@
+"""
+Temporal Prediction Filter
+==========================
+Smooths per-frame class probabilities over time and decides when a gesture
+is stable enough to trigger. Replaces "N identical argmax results in a row":
+one noisy frame no longer resets progress, and thresholds are in seconds, so
+behaviour does not change with the camera / detection frame rate.
+
+- Ring buffer of the last `capacity` (timestamp, probability vector) pairs;
+  entries older than window_sec are ignored.
+- mode="ema":  time-decayed mean, weight 0.5 ** (age / half_life_sec)
+  (an exponential moving average that is correct for uneven frame spacing).
+- mode="mean": plain mean over the window.
+- Stable: the smoothed top class crossed `threshold` at least stable_sec
+  ago and has not dropped below threshold - hysteresis since, so a brief
+  dip does not restart the wait.
+
+The buffer is cleared when the number of classes changes (model swap); the
+engine also calls reset() when the hand is lost and after a trigger.
+"""
+
+import numpy as np
+
+MODES = ("ema", "mean")
+
+
+class TemporalFilter:
+    def __init__(self, mode: str = "ema", window_sec: float = 0.5, half_life_sec: float = 0.12,
+                 threshold: float = 0.85, hysteresis: float = 0.1, stable_sec: float = 0.2,
+                 capacity: int = 64):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.window_sec = window_sec
+        self.half_life_sec = half_life_sec
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.stable_sec = stable_sec
+        self.capacity = capacity
+        self._t = np.full(capacity, -np.inf)
+        self._probs = np.zeros((capacity, 0), dtype=np.float32)
+        self._n = 0         # entries written since reset (ring index = _n % capacity)
+        self.leader = -1    # class currently held above threshold, or -1
+        self.leader_since = None
+
+    def reset(self):
+        self._t.fill(-np.inf)
+        self._n = 0
+        self.leader = -1
+        self.leader_since = None
+
+    def smoothed(self, now: float) -> np.ndarray:
+        """Smoothed probability vector over the entries inside the window."""
+        age = now - self._t
+        live = age <= self.window_sec
+        if self.mode == "ema":
+            w = np.where(live, np.exp2(-np.maximum(age, 0) / self.half_life_sec), 0.0)
+        else:
+            w = live.astype(np.float64)
+        total = w.sum()
+        if total <= 0:
+            return np.zeros(self._probs.shape[1], dtype=np.float32)
+        return (w @ self._probs / total).astype(np.float32)
+
+    def update(self, probs, now: float) -> tuple[int, float, bool]:
+        """
+        Add one frame's probabilities (taken at time now, seconds). Returns
+        (class id or -1, smoothed confidence, stable).
+        """
+        probs = np.asarray(probs, dtype=np.float32).reshape(-1)
+        if probs.shape[0] != self._probs.shape[1]:
+            self._probs = np.zeros((self.capacity, probs.shape[0]), dtype=np.float32)
+            self.reset()
+        i = self._n % self.capacity
+        self._t[i] = now
+        self._probs[i] = probs  # copy: backends may return a reused buffer
+        self._n += 1
+
+        avg = self.smoothed(now)
+        if not avg.size:
+            return -1, 0.0, False
+        top = int(avg.argmax())
+        conf = float(avg[top])
+        held = top == self.leader and conf > self.threshold - self.hysteresis
+        if not held:
+            if conf <= self.threshold:
+                self.leader, self.leader_since = -1, None
+                return top, conf, False
+            self.leader, self.leader_since = top, now
+        return top, conf, now - self.leader_since >= self.stable_sec
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "windowSec": self.window_sec,
+            "halfLifeSec": self.half_life_sec,
+            "threshold": self.threshold,
+            "hysteresis": self.hysteresis,
+            "stableSec": self.stable_sec,
+        }
@@ -0,0 +1,153 @@
+"""
+Gesture Model Training
+======================
+Minibatch training of GestureANN over the full dataset store
+(dataset_store.py). Batches are gathered from memory-mapped shards, so
+memory use is bounded by batch_size regardless of how many samples have
+been recorded.
+
+Training length scales with the dataset: `epochs` passes over the data,
+but at least `min_steps` optimizer steps (small datasets still converge)
+and at most `max_steps` (large datasets stay bounded in time).
+
+train_and_export() is the whole training job: train on a snapshot, then
+write model.pt, label_mapping.json and the inference artifacts. It needs
+no engine; a running engine picks the result up with load_model().
+"""
+
+import json
+import math
+import os
+import threading
+from typing import NamedTuple
+
+import numpy as np
+
+from inference import QUANT_MIN_AGREEMENT, build_int8, export_all
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), "model.pt")
+
+# Held while model.pt / label_mapping.json / exports are written
+# (train_and_export) or read (MediaPipeEngine.load_model), by any thread.
+artifacts_lock = threading.Lock()
+
+
+def labels_path_for(model_pt: str) -> str:
+    return os.path.join(os.path.dirname(model_pt), "label_mapping.json")
+
+
+def trained_labels(model_path: str = DEFAULT_MODEL_PATH) -> list:
+    """Gesture names the saved model was trained on ([] if there is none)."""
+    with artifacts_lock:
+        try:
+            with open(labels_path_for(model_path), "r") as f:
+                return list(json.load(f).get("label_to_id", {}))
+        except (FileNotFoundError, ValueError):
+            return []
+
+
+class TrainingCancelled(Exception):
+    """Raised inside train_from_store when should_stop() returns True."""
+
+
+class TrainResult(NamedTuple):
+    model: object          # trained GestureANN (eval mode)
+    label_to_id: dict
+    id_to_label: dict
+    check: np.ndarray | None  # held-out features for the int8 check
+    samples: int
+    steps: int
+    loss: float
+
+
+def train_from_store(snapshot, epochs: int = 20, batch_size: int = 256, min_steps: int = 200,
+                     max_steps: int = 5000, lr: float = 0.001, holdout: float = 0.0,
+                     seed: int = 0, progress=None, should_stop=None) -> TrainResult | None:
+    """
+    Train a fresh GestureANN on every sample of a DatasetSnapshot, labels in
+    store order. holdout: fraction of samples kept out of training and
+    returned as TrainResult.check (if fewer than 20 can be spared, check is a
+    sample of the training data instead). progress(step, total_steps, loss)
+    is called after each epoch; should_stop() is polled before every step
+    and aborts with TrainingCancelled. Returns None if the store is empty.
+    """
+    if snapshot.total == 0:
+        return None
+    import torch
+    import torch.nn as nn
+    from gesture_model import GestureANN
+
+    rng = np.random.default_rng(seed)
+    torch.manual_seed(seed)
+    order = rng.permutation(snapshot.total)
+    n_check = int(snapshot.total * holdout)
+    if holdout and n_check >= 20:
+        check_idx, train_idx = order[:n_check], order[n_check:]
+    else:
+        check_idx, train_idx = (order[:200] if holdout else None), order
+
+    label_to_id, id_to_label = snapshot.label_mapping()
+    model = GestureANN(num_classes=len(label_to_id))
+    opt = torch.optim.Adam(model.parameters(), lr=lr)
+    loss_fn = nn.CrossEntropyLoss()
+
+    batches_per_epoch = math.ceil(len(train_idx) / batch_size)
+    total_steps = min(max(epochs * batches_per_epoch, min_steps), max_steps)
+    step, loss_val = 0, float("nan")
+    model.train()
+    while step < total_steps:
+        for X, Y in snapshot.iter_minibatches(batch_size, train_idx, rng):
+            if should_stop is not None and should_stop():
+                raise TrainingCancelled()
+            loss = loss_fn(model(torch.from_numpy(X)), torch.from_numpy(Y))
+            opt.zero_grad()
+            loss.backward()
+            opt.step()
+            step += 1
+            if step >= total_steps:
+                break
+        loss_val = float(loss.item())
+        if progress:
+            progress(step, total_steps, loss_val)
+    model.eval()
+
+    check = snapshot.gather(check_idx)[0] if check_idx is not None else None
+    return TrainResult(model, label_to_id, id_to_label, check, len(train_idx), step, loss_val)
+
+
+def train_and_export(snapshot, model_path: str = DEFAULT_MODEL_PATH, quantize: bool = True,
+                     quant_holdout: float = 0.2, quant_min_agreement: float = QUANT_MIN_AGREEMENT,
+                     progress=None, should_stop=None) -> dict | None:
+    """
+    Train on snapshot (train_from_store) and save the model next to
+    model_path. Every file is written to a temp name and os.replace()d,
+    labels first, under artifacts_lock, so a concurrent load never sees a
+    half-written model or new weights with old labels. Cancelling
+    (TrainingCancelled) happens before anything is written. Returns
+    {samples, steps, loss, labels (in class id order), int8 (report or None)},
+    or None if the store is empty.
+    """
+    import torch
+    result = train_from_store(snapshot, progress=progress, should_stop=should_stop,
+                              holdout=quant_holdout if quantize else 0.0)
+    if result is None:
+        return None
+    model, check = result.model, result.check
+    labels_path = labels_path_for(model_path)
+    int8_report = None
+    with artifacts_lock:
+        with open(labels_path + ".tmp", "w") as f:
+            json.dump({
+                "label_to_id": result.label_to_id,
+                "id_to_label": {str(k): v for k, v in result.id_to_label.items()},
+            }, f, indent=2)
+        os.replace(labels_path + ".tmp", labels_path)
+        torch.save(model.state_dict(), model_path + ".tmp")
+        os.replace(model_path + ".tmp", model_path)
+        # model.npz + TorchScript + ONNX artifacts for the inference backends
+        export_all(model, model_path)
+        if check is not None:
+            int8_report = build_int8(model, model_path, check, quant_min_agreement)
+            print("int8 quantization:", int8_report)
+    return {"samples": result.samples, "steps": result.steps, "loss": result.loss,
+            "labels": [result.id_to_label[i] for i in sorted(result.id_to_label)], "int8": int8_report}
@@ -0,0 +1,165 @@
+"""
+Training Job Runner
+===================
+Runs model training in a background worker thread so HTTP requests and the
+camera pipeline never wait on it.
+
+- submit() returns a TrainingJob with an id immediately; jobs run one at a
+  time in submission order (they all write the same model files).
+- A job still waiting in the queue absorbs later submissions (coalesce):
+  training reads the whole dataset store when it starts, so one queued job
+  already covers every recording made before it runs.
+- cancel() is cooperative: the training function polls job.cancelled()
+  between optimizer steps and raises trainer.TrainingCancelled.
+- State changes and (throttled) progress are reported through on_event as
+  {"type": "training_job", "jobId", "state", "step", "totalSteps", "loss", ...}
+  for the SSE stream.
+"""
+
+import collections
+import queue
+import threading
+import time
+import uuid
+
+from trainer import TrainingCancelled
+
+STATES = ("queued", "running", "done", "failed", "cancelled")
+
+
+class TrainingJob:
+    def __init__(self, fn, label: str = "", progress_interval: float = 0.25):
+        self.id = uuid.uuid4().hex[:12]
+        self.fn = fn
+        self.label = label
+        self.state = "queued"
+        self.step = 0
+        self.total_steps = None
+        self.loss = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._progress_interval = progress_interval
+        self._last_progress = 0.0
+        self._on_event = None
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, step: int, total_steps: int, loss: float):
+        """Progress hook for the training function (throttled event emission)."""
+        self.step, self.total_steps, self.loss = step, total_steps, loss
+        now = time.monotonic()
+        if step >= total_steps or now - self._last_progress >= self._progress_interval:
+            self._last_progress = now
+            self._emit()
+
+    def _emit(self):
+        if self._on_event:
+            try:
+                self._on_event({"type": "training_job", **self.to_dict()})
+            except Exception as e:
+                print("Training event error:", e)
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.id,
+            "label": self.label,
+            "state": self.state,
+            "step": self.step,
+            "totalSteps": self.total_steps,
+            "loss": self.loss,
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+class TrainingJobRunner:
+    """Single background worker executing TrainingJobs in order."""
+
+    def __init__(self, on_event=None, history: int = 20):
+        self.on_event = on_event
+        self._queue = queue.Queue()
+        self._jobs = collections.OrderedDict()  # id -> job, oldest first
+        self._history = history
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, fn, label: str = "", coalesce: bool = True) -> TrainingJob:
+        """
+        Queue fn(job) for execution. fn should call job.report(step, total,
+        loss) and stop when job.cancelled(); its return value becomes
+        job.result. With coalesce, an already queued job is returned instead.
+        """
+        with self._lock:
+            if coalesce:
+                for job in self._jobs.values():
+                    if job.state == "queued" and not job.cancelled():
+                        return job
+            job = TrainingJob(fn, label)
+            job._on_event = self.on_event
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._history:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.state in ("queued", "running"):
+                    break
+                self._jobs.popitem(last=False)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="training", daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+        job._emit()
+        return job
+
+    def get(self, job_id: str) -> TrainingJob | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list:
+        """All remembered jobs, newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def active(self) -> TrainingJob | None:
+        """The running job, if any."""
+        for job in self.jobs():
+            if job.state == "running":
+                return job
+        return None
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation. Returns False if unknown or already finished."""
+        job = self._jobs.get(job_id)
+        if job is None or job.state not in ("queued", "running"):
+            return False
+        job._cancel.set()
+        return True
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job.cancelled():
+                self._finish(job, "cancelled")
+                continue
+            job.state = "running"
+            job.started_at = time.time()
+            job._emit()
+            try:
+                job.result = job.fn(job)
+                self._finish(job, "done")
+            except TrainingCancelled:
+                self._finish(job, "cancelled")
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                print("Training job failed:", job.error)
+                self._finish(job, "failed")
+
+    def _finish(self, job: TrainingJob, state: str):
+        job.state = state
+        job.finished_at = time.time()
+        job._emit()
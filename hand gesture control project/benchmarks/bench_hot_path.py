@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Recognition Hot-Path Benchmarks
+===============================
+Headless, CPU-only micro/macro benchmarks for regression tracking:
+- core.normalize_landmarks (list / ndarray / in-place / batched) and
+  core.landmarks_to_array
+- GestureANN inference: single sample and batched, eager torch vs. the
+  inference.py backends (NumPy, TorchScript, ONNX Runtime if installed)
+- MediaPipeEngine end-to-end throughput on a replayed landmark stream
+  (optionally a video file with --video, which needs MediaPipe)
+- JPEG encoding at several resolutions
+- gesture_storage load/add/lookup/delete at 10 / 1k / 10k gestures
+- KNNClassifier: exact vs. approximate query latency and add/remove-gesture
+  cost with many stored gestures
+- DynamicGestureRecognizer per-frame update cost (swipe / circle tracking)
+
+Run:   python benchmarks/bench_hot_path.py [--quick] [--only jpeg,storage] [--out results.json]
+Output is JSON: { "meta": {...}, "results": [ {name, params, unit, ...}, ... ] }.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+import numpy as np
+
+
+def _timeit(fn, number: int, repeat: int) -> dict:
+    """Run fn number times per round, repeat rounds. Per-call times in microseconds."""
+    fn()  # warm-up
+    rounds = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - t0) / number * 1e6)
+    return {
+        "unit": "us/op",
+        "min": round(min(rounds), 3),
+        "median": round(statistics.median(rounds), 3),
+        "mean": round(statistics.fmean(rounds), 3),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def _synthetic_landmarks(n: int, seed: int = 0) -> np.ndarray:
+    """(n, 21, 3) plausible hand landmarks (normalized image coords)."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.3, 0.7, size=(1, 21, 3)).astype(np.float32)
+    base[..., 2] *= 0.1
+    return base + rng.normal(0, 0.01, size=(n, 21, 3)).astype(np.float32)
+
+
+def _synthetic_frame(w: int, h: int) -> np.ndarray:
+    """Camera-like BGR frame: smooth gradients plus sensor noise."""
+    rng = np.random.default_rng(1)
+    x = np.linspace(0, 255, w, dtype=np.float32)
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    img = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    img += rng.normal(0, 6, size=img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+# -----------------------------------------------------------------------------
+# BENCHMARKS
+# -----------------------------------------------------------------------------
+
+def bench_normalize(cfg):
+    from types import SimpleNamespace
+    from core import landmarks_to_array, normalize_landmarks
+    lm = _synthetic_landmarks(1)[0]
+    as_list = lm.tolist()
+    out = np.empty((21, 3), dtype=np.float32)
+    protos = [SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in lm]
+    batch = _synthetic_landmarks(1000)
+    r = _timeit(lambda: normalize_landmarks(batch), max(cfg.number // 100, 1), cfg.repeat)
+    r["per_sample_us"] = round(r["median"] / len(batch), 3)
+    return [
+        dict(name="normalize_landmarks", params={"input": "list"},
+             **_timeit(lambda: normalize_landmarks(as_list), cfg.number, cfg.repeat)),
+        dict(name="normalize_landmarks", params={"input": "ndarray"},
+             **_timeit(lambda: normalize_landmarks(lm), cfg.number, cfg.repeat)),
+        dict(name="normalize_landmarks", params={"input": "ndarray", "out": "preallocated"},
+             **_timeit(lambda: normalize_landmarks(lm, out=out), cfg.number, cfg.repeat)),
+        dict(name="normalize_landmarks", params={"input": "batch", "n": len(batch)}, **r),
+        dict(name="landmarks_to_array", params={"out": "preallocated"},
+             **_timeit(lambda: landmarks_to_array(protos, out=out), cfg.number, cfg.repeat)),
+    ]
+
+
+def bench_model(cfg):
+    import torch
+    from core import GestureANN, normalize_landmarks
+    model = GestureANN(num_classes=10).eval()
+    feats = np.stack([normalize_landmarks(p) for p in _synthetic_landmarks(256)]).astype(np.float32)
+    out = []
+
+    def single():
+        with torch.no_grad():
+            probs = torch.softmax(model(torch.tensor(feats[0]).unsqueeze(0)), dim=1)
+            torch.max(probs, dim=1)
+
+    out.append(dict(name="gesture_ann", params={"batch": 1, "path": "torch_eager"},
+                    **_timeit(single, cfg.number, cfg.repeat)))
+    for batch in (32, 256):
+        x = torch.from_numpy(feats[:batch])
+
+        def batched(x=x):
+            with torch.no_grad():
+                model(x)
+
+        r = _timeit(batched, max(cfg.number // 10, 1), cfg.repeat)
+        r["per_sample_us"] = round(r["median"] / batch, 3)
+        out.append(dict(name="gesture_ann", params={"batch": batch, "path": "torch_eager"}, **r))
+
+    import inference
+    tmp = tempfile.mkdtemp(prefix="gesture_bench_")
+    try:
+        npz = os.path.join(tmp, "model.npz")
+        inference.export_npz(model.state_dict(), npz)
+        backends = {"numpy": inference.NumpyClassifier.load(npz),
+                    "torch_wrapper": inference.TorchClassifier(model)}
+        for name, export, cls in (("torchscript", inference.export_torchscript, inference.TorchScriptClassifier),
+                                  ("onnx", inference.export_onnx, inference.OnnxClassifier)):
+            try:
+                path = os.path.join(tmp, "model." + name)
+                export(model, path)
+                backends[name] = cls(path)
+            except Exception as e:  # onnx / onnxruntime are optional
+                print(f"skipping {name} backend: {type(e).__name__}: {e}", file=sys.stderr)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    for name, clf in backends.items():
+        out.append(dict(name="gesture_ann", params={"batch": 1, "path": name},
+                        **_timeit(lambda clf=clf: clf.predict(feats[0]), cfg.number, cfg.repeat)))
+        for batch in (32, 256):
+            r = _timeit(lambda clf=clf, x=feats[:batch]: clf.predict_proba_batch(x),
+                        max(cfg.number // 10, 1), cfg.repeat)
+            r["per_sample_us"] = round(r["median"] / batch, 3)
+            out.append(dict(name="gesture_ann", params={"batch": batch, "path": name}, **r))
+    return out
+
+
+def _run_engine(source, num_classes: int = 10) -> dict:
+    from inference import NumpyClassifier
+    from mediapipe_engine import MediaPipeEngine
+    eng = MediaPipeEngine(source=source, realtime=False, idle_fps=0)
+    eng.execute_actions = False
+    rng = np.random.default_rng(0)
+    sizes = [(63, 128), (128, 64), (64, num_classes)]
+    eng.model = NumpyClassifier({
+        **{f"w{i}": rng.normal(0, 0.1, s).astype(np.float32) for i, s in enumerate(sizes)},
+        **{f"b{i}": np.zeros(s[1], np.float32) for i, s in enumerate(sizes)},
+    })
+    eng.label_to_id = {f"g{i}": i for i in range(num_classes)}
+    eng.id_to_label = {i: f"g{i}" for i in range(num_classes)}
+    t0 = time.perf_counter()
+    eng.start()
+    eng.wait_until_done()
+    elapsed = time.perf_counter() - t0
+    processed = eng.get_pipeline_stats()["detect"]["processed"]
+    eng.stop()
+    return {"unit": "fps", "fps": round(processed / elapsed, 1), "frames": processed,
+            "seconds": round(elapsed, 3)}
+
+
+def bench_engine(cfg):
+    tmp = tempfile.mkdtemp(prefix="gesture_bench_")
+    try:
+        path = os.path.join(tmp, "replay.npy")
+        np.save(path, _synthetic_landmarks(cfg.frames))
+        out = [dict(name="engine_end_to_end", params={"source": "landmark_replay", "frames": cfg.frames},
+                    **_run_engine(path))]
+        if cfg.video:
+            out.append(dict(name="engine_end_to_end", params={"source": "video", "path": cfg.video},
+                            **_run_engine(cfg.video)))
+        return out
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def bench_jpeg(cfg):
+    import cv2
+    out = []
+    for w, h in ((320, 240), (640, 480), (1280, 720), (1920, 1080)):
+        frame = _synthetic_frame(w, h)
+        r = _timeit(lambda: cv2.imencode(".jpg", frame), max(cfg.number // 20, 1), cfg.repeat)
+        out.append(dict(name="jpeg_encode", params={"width": w, "height": h}, **r))
+    return out
+
+
+def bench_storage(cfg):
+    import gesture_storage as gs
+    out = []
+    tmp = tempfile.mkdtemp(prefix="gesture_bench_")
+    try:
+        for n in cfg.storage_sizes:
+            path = os.path.join(tmp, f"db_{n}.json")
+            gs.save_gestures([
+                {"id": f"id-{i}", "name": f"gesture {i}", "image": "", "hittingTime": 3.0}
+                for i in range(n)
+            ], path)
+            number = max(1, min(cfg.number // 10, 20000 // n))
+            out.append(dict(name="gesture_storage", params={"op": "load_gestures", "n": n},
+                            **_timeit(lambda: gs.load_gestures(path), number, cfg.repeat)))
+            out.append(dict(name="gesture_storage", params={"op": "get_gesture_by_name", "n": n},
+                            **_timeit(lambda: gs.get_gesture_by_name(f"gesture {n - 1}", path),
+                                      number, cfg.repeat)))
+
+            def add_then_delete():
+                g = gs.add_gesture("bench gesture", "", 3, path)
+                gs.delete_gesture_by_id(g["id"], path)
+
+            out.append(dict(name="gesture_storage", params={"op": "add+delete", "n": n},
+                            **_timeit(add_then_delete, number, cfg.repeat)))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return out
+
+
+def bench_knn(cfg):
+    from core import normalize_landmarks
+    from knn_classifier import KNNClassifier
+    out = []
+    per_gesture = 100
+    for n in cfg.knn_sizes:
+        gestures = {f"g{i}": np.stack([normalize_landmarks(p)
+                                       for p in _synthetic_landmarks(per_gesture, seed=i)]).astype(np.float32)
+                    for i in range(n)}
+        queries = [gestures[f"g{i % n}"][i % per_gesture] for i in range(64)]
+        for approximate in (False, True):
+            clf = KNNClassifier(gestures, approximate=approximate)
+            q = itertools.cycle(queries)
+            path = "approximate" if clf.approximate else "exact"
+            out.append(dict(name="knn_predict", params={"gestures": n, "vectors": n * per_gesture, "path": path},
+                            **_timeit(lambda: clf.predict(next(q)), cfg.number, cfg.repeat)))
+        clf = KNNClassifier(gestures)
+        extra = gestures["g0"]
+        out.append(dict(name="knn_update", params={"gestures": n, "op": "with_gesture"},
+                        **_timeit(lambda: clf.with_gesture("new", extra), max(cfg.number // 100, 1), cfg.repeat)))
+        out.append(dict(name="knn_update", params={"gestures": n, "op": "without_gesture"},
+                        **_timeit(lambda: clf.without_gesture("g0"), max(cfg.number // 100, 1), cfg.repeat)))
+    return out
+
+
+def bench_dynamic(cfg):
+    from core import normalize_landmarks
+    from dynamic_gestures import DynamicGestureRecognizer
+    lms = _synthetic_landmarks(256)
+    # Palm moving on a circle: the window stays full and busy
+    angle = np.linspace(0, 8 * np.pi, len(lms))
+    lms[:, :, 0] += (0.1 * np.cos(angle))[:, None]
+    lms[:, :, 1] += (0.1 * np.sin(angle))[:, None]
+    feats = np.stack([normalize_landmarks(p) for p in lms]).astype(np.float32)
+    rec = DynamicGestureRecognizer()
+    frame = itertools.count()
+
+    def update():
+        i = next(frame)
+        rec.update(lms[i % len(lms)], feats[i % len(lms)], i / 30)
+
+    return [dict(name="dynamic_gesture", params={"op": "update", "model": "heuristics"},
+                 **_timeit(update, cfg.number, cfg.repeat))]
+
+
+BENCHMARKS = {
+    "normalize": bench_normalize,
+    "model": bench_model,
+    "engine": bench_engine,
+    "jpeg": bench_jpeg,
+    "storage": bench_storage,
+    "knn": bench_knn,
+    "dynamic": bench_dynamic,
+}
+
+
+def _meta() -> dict:
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+    for mod in ("torch", "cv2", "mediapipe", "onnxruntime"):
+        try:
+            meta[mod] = __import__(mod).__version__
+        except Exception:
+            meta[mod] = None
+    return meta
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", default="", help="comma-separated subset of: " + ", ".join(BENCHMARKS))
+    ap.add_argument("--quick", action="store_true", help="fewer iterations (smoke run)")
+    ap.add_argument("--video", default=None, help="video file for engine end-to-end (needs MediaPipe)")
+    ap.add_argument("--out", default=None, help="write JSON here instead of stdout")
+    cfg = ap.parse_args(argv)
+    cfg.number = 200 if cfg.quick else 2000
+    cfg.repeat = 3 if cfg.quick else 7
+    cfg.frames = 300 if cfg.quick else 3000
+    cfg.storage_sizes = (10, 1000) if cfg.quick else (10, 1000, 10000)
+    cfg.knn_sizes = (10, 100) if cfg.quick else (10, 100, 300)
+
+    names = [n for n in cfg.only.split(",") if n] or list(BENCHMARKS)
+    results, errors = [], {}
+    for name in names:
+        try:
+            results.extend(BENCHMARKS[name](cfg))
+        except Exception as e:  # keep going: one missing dependency must not hide the rest
+            errors[name] = f"{type(e).__name__}: {e}"
+            print(f"benchmark {name} failed: {errors[name]}", file=sys.stderr)
+
+    doc = json.dumps({"meta": _meta(), "results": results, "errors": errors}, indent=2)
+    if cfg.out:
+        with open(cfg.out, "w") as f:
+            f.write(doc)
+    else:
+        print(doc)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
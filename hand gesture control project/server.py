@@ -7,26 +7,45 @@ manages MediaPipe + ANN lifecycle, and streams video/predictions.
 
 Run: python server.py
 Then open http://localhost:5000 in the browser.
+
+Startup is kept light: cv2, mediapipe, torch, pyautogui and groq are only
+imported when first needed (engine start, desktop stream, LLM call), and
+are pre-warmed in the background once the HTTP socket is listening
+(GESTURE_PREWARM=0 disables this). Import timings: GET /api/startup.
 """
 
 import os
 import sys
 import json
+import socket
 import threading
 import time
-import queue
 import subprocess
 import platform
+from typing import TYPE_CHECKING
 
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
 
+import lazy_imports
+
 from flask import Flask, request, jsonify, Response, redirect, send_from_directory
 from flask_cors import CORS
 
 import gesture_storage as gs
-from mediapipe_engine import MediaPipeEngine
+from frame_broadcast import FrameBroadcaster
+from event_bus import EventBus
+from training_jobs import TrainingJobRunner
+from action_executor import ActionExecutor
+import action_plugins
+from dataset_store import open_store, store_for_db
+from dynamic_gestures import MOTIONS
+from command_cache import cache_for_db
 import desktop_stream as ds
+import metrics
+
+if TYPE_CHECKING:
+    from mediapipe_engine import MediaPipeEngine
 # Note: gesture_images.py disabled - no LLM image generation required
 
 # -----------------------------------------------------------------------------
@@ -36,6 +55,62 @@ FRONTEND_DIR = os.path.join(os.path.dirname(__file__), "frontend")
 BACKEND_DIR = os.path.join(os.path.dirname(__file__), "backend")
 GESTURES_DB = os.path.join(BACKEND_DIR, "gestures_db.json")
 
+# Frame source for the engine: camera index (default "0"), video file, image
+# directory, or .npy/.npz landmark recording (runs without a webcam).
+FRAME_SOURCE = os.environ.get("GESTURE_SOURCE", "0")
+FRAME_SOURCE_REALTIME = os.environ.get("GESTURE_SOURCE_REALTIME", "1") == "1"
+
+# Detection cost knobs: GESTURE_ROI=1 crops detection to the tracked hand;
+# GESTURE_CAPTURE_SIZE=640x480 caps capture resolution.
+ROI_MODE = os.environ.get("GESTURE_ROI", "0") == "1"
+CAPTURE_MAX_SIZE = tuple(int(v) for v in os.environ["GESTURE_CAPTURE_SIZE"].split("x")) \
+    if os.environ.get("GESTURE_CAPTURE_SIZE") else None
+
+# Frame pacing: GESTURE_TARGET_FPS caps detection rate (default: camera rate);
+# GESTURE_STREAM_FPS caps /api/video/feed encoding rate.
+TARGET_FPS = float(os.environ["GESTURE_TARGET_FPS"]) if os.environ.get("GESTURE_TARGET_FPS") else None
+STREAM_FPS = float(os.environ["GESTURE_STREAM_FPS"]) if os.environ.get("GESTURE_STREAM_FPS") else None
+
+# Classifier backend: "numpy" (default, torch-free), "torch", "torchscript",
+# "onnx", "int8" (dynamic int8, only if it passed the post-training accuracy
+# check; else numpy) or "auto" (fastest available on this machine; see inference.py).
+INFERENCE_BACKEND = os.environ.get("GESTURE_INFERENCE_BACKEND", "numpy")
+
+# Classifier: "mlp" (trained GestureANN, retrained in the background after
+# each recording) or "knn" (few-shot nearest neighbour over the dataset
+# store; a recorded gesture is usable at once, no training run).
+CLASSIFIER_MODE = os.environ.get("GESTURE_CLASSIFIER", "mlp")
+
+# Trigger smoothing: class probabilities are averaged over the last
+# GESTURE_SMOOTHING_WINDOW seconds ("ema" = time-decayed, or "mean"); a gesture
+# must stay confident for GESTURE_STABLE_SEC before its hitting-time timer starts.
+SMOOTHING = os.environ.get("GESTURE_SMOOTHING", "ema")
+SMOOTHING_WINDOW_SEC = float(os.environ.get("GESTURE_SMOOTHING_WINDOW", "0.5"))
+STABLE_SEC = float(os.environ.get("GESTURE_STABLE_SEC", "0.2"))
+
+# Dynamic gestures (swipes, circles): GESTURE_DYNAMIC=1 tracks hand motion;
+# a gesture with a "motion" binding fires when that motion is made.
+DYNAMIC_GESTURES = os.environ.get("GESTURE_DYNAMIC", "0") == "1"
+
+# Gesture -> command resolution: cache, local intent table, then the LLM
+# (core.command_chain; GROQ_BASE_URL redirects it, e.g. to backend/llm_stub_server.py).
+# Answers are cached next to the gestures DB (command_cache.json) for
+# GESTURE_COMMAND_CACHE_TTL seconds (default 30 days).
+COMMAND_CACHE_TTL = float(os.environ.get("GESTURE_COMMAND_CACHE_TTL", str(30 * 24 * 3600)))
+
+# /api/events: each SSE client buffers up to GESTURE_EVENT_BUFFER events (oldest
+# dropped when a client falls behind); at most GESTURE_EVENT_CLIENTS streams.
+EVENT_BUFFER = int(os.environ.get("GESTURE_EVENT_BUFFER", "256"))
+EVENT_CLIENTS = int(os.environ.get("GESTURE_EVENT_CLIENTS", "8"))
+
+# If set, every recognition run is recorded to <dir>/<start time>.session
+# (landmarks + predictions) for offline replay with session_recorder.py.
+SESSION_DIR = os.environ.get("GESTURE_RECORD_SESSIONS", "")
+
+# Import the engine's heavy dependencies in the background after the server
+# starts listening, so the first engine start does not pay for them.
+PREWARM = os.environ.get("GESTURE_PREWARM", "1") == "1"
+
 app = Flask(__name__, static_folder=None)
 CORS(app)
 
@@ -43,9 +118,15 @@ CORS(app)
 # GLOBAL STATE (single engine instance, mode: training | recognition | idle)
 # -----------------------------------------------------------------------------
 _mode = "idle"  # idle | training | recognition
-_engine: MediaPipeEngine | None = None
-_event_queue = queue.Queue()
-_last_frame = None
+_engine: "MediaPipeEngine | None" = None
+_events = EventBus(buffer_size=EVENT_BUFFER, max_subscribers=EVENT_CLIENTS)  # -> /api/events
+# Model training runs here, off the request thread (progress -> /api/events)
+_training_jobs = TrainingJobRunner(on_event=_events.publish)
+# Triggered gestures are resolved (LLM) and executed here, off the detect thread;
+# shared by every engine so de-duplication survives engine restarts
+_actions = ActionExecutor(resolve=lambda gesture: _resolve_command(gesture),  # defined below
+                          on_event=_events.publish)
+_video_broadcast = FrameBroadcaster(max_fps=STREAM_FPS)  # shared by all /api/video/feed clients
 _last_hand_detected = False
 
 # For training: track current recording state
@@ -54,10 +135,129 @@ _recording_gesture = None
 _recording_hitting_time = 3.0
 
 
-def _get_engine() -> MediaPipeEngine | None:
+def _get_engine() -> "MediaPipeEngine | None":
     return _engine
 
 
+def _new_engine(**callbacks) -> "MediaPipeEngine":
+    """Construct an engine; the first call imports mediapipe_engine (cv2, mediapipe) unless pre-warmed."""
+    engine_cls = lazy_imports.load("mediapipe_engine").MediaPipeEngine
+    return engine_cls(**callbacks, **_engine_options())
+
+
+def _acquire_engine(frame_callback=None, prediction_callback=None, recording_callback=None,
+                    use_separate_window=False) -> "MediaPipeEngine":
+    """
+    Reuse the running engine (camera stays open, only callbacks change) when
+    possible; otherwise stop it and build a new one. The caller start()s it.
+    Not reused while recording, when the separate-window setting differs, or
+    once its pipeline has ended (finite source consumed, camera failed).
+    """
+    global _engine
+    eng = _engine
+    if eng and eng.is_running() and not eng.recording and eng.use_separate_window == use_separate_window:
+        eng.frame_callback = frame_callback
+        eng.prediction_callback = prediction_callback
+        eng.recording_callback = recording_callback
+        eng.stop_session_recording()
+        return eng
+    if eng:
+        eng.stop()
+    _engine = _new_engine(
+        frame_callback=frame_callback,
+        prediction_callback=prediction_callback,
+        recording_callback=recording_callback,
+        use_separate_window=use_separate_window,
+    )
+    return _engine
+
+
+def _gesture_hitting_times() -> dict:
+    return {g["name"]: g.get("hittingTime", 3) for g in gs.load_gestures(GESTURES_DB)}
+
+
+def _motion_bindings() -> dict:
+    """motion name -> gesture name, for gestures bound to a motion."""
+    return {g["motion"]: g["name"] for g in gs.load_gestures(GESTURES_DB) if g.get("motion")}
+
+
+def _command_cache():
+    """The gestures DB's command cache (imports core on first use)."""
+    cache = lazy_imports.load("core").command_cache(cache_for_db(GESTURES_DB))
+    cache.ttl_sec = COMMAND_CACHE_TTL
+    return cache
+
+
+def _resolve_command(gesture: str) -> str:
+    """Gesture name -> command: cache, local intent table, then the LLM (answers cached)."""
+    return lazy_imports.load("core").llm_to_command(gesture, cache=_command_cache())
+
+
+def _on_gesture_added(name: str, command: str | None = None):
+    """New gesture: store a given command, else resolve it in the background so the first trigger is warm."""
+    if command:
+        _command_cache().put(name, command, source="manual")
+    else:
+        _command_cache().prefetch(name, _resolve_command)
+
+
+def _on_gesture_deleted(name: str | None):
+    """Gesture removed from the DB: forget its command and update the engine."""
+    if name:
+        _command_cache().invalidate(name)
+    _sync_engine_gestures(deleted=name)
+
+
+def _sync_engine_gestures(deleted: str | None = None):
+    """
+    Gesture DB changed: hot-swap hitting times into the running engine and
+    drop labels of gestures no longer in the DB (they stop triggering at
+    once). A deleted gesture the model still knows queues a retrain, which
+    swaps the new model in when it finishes (knn mode: removed from the
+    index immediately instead). With no engine running the retrain is still
+    queued, so model.pt stops knowing the gesture.
+    """
+    eng = _get_engine()
+    if not eng:
+        if deleted and CLASSIFIER_MODE != "knn" and deleted in lazy_imports.load("trainer").trained_labels():
+            _submit_training(label="gesture-deleted")
+        return
+    hitting_times = _gesture_hitting_times()
+    if deleted and eng.classifier_mode == "knn":
+        # Dropped from the index right away; nothing to retrain.
+        eng.remove_gesture(deleted)
+        deleted = None
+    state = eng.model_state
+    # Filtered inside swap_model: a model swapped in by a training job in the
+    # meantime keeps its own labels.
+    eng.swap_model(hitting_times=hitting_times,
+                   keep_label=lambda name: name in hitting_times or name == eng.current_label)
+    eng.motion_bindings = _motion_bindings()
+    if deleted and deleted in state.label_to_id and state.classifier is not None:
+        _submit_training(label="gesture-deleted")
+
+
+def _engine_options() -> dict:
+    """Constructor options shared by training and recognition engines."""
+    return {
+        "source": FRAME_SOURCE,
+        "realtime": FRAME_SOURCE_REALTIME,
+        "broadcaster": _video_broadcast,
+        "roi_mode": ROI_MODE,
+        "capture_max_size": CAPTURE_MAX_SIZE,
+        "target_fps": TARGET_FPS,
+        "inference_backend": INFERENCE_BACKEND,
+        "classifier_mode": CLASSIFIER_MODE,
+        "smoothing": SMOOTHING,
+        "smoothing_window_sec": SMOOTHING_WINDOW_SEC,
+        "stable_sec": STABLE_SEC,
+        "dynamic_gestures": DYNAMIC_GESTURES,
+        "action_executor": _actions,
+        # Same store gesture_storage prunes on delete
+        "dataset_dir": store_for_db(GESTURES_DB),
+    }
+
+
 def _set_mode(m: str):
     global _mode
     _mode = m
@@ -94,12 +294,15 @@ def serve_static(path):
 def get_gestures():
     """
     GET /api/gestures
-    Returns all gestures: [{ id, name, image, hittingTime }, ...]
+    Returns all gestures: [{ id, name, image, hittingTime, motion, command }, ...]
+    (command: cached resolved command, null until resolved).
     Used by: Home sidebar, Gesture List screen. Poll for auto-sync.
     """
     gestures = gs.load_gestures(GESTURES_DB)
-    # Map to frontend format (name, image, hittingTime)
-    out = [{"id": g["id"], "name": g["name"], "image": g.get("image", ""), "hittingTime": g.get("hittingTime", 3)} for g in gestures]
+    cache = _command_cache()
+    # Map to frontend format (name, image, hittingTime, motion, command)
+    out = [{"id": g["id"], "name": g["name"], "image": g.get("image", ""), "hittingTime": g.get("hittingTime", 3),
+            "motion": g.get("motion"), "command": cache.get(g["name"])} for g in gestures]
     return jsonify(out)
 
 
@@ -107,17 +310,23 @@ def get_gestures():
 def add_gesture():
     """
     POST /api/gestures
-    Body: { "name": "...", "image": "...", "hittingTime": 3 }
+    Body: { "name": "...", "image": "...", "hittingTime": 3, "motion": "swipe_left" (optional),
+            "command": "..." (optional; else resolved via LLM in the background) }
     Add new gesture. Used after training save.
     """
     data = request.get_json() or {}
     name = data.get("name", "").strip()
     image = data.get("image", "")
     hitting_time = float(data.get("hittingTime", 3))
+    motion = data.get("motion") or None
     if not name:
         return jsonify({"error": "name required"}), 400
+    if motion and motion not in MOTIONS:
+        return jsonify({"error": f"motion must be one of {', '.join(MOTIONS)}"}), 400
     try:
-        g = gs.add_gesture(name, image, hitting_time, GESTURES_DB)
+        g = gs.add_gesture(name, image, hitting_time, GESTURES_DB, motion=motion)
+        _on_gesture_added(name, (data.get("command") or "").strip() or None)
+        _sync_engine_gestures()
         return jsonify(g)
     except ValueError as e:
         return jsonify({"error": str(e)}), 409
@@ -131,6 +340,7 @@ def delete_latest_gesture():
     """
     removed = gs.delete_latest_gesture(GESTURES_DB)
     if removed:
+        _on_gesture_deleted(removed["name"])
         return jsonify({"deleted": removed})
     return jsonify({"error": "No gestures to delete"}), 404
 
@@ -141,11 +351,74 @@ def delete_gesture(gesture_id):
     DELETE /api/gestures/<id>
     Remove gesture by id. Used by Gesture List screen delete.
     """
+    name = next((g["name"] for g in gs.load_gestures(GESTURES_DB) if g.get("id") == gesture_id), None)
     if gs.delete_gesture_by_id(gesture_id, GESTURES_DB):
+        _on_gesture_deleted(name)
         return jsonify({"ok": True})
     return jsonify({"error": "Gesture not found"}), 404
 
 
+@app.route("/api/gestures/<gesture_id>/motion", methods=["PUT"])
+def set_gesture_motion(gesture_id):
+    """
+    PUT /api/gestures/<id>/motion
+    Body: { "motion": "swipe_left" | null }
+    Bind a dynamic gesture (swipe / circle) to this gesture, or unbind it.
+    Needs GESTURE_DYNAMIC=1 to take effect.
+    """
+    motion = (request.get_json() or {}).get("motion") or None
+    if motion and motion not in MOTIONS:
+        return jsonify({"error": f"motion must be one of {', '.join(MOTIONS)}"}), 400
+    if gs.set_gesture_motion(gesture_id, motion, GESTURES_DB):
+        _sync_engine_gestures()
+        return jsonify({"ok": True, "motion": motion, "dynamicGestures": DYNAMIC_GESTURES})
+    return jsonify({"error": "Gesture not found"}), 404
+
+
+@app.route("/api/gestures/<gesture_id>/command", methods=["PUT"])
+def set_gesture_command(gesture_id):
+    """
+    PUT /api/gestures/<id>/command
+    Body: { "command": "start https://..." } pins the command (never expires);
+    { "command": null } drops the cached one and re-resolves it via LLM.
+    """
+    name = next((g["name"] for g in gs.load_gestures(GESTURES_DB) if g.get("id") == gesture_id), None)
+    if name is None:
+        return jsonify({"error": "Gesture not found"}), 404
+    command = ((request.get_json() or {}).get("command") or "").strip() or None
+    if command is None:
+        _command_cache().invalidate(name)
+    _on_gesture_added(name, command)
+    return jsonify({"ok": True, "name": name, "command": command})
+
+
+@app.route("/api/commands/resolve", methods=["POST"])
+def command_resolve():
+    """
+    POST /api/commands/resolve
+    Body: { "gesture": "open reddit" }. Runs the resolver chain (cache ->
+    local intents -> LLM) without executing anything or caching the answer:
+    { command, source }.
+    """
+    gesture = ((request.get_json() or {}).get("gesture") or "").strip()
+    if not gesture:
+        return jsonify({"error": "gesture required"}), 400
+    command, source = lazy_imports.load("core").command_chain(_command_cache(), store=False).resolve(gesture)
+    return jsonify({"gesture": gesture, "command": command, "source": source})
+
+
+@app.route("/api/commands/cache", methods=["GET"])
+def command_cache_entries():
+    """GET /api/commands/cache - cached gesture commands: { entries: [{ name, command, source, resolvedAt, expired }] }."""
+    return jsonify({"entries": _command_cache().entries()})
+
+
+@app.route("/api/commands/cache", methods=["DELETE"])
+def command_cache_clear():
+    """DELETE /api/commands/cache[?name=...] - invalidate one gesture's command, or all."""
+    return jsonify({"ok": True, "removed": _command_cache().invalidate(request.args.get("name") or None)})
+
+
 @app.route("/api/gestures/delete-by-name", methods=["POST"])
 def delete_gesture_by_name():
     """
@@ -156,6 +429,7 @@ def delete_gesture_by_name():
     data = request.get_json() or {}
     name = data.get("name", "")
     if gs.delete_gesture_by_name(name, GESTURES_DB):
+        _on_gesture_deleted(name)
         return jsonify({"ok": True})
     return jsonify({"error": "Gesture not found"}), 404
 
@@ -164,32 +438,32 @@ def delete_gesture_by_name():
 # TRAINING API
 # -----------------------------------------------------------------------------
 
-def _on_training_frame(jpeg_bytes: bytes, hand_detected: bool):
-    """Callback: store latest frame for MJPEG stream."""
-    global _last_frame, _last_hand_detected
-    _last_frame = jpeg_bytes
+def _on_training_frame(jpeg_bytes: bytes | None, hand_detected: bool):
+    """Callback: track hand presence (frames go out via _video_broadcast)."""
+    global _last_hand_detected
     _last_hand_detected = hand_detected
 
 
 def _on_training_recording_done(done: bool):
     """Callback: push event when recording completes."""
     if done:
-        _event_queue.put({"type": "recording_done"})
+        _events.publish({"type": "recording_done"})
 
 
 def _start_training_engine():
     """Start MediaPipe in training mode (preview only, no ANN prediction)."""
-    global _engine, _mode
-    if _engine:
-        _engine.stop()
-    _engine = MediaPipeEngine(
+    eng = _acquire_engine(
         frame_callback=_on_training_frame,
         recording_callback=_on_training_recording_done,
         use_separate_window=False,
     )
-    _engine.load_model()  # load if exists, for label mapping
-    _engine.start()
+    eng.load_model()  # load if exists, for label mapping
+    eng.start()
     _set_mode("training")
+    # Training jobs need torch; importing it holds the GIL for a while, so
+    # do it now rather than in the middle of the next recording.
+    if CLASSIFIER_MODE == "mlp" and "torch" not in sys.modules:
+        lazy_imports.prewarm(["torch"])
 
 
 @app.route("/api/training/start", methods=["GET"])
@@ -209,7 +483,9 @@ def training_record():
     """
     POST /api/training/record
     Body: { "action": "start"|"stop", "gestureName": "...", "hittingTime": 3 }
-    Start or stop recording. On stop: train model, save gesture to DB.
+    Start or stop recording. On stop: append the samples to the dataset store,
+    save gesture to DB (if new) and queue a background retrain on every
+    stored gesture. Returns jobId; progress arrives as training_job events.
     """
     global _recording, _recording_gesture, _recording_hitting_time, _engine
     data = request.get_json() or {}
@@ -224,6 +500,10 @@ def training_record():
     if action == "start":
         if not gesture_name:
             return jsonify({"error": "gestureName required"}), 400
+        clash = next((g["name"] for g in gs.load_gestures(GESTURES_DB)
+                      if g["name"].lower() == gesture_name.lower() and g["name"] != gesture_name), None)
+        if clash:
+            return jsonify({"error": f"Gesture with name '{clash}' already exists"}), 409
         _recording = True
         _recording_gesture = gesture_name
         _recording_hitting_time = hitting_time
@@ -236,12 +516,87 @@ def training_record():
         X_data, Y_data = eng.stop_recording()
         _recording = False
 
+        job = None
         if X_data and Y_data:
-            eng.train_and_save(X_data, Y_data)
-            gs.add_gesture(_recording_gesture, "", _recording_hitting_time, GESTURES_DB)
+            # Re-recording an existing gesture only adds samples.
+            if not gs.get_gesture_by_name(_recording_gesture, GESTURES_DB):
+                try:
+                    gs.add_gesture(_recording_gesture, "", _recording_hitting_time, GESTURES_DB)
+                except ValueError as e:
+                    # Same name in another case, added while recording: drop the samples
+                    eng.dataset.remove(_recording_gesture)
+                    eng.remove_gesture(_recording_gesture)
+                    _recording_gesture = None
+                    return jsonify({"error": str(e)}), 409
+                _on_gesture_added(_recording_gesture)
+            if eng.classifier_mode == "knn":
+                # stop_recording already put the samples into the k-NN index.
+                _sync_engine_gestures()
+            else:
+                job = _submit_training(_recording_gesture)
 
         _recording_gesture = None
-        return jsonify({"ok": True, "recording": False, "saved": True})
+        return jsonify({"ok": True, "recording": False, "saved": True,
+                        "jobId": job.id if job else None})
+
+
+def _submit_training(label: str = ""):
+    """
+    Queue a retrain on the full dataset store (coalesces with a queued one).
+    Training needs no engine (trainer.train_and_export writes the model
+    files); whatever engine is running when it finishes loads the result.
+    """
+    def run(job):
+        if CLASSIFIER_MODE == "knn":
+            # Nothing to train: load_model() below rebuilds the index from the store.
+            summary = {"classifier": "knn", "labels": open_store(store_for_db(GESTURES_DB)).snapshot().names}
+        else:
+            trainer = lazy_imports.load("trainer")
+            summary = trainer.train_and_export(open_store(store_for_db(GESTURES_DB)).snapshot(),
+                                               progress=job.report, should_stop=job.cancelled)
+        current = _get_engine()
+        if current is not None:
+            current.load_model()
+            _sync_engine_gestures()
+        return summary
+
+    return _training_jobs.submit(run, label=label)
+
+
+@app.route("/api/training/jobs", methods=["GET"])
+def training_jobs():
+    """GET /api/training/jobs - recent training jobs, newest first."""
+    return jsonify({"jobs": [j.to_dict() for j in _training_jobs.jobs()]})
+
+
+@app.route("/api/training/jobs", methods=["POST"])
+def training_job_submit():
+    """
+    POST /api/training/jobs
+    Retrain on every stored gesture without recording. Returns { ok, jobId }.
+    """
+    job = _submit_training(label="retrain")
+    return jsonify({"ok": True, "jobId": job.id})
+
+
+@app.route("/api/training/jobs/<job_id>", methods=["GET"])
+def training_job_status(job_id):
+    """
+    GET /api/training/jobs/<id>
+    { jobId, state: queued|running|done|failed|cancelled, step, totalSteps, loss, result, error, ... }
+    """
+    job = _training_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/training/jobs/<job_id>", methods=["DELETE"])
+def training_job_cancel(job_id):
+    """DELETE /api/training/jobs/<id> - cancel a queued or running job (nothing is saved)."""
+    if _training_jobs.cancel(job_id):
+        return jsonify({"ok": True})
+    return jsonify({"error": "Job not found or already finished"}), 404
 
 
 @app.route("/api/training/stop", methods=["GET"])
@@ -256,14 +611,13 @@ def training_stop():
 # RECOGNITION API (Control / Focus / Home Start)
 # -----------------------------------------------------------------------------
 
-def _on_recognition_frame(jpeg_bytes: bytes, hand_detected: bool):
-    global _last_frame, _last_hand_detected
-    _last_frame = jpeg_bytes
+def _on_recognition_frame(jpeg_bytes: bytes | None, hand_detected: bool):
+    global _last_hand_detected
     _last_hand_detected = hand_detected
 
 
 def _on_recognition_prediction(gesture: str, confidence: float, hitting_time: float, timer_elapsed: float):
-    _event_queue.put({
+    _events.publish({
         "type": "prediction",
         "gesture": gesture,
         "confidence": round(confidence * 100, 1),
@@ -273,11 +627,11 @@ def _on_recognition_prediction(gesture: str, confidence: float, hitting_time: fl
 
 
 def _start_recognition_engine(focus_mode: bool = False):
-    """Start MediaPipe + ANN for gesture recognition."""
-    global _engine, _mode
-    if _engine:
-        _engine.stop()
-
+    """
+    Start MediaPipe + ANN for gesture recognition. An engine that is already
+    running (training preview or recognition) is reused and its model
+    hot-swapped, so the camera is not reopened.
+    """
     gestures = gs.load_gestures(GESTURES_DB)
     label_to_id = {}
     id_to_label = {}
@@ -287,15 +641,19 @@ def _start_recognition_engine(focus_mode: bool = False):
         id_to_label[i] = g["name"]
         hitting_times[g["name"]] = g.get("hittingTime", 3)
 
-    _engine = MediaPipeEngine(
+    eng = _acquire_engine(
         frame_callback=_on_recognition_frame,
         prediction_callback=_on_recognition_prediction,
         use_separate_window=focus_mode,
     )
-    _engine.set_label_mapping(label_to_id, id_to_label)
-    _engine.set_hitting_times(hitting_times)
-    _engine.load_model()
-    _engine.start()
+    eng.swap_model(label_to_id=label_to_id, id_to_label=id_to_label, hitting_times=hitting_times)
+    eng.motion_bindings = {g["motion"]: g["name"] for g in gestures if g.get("motion")}
+    # label_mapping.json may still list gestures deleted since the last training.
+    eng.load_model(keep_label=lambda name: name in hitting_times)
+    if SESSION_DIR:
+        name = time.strftime("%Y%m%d-%H%M%S") + ".session"
+        eng.start_session_recording(os.path.join(SESSION_DIR, name))
+    eng.start()
     _set_mode("recognition")
 
 
@@ -335,14 +693,14 @@ def _stop_all():
     Unified stop function: stops MediaPipe engine AND desktop stream.
     Called by Focus Layer Stop button and other stop endpoints.
     """
-    global _engine, _mode, _last_frame
+    global _engine, _mode
     if _engine:
         try:
             _engine.stop()
         except Exception as e:
             print("Engine stop error:", e)
         _engine = None
-    _last_frame = None
+    _video_broadcast.clear()
     _set_mode("idle")
     # Stop desktop stream
     try:
@@ -356,12 +714,8 @@ def _stop_all():
 # -----------------------------------------------------------------------------
 
 def _generate_desktop_mjpeg():
-    """MJPEG generator for desktop stream. Yields frames while desktop capture runs."""
-    while True:
-        frame = ds.get_last_frame()
-        if frame:
-            yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + frame + b"\r\n")
-        time.sleep(0.04)
+    """MJPEG generator for desktop stream. Yields each new shared frame once."""
+    yield from ds.get_broadcaster().mjpeg_parts()
 
 
 @app.route("/api/desktop/start", methods=["GET"])
@@ -445,11 +799,11 @@ def desktop_keyboard():
 # -----------------------------------------------------------------------------
 
 def _generate_mjpeg():
-    """Generator for MJPEG stream."""
-    while True:
-        if _last_frame:
-            yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + _last_frame + b"\r\n")
-        time.sleep(0.033)  # ~30 FPS
+    """
+    Generator for MJPEG stream. Registers as a subscriber, so the engine only
+    encodes frames while at least one feed is open.
+    """
+    yield from _video_broadcast.mjpeg_parts()
 
 
 @app.route("/api/video/feed")
@@ -469,19 +823,18 @@ def video_feed():
 # -----------------------------------------------------------------------------
 
 def _generate_events():
-    """Server-Sent Events stream for real-time updates."""
-    while True:
-        try:
-            ev = _event_queue.get(timeout=1)
-            yield f"data: {json.dumps(ev)}\n\n"
-        except queue.Empty:
-            yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+    """Server-Sent Events stream for real-time updates (own buffer per client)."""
+    for ev in _events.events(timeout=1):
+        yield f"data: {json.dumps(ev if ev is not None else {'type': 'heartbeat'})}\n\n"
 
 
 @app.route("/api/events")
 def events():
     """
-    SSE stream: prediction, recording_done, heartbeat.
+    SSE stream: prediction, recording_done, training_job (state/progress),
+    action (trigger queued/running/done/failed/dropped), heartbeat.
+    Every connected client receives every event; a client that falls more
+    than GESTURE_EVENT_BUFFER events behind loses the oldest ones.
     Frontend: const es = new EventSource('/api/events'); es.onmessage = e => { const d = JSON.parse(e.data); ... }
     """
     return Response(
@@ -495,16 +848,75 @@ def events():
 def status():
     """
     GET /api/status
-    Returns: { handDetected, mode, recording }
+    Returns: { handDetected, mode, recording, training, engine, videoFeed, desktop, events }
     For Control screen "No Hand Detected" -> "Hand Detected" toggle.
+    engine: { running, governor: { state, measuredFps, ... }, pacing, pipeline } or null.
+    videoFeed / desktop: subscribers, encode counters and achieved FPS.
+    training: the running training job or null.
+    events: /api/events subscribers, buffer sizes and published/dropped counters.
     """
+    eng = _get_engine()
+    training = _training_jobs.active()
     return jsonify({
         "handDetected": _last_hand_detected,
         "mode": _mode,
         "recording": _recording,
+        "training": training.to_dict() if training else None,
+        "engine": eng.get_status() if eng else None,
+        "videoFeed": _video_broadcast.stats(),
+        "desktop": ds.get_stats(),
+        "events": _events.stats(),
     })
 
 
+@app.route("/api/actions", methods=["GET"])
+def get_actions():
+    """
+    GET /api/actions
+    Action executor state: { workers, pending, maxPending, dedupeSec, counts,
+    recent: [{ id, gesture, source, state, reason, command, error, ... }],
+    plugins: ["hotkey", "key", ...] } (command prefixes run in-process, see
+    backend/action_plugins.py). Each state change is also pushed on
+    /api/events as {"type": "action", ...}.
+    """
+    return jsonify({**_actions.to_dict(), "plugins": action_plugins.schemes()})
+
+
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    """
+    GET /api/metrics?format=json|prometheus
+    Per-stage latency histograms (capture, color_convert, hands_process,
+    normalize_landmarks, model_forward, draw, jpeg_encode, callbacks,
+    action_queue_wait, command_resolve, command_execute, gesture_to_command,
+    desktop_*). JSON by default; Prometheus text with
+    format=prometheus or an Accept header preferring text/plain.
+    """
+    fmt = request.args.get("format")
+    if fmt is None and request.accept_mimetypes.best == "text/plain":
+        fmt = "prometheus"
+    if fmt == "prometheus":
+        return Response(metrics.METRICS.to_prometheus(), mimetype="text/plain; version=0.0.4")
+    return jsonify(metrics.METRICS.to_dict())
+
+
+@app.route("/api/metrics", methods=["DELETE"])
+def reset_metrics():
+    """DELETE /api/metrics - clear all histograms."""
+    metrics.METRICS.reset()
+    return jsonify({"ok": True})
+
+
+@app.route("/api/startup", methods=["GET"])
+def startup_report():
+    """
+    GET /api/startup
+    Import-time report: { uptimeSec, marks: {server_imported, listening, ...},
+    imports: {module: {seconds, atSec, thread[, error]}}, prewarm: {state, modules} }.
+    """
+    return jsonify(lazy_imports.report())
+
+
 # -----------------------------------------------------------------------------
 # FOCUS LAYER LAUNCHER (Desktop Overlay Window)
 # -----------------------------------------------------------------------------
@@ -561,6 +973,34 @@ def focus_layer_status():
     return jsonify({"running": running})
 
 
+# -----------------------------------------------------------------------------
+# STARTUP / PREWARM
+# -----------------------------------------------------------------------------
+
+def _prewarm_modules() -> list:
+    """Modules the first engine start would import, heaviest first."""
+    names = ["cv2", "mediapipe", "mediapipe_engine"]
+    if INFERENCE_BACKEND in ("torch", "torchscript", "int8", "auto"):
+        names.append("torch")
+    if INFERENCE_BACKEND in ("onnx", "auto"):
+        names.append("onnxruntime")
+    return names
+
+
+def _wait_until_listening(port: int, timeout: float = 30.0):
+    """Block until localhost:port accepts connections (or timeout)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                lazy_imports.mark("listening")
+                return
+        except OSError:
+            time.sleep(0.05)
+
+
+lazy_imports.mark("server_imported")
+
 # -----------------------------------------------------------------------------
 # ENTRY POINT
 # -----------------------------------------------------------------------------
@@ -573,4 +1013,7 @@ if __name__ == "__main__":
     print("  - Gesture List: gesture list screen/gesture-list.html")
     print("  - Control: control screen/index.html")
     print("  - Focus Layer: Launch via Focus Mode toggle on Control Screen")
+    # With the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves.
+    if PREWARM and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        lazy_imports.prewarm(_prewarm_modules(), wait_for=lambda: _wait_until_listening(5000))
     app.run(host="0.0.0.0", port=5000, threaded=True, debug=True)
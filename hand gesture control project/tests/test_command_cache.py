@@ -0,0 +1,58 @@
+import json
+
+import command_cache
+from command_cache import CommandCache
+
+
+class _Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+def _cache(tmp_path, monkeypatch, **kw):
+    clock = _Clock()
+    monkeypatch.setattr(command_cache.time, "time", clock.time)
+    return CommandCache(str(tmp_path / "cache.json"), **kw), clock
+
+
+def test_put_get_normalizes_names(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path, monkeypatch)
+    cache.put("Open  Reddit", "start https://www.reddit.com")
+    assert cache.get("open reddit") == "start https://www.reddit.com"
+    assert cache.get("open github") is None
+
+
+def test_llm_answers_expire_manual_ones_do_not(tmp_path, monkeypatch):
+    cache, clock = _cache(tmp_path, monkeypatch, ttl_sec=60)
+    cache.put("open paint", "mspaint", source="llm")
+    cache.put("lock", "rundll32.exe user32.dll,LockWorkStation", source="manual")
+    clock.now += 59
+    assert cache.get("open paint") == "mspaint"
+    clock.now += 2
+    assert cache.get("open paint") is None
+    assert cache.get("lock") is not None
+    assert {e["name"]: e["expired"] for e in cache.entries()} == {"open paint": True, "lock": False}
+
+
+def test_prompt_version_change_misses(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path, monkeypatch, version="1")
+    cache.put("open paint", "mspaint")
+    bumped = CommandCache(cache.path, version="2")
+    assert bumped.get("open paint") is None
+    assert bumped.entries() == []
+    assert CommandCache(cache.path, version="1").get("open paint") == "mspaint"
+    # Invalidating a gesture drops it under every prompt version.
+    bumped.put("open paint", "start mspaint")
+    assert bumped.invalidate("Open Paint") == 2
+
+
+def test_persisted_atomically(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path, monkeypatch)
+    cache.put("open paint", "mspaint")
+    with open(cache.path) as f:
+        assert list(json.load(f)["entries"]) == ["v1:open paint"]
+    assert not (tmp_path / "cache.json.tmp").exists()
+    assert CommandCache(cache.path).get("open paint") == "mspaint"
@@ -0,0 +1,58 @@
+from command_cache import CommandCache
+from command_resolver import NOT_EXECUTABLE, CacheResolver, IntentIndex, ResolverChain
+
+
+class _Fixed:
+    def __init__(self, name: str, answer: str | None):
+        self.name = name
+        self.answer = answer
+        self.calls = 0
+
+    def resolve(self, gesture: str) -> str | None:
+        self.calls += 1
+        return self.answer
+
+
+def test_first_answer_wins_in_order():
+    first, second, third = _Fixed("a", None), _Fixed("b", "calc"), _Fixed("c", "notepad")
+    assert ResolverChain([first, second, third]).resolve("x") == ("calc", "b")
+    assert (first.calls, second.calls, third.calls) == (1, 1, 0)
+
+
+def test_nobody_answers():
+    assert ResolverChain([_Fixed("a", None)]).resolve("x") == (NOT_EXECUTABLE, None)
+
+
+def test_later_answers_are_cached(tmp_path):
+    cache = CommandCache(str(tmp_path / "cache.json"))
+    llm = _Fixed("llm", "start https://www.reddit.com")
+    chain = ResolverChain([CacheResolver(cache), llm], cache=cache)
+    assert chain.resolve("open reddit") == ("start https://www.reddit.com", "llm")
+    assert chain.resolve("open reddit") == ("start https://www.reddit.com", "cache")
+    assert llm.calls == 1
+    assert [e["source"] for e in cache.entries()] == ["llm"]
+
+
+def test_not_executable_is_never_cached(tmp_path):
+    cache = CommandCache(str(tmp_path / "cache.json"))
+    llm = _Fixed("llm", NOT_EXECUTABLE)
+    chain = ResolverChain([CacheResolver(cache), llm], cache=cache)
+    assert chain.resolve("make coffee") == (NOT_EXECUTABLE, "llm")
+    assert chain.resolve("make coffee") == (NOT_EXECUTABLE, "llm")
+    assert llm.calls == 2
+    assert cache.entries() == []
+
+
+def test_chain_without_cache_stores_nothing(tmp_path):
+    cache = CommandCache(str(tmp_path / "cache.json"))
+    chain = ResolverChain([CacheResolver(cache), _Fixed("local", "calc")])
+    assert chain.resolve("open calculator") == ("calc", "local")
+    assert cache.get("open calculator") is None
+
+
+def test_intent_index_exact_synonym_and_fuzzy():
+    index = IntentIndex([("open calculator", "calc"), ("open paint", "mspaint")])
+    assert index.match("open calculator") == ("calc", 1.0)
+    assert index.match("Launch the calc")[0] == "calc"
+    assert index.resolve("open calculater") == "calc"
+    assert index.resolve("close paint") is None
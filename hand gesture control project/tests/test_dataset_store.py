@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+
+from dataset_store import FEATURES, DatasetStore, open_store
+
+
+def _rows(n: int, value: float) -> np.ndarray:
+    return np.full((n, FEATURES), value, dtype=np.float32)
+
+
+def test_append_and_snapshot(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    assert store.append("fist", _rows(3, 1.0)) == 3
+    assert store.append("palm", _rows(2, 2.0)) == 2
+    assert store.append("fist", _rows(2, 3.0)) == 5
+
+    snap = store.snapshot()
+    assert snap.names == ["fist", "palm"]
+    assert snap.total == 7
+    assert snap.label_mapping() == ({"fist": 0, "palm": 1}, {0: "fist", 1: "palm"})
+    np.testing.assert_array_equal(snap.gesture("fist")[:, 0], [1, 1, 1, 3, 3])
+    X, Y = snap.gather([6, 0, 5, 3])
+    np.testing.assert_array_equal(X[:, 0], [2, 1, 2, 3])
+    np.testing.assert_array_equal(Y, [1, 0, 1, 0])
+
+    # A snapshot keeps its counts while recording goes on.
+    store.append("palm", _rows(4, 4.0))
+    assert snap.total == 7
+    assert store.snapshot().total == 11
+
+
+def test_reopen_reads_index(tmp_path):
+    DatasetStore(str(tmp_path)).append("fist", _rows(3, 1.0))
+    store = DatasetStore(str(tmp_path))
+    assert store.names() == ["fist"]
+    assert store.count() == 3
+
+
+def test_torn_tail_is_ignored_and_trimmed(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    store.append("fist", _rows(2, 1.0))
+    shard = os.path.join(str(tmp_path), store._entry("fist")["file"])
+    # Interrupted append: bytes on disk past the count in index.json.
+    with open(shard, "ab") as f:
+        f.write(_rows(1, 9.0).tobytes()[:100])
+
+    reopened = DatasetStore(str(tmp_path))
+    assert reopened.snapshot().total == 2
+    assert reopened.append("fist", _rows(1, 5.0)) == 3
+    np.testing.assert_array_equal(reopened.snapshot().gesture("fist")[:, 0], [1, 1, 5])
+    assert os.path.getsize(shard) == 3 * FEATURES * 4
+
+
+def test_remove(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    store.append("fist", _rows(2, 1.0))
+    store.append("palm", _rows(2, 2.0))
+    assert store.remove("fist")
+    assert not store.remove("fist")
+    assert store.snapshot().names == ["palm"]
+
+
+def test_open_store_is_shared_per_directory(tmp_path):
+    assert open_store(str(tmp_path)) is open_store(str(tmp_path / "."))
+    assert open_store(str(tmp_path / "a")) is not open_store(str(tmp_path / "b"))
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from event_bus import EventBus
+
+
+def _subscribe(bus: EventBus):
+    """Start an SSE-style stream; the first next() registers it (heartbeat)."""
+    stream = bus.events(timeout=0.01)
+    assert next(stream) is None
+    return stream
+
+
+def test_every_subscriber_gets_every_event():
+    bus = EventBus()
+    a, b = _subscribe(bus), _subscribe(bus)
+    bus.publish({"n": 1})
+    bus.publish({"n": 2})
+    assert [next(a), next(a)] == [{"n": 1}, {"n": 2}]
+    assert [next(b), next(b)] == [{"n": 1}, {"n": 2}]
+    assert next(a) is None  # nothing new: heartbeat
+
+
+def test_slow_subscriber_drops_oldest_without_slowing_others():
+    bus = EventBus(buffer_size=4)
+    fast, slow = _subscribe(bus), _subscribe(bus)
+    received = []
+    for n in range(10):
+        bus.publish({"n": n})
+        received.append(next(fast)["n"])
+    assert received == list(range(10))
+    assert [next(slow)["n"] for _ in range(4)] == [6, 7, 8, 9]
+    stats = bus.stats()
+    assert stats["dropped"] == 6
+    assert stats["published"] == 10
+
+
+def test_publish_never_blocks_on_a_stalled_reader():
+    bus = EventBus(buffer_size=8)
+    stalled = _subscribe(bus)  # never read again
+    t0 = time.perf_counter()
+    producer = threading.Thread(target=lambda: [bus.publish({"n": n}) for n in range(10000)])
+    producer.start()
+    producer.join(5)
+    assert not producer.is_alive()
+    assert time.perf_counter() - t0 < 5
+    assert bus.stats()["pending"] == [8]
+    stalled.close()
+
+
+def test_publish_without_subscribers_is_discarded():
+    bus = EventBus()
+    bus.publish({"n": 1})
+    assert bus.stats()["discarded"] == 1
+    stream = _subscribe(bus)
+    assert next(stream) is None
+
+
+def test_oldest_subscriber_is_evicted():
+    bus = EventBus(max_subscribers=2)
+    oldest = _subscribe(bus)
+    streams = [_subscribe(bus), _subscribe(bus)]
+    assert bus.subscribers == len(streams)
+    assert bus.stats()["evicted"] == 1
+    assert list(oldest) == []  # stream ends
+
+
+def test_closing_a_stream_unsubscribes():
+    bus = EventBus()
+    stream = _subscribe(bus)
+    stream.close()
+    assert bus.subscribers == 0
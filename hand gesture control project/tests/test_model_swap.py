@@ -0,0 +1,46 @@
+import numpy as np
+
+from dataset_store import FEATURES
+from mediapipe_engine import MediaPipeEngine
+
+
+def _engine(tmp_path, **kw) -> MediaPipeEngine:
+    return MediaPipeEngine(dataset_dir=str(tmp_path / "dataset"), dynamic_gestures=False, **kw)
+
+
+def test_swap_publishes_new_state(tmp_path):
+    eng = _engine(tmp_path)
+    before = eng.model_state
+    hitting_times = {"fist": 2.0}
+    state = eng.swap_model(hitting_times=hitting_times)
+    hitting_times["fist"] = 9.0  # caller's dict is copied
+    assert eng.model_state is state
+    assert state.version == before.version + 1
+    assert eng.gesture_hitting_times == {"fist": 2.0}
+    assert before.hitting_times == {}
+
+
+def test_keep_label_filters_current_labels(tmp_path):
+    eng = _engine(tmp_path)
+    eng.swap_model(label_to_id={"a": 0, "b": 1, "c": 2}, id_to_label={0: "a", 1: "b", 2: "c"})
+    eng.swap_model(keep_label=lambda name: name != "b")
+    assert eng.id_to_label == {0: "a", 2: "c"}
+    assert eng.label_to_id == {"a": 0, "c": 2}
+
+
+def test_keep_label_filters_labels_being_swapped_in(tmp_path):
+    eng = _engine(tmp_path)
+    eng.swap_model(label_to_id={"old": 0}, id_to_label={0: "old"})
+    eng.swap_model(keep_label=lambda name: name != "b", classifier=object(),
+                   label_to_id={"a": 0, "b": 1}, id_to_label={0: "a", 1: "b"})
+    assert eng.id_to_label == {0: "a"}
+    assert eng.label_to_id == {"a": 0}
+
+
+def test_load_model_applies_keep_label(tmp_path):
+    eng = _engine(tmp_path, classifier_mode="knn")
+    rng = np.random.default_rng(0)
+    for name in ("fist", "palm", "deleted"):
+        eng.dataset.append(name, rng.normal(size=(10, FEATURES)))
+    assert eng.load_model(keep_label=lambda name: name != "deleted")
+    assert sorted(eng.label_to_id) == ["fist", "palm"]
@@ -0,0 +1,81 @@
+import json
+import os
+
+import numpy as np
+
+from core import normalize_landmarks
+from dataset_store import open_store
+from mediapipe_engine import MediaPipeEngine
+from session_recorder import SessionReader, SessionRecorder, _column_path, replay_session
+
+
+def _hand(seed: int, n: int, noise: float = 0.002) -> np.ndarray:
+    """n noisy copies of one random hand pose, (n, 21, 3)."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.2, 0.8, size=(21, 3)).astype(np.float32)
+    return base + rng.normal(0, noise, size=(n, 21, 3)).astype(np.float32)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "a.session")
+    lms = _hand(0, 10)
+    rec = SessionRecorder(path, chunk_size=4, id_to_label={0: "fist"})
+    for i in range(10):
+        rec.append(100.0 + i / 30, None if i == 3 else lms[i], pred=0 if i != 3 else -1,
+                   conf=0.9, fired=i == 7)
+    rec.close()
+    rec.append(200.0, lms[0])  # ignored after close
+
+    r = SessionReader(path)
+    assert len(r) == 10
+    assert r.id_to_label == {0: "fist"}
+    np.testing.assert_allclose(r.timestamp, 100.0 + np.arange(10) / 30)
+    assert r.present.tolist() == [1, 1, 1, 0, 1, 1, 1, 1, 1, 1]
+    assert np.isnan(r.landmarks_3d()[3]).all()
+    np.testing.assert_array_equal(r.landmarks_3d()[4], lms[4])
+    assert r.pred.tolist() == [0, 0, 0, -1, 0, 0, 0, 0, 0, 0]
+    assert np.flatnonzero(r.fired).tolist() == [7]
+    with open(os.path.join(path, "meta.json")) as f:
+        assert json.load(f)["frames"] == 10
+
+
+def test_reader_ignores_torn_tail(tmp_path):
+    path = str(tmp_path / "b.session")
+    rec = SessionRecorder(path, chunk_size=2)
+    for i, lm in enumerate(_hand(1, 4)):
+        rec.append(float(i), lm)
+    rec.close()
+    # A crash mid-flush: one column got half a row more than the others.
+    with open(_column_path(path, "landmarks"), "ab") as f:
+        f.write(b"\0" * 100)
+    assert len(SessionReader(path)) == 4
+
+
+def test_replay_matches_recorded_predictions(tmp_path):
+    store = open_store(str(tmp_path / "dataset"))
+    poses = {"fist": _hand(2, 40), "palm": _hand(3, 40)}
+    for name, lms in poses.items():
+        store.append(name, np.stack([normalize_landmarks(lm) for lm in lms]))
+    eng = MediaPipeEngine(classifier_mode="knn", dataset_dir=store.root, dynamic_gestures=False)
+    assert eng.load_model()
+    eng.swap_model(hitting_times={"fist": 0.5, "palm": 0.5})
+
+    path = str(tmp_path / "c.session")
+    rec = SessionRecorder(path, id_to_label=eng.id_to_label)
+    t = 1000.0
+    for name, lms in poses.items():
+        for lm in lms:
+            rec.append(t, lm, pred=eng.label_to_id[name], conf=1.0)
+            t += 1 / 30
+        for _ in range(15):  # hand lost between gestures
+            rec.append(t, None)
+            t += 1 / 30
+        t += eng.cooldown_sec
+    rec.close()
+
+    summary = replay_session(path, eng)
+    assert summary["frames"] == 110
+    assert summary["handFrames"] == 80
+    assert summary["agreement"] == 1.0
+    assert [tr["gesture"] for tr in summary["triggers"]] == ["fist", "palm"]
+    assert eng.execute_actions and eng.trigger_callback is None
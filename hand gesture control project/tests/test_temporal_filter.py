@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from temporal_filter import TemporalFilter
+
+
+def test_ema_weights_by_age_not_frame_count():
+    f = TemporalFilter(mode="ema", window_sec=1.0, half_life_sec=0.1)
+    f.update([1.0, 0.0], 0.0)
+    f.update([0.0, 1.0], 0.1)
+    # One half-life apart: weights 0.5 and 1.
+    np.testing.assert_allclose(f.smoothed(0.1), [1 / 3, 2 / 3], rtol=1e-6)
+
+    g = TemporalFilter(mode="ema", window_sec=1.0, half_life_sec=0.1)
+    g.update([1.0, 0.0], 0.0)
+    g.update([0.0, 1.0], 0.3)
+    # Three half-lives apart (a dropped-frame gap): weights 0.125 and 1.
+    np.testing.assert_allclose(g.smoothed(0.3), [1 / 9, 8 / 9], rtol=1e-6)
+
+
+def test_mean_over_window_with_uneven_timestamps():
+    f = TemporalFilter(mode="mean", window_sec=0.5)
+    for t, p in ((0.0, [1.0, 0.0]), (0.05, [1.0, 0.0]), (0.4, [0.0, 1.0]), (0.45, [0.0, 1.0])):
+        f.update(p, t)
+    np.testing.assert_allclose(f.smoothed(0.45), [0.5, 0.5])
+    # Entries older than window_sec drop out one by one.
+    np.testing.assert_allclose(f.smoothed(0.52), [1 / 3, 2 / 3], rtol=1e-6)
+    np.testing.assert_allclose(f.smoothed(0.6), [0.0, 1.0])
+    assert f.smoothed(2.0).tolist() == [0.0, 0.0]
+
+
+def test_stable_after_stable_sec_in_seconds():
+    f = TemporalFilter(mode="mean", window_sec=0.3, threshold=0.8, stable_sec=0.2)
+    assert f.update([0.9, 0.1], 0.0) == (0, pytest.approx(0.9), False)
+    assert not f.update([0.9, 0.1], 0.1)[2]
+    # Two frames 0.25 s apart are as stable as a run of thirty.
+    assert f.update([0.9, 0.1], 0.25)[2]
+
+
+def test_hysteresis_keeps_leader_through_a_dip():
+    f = TemporalFilter(mode="mean", window_sec=0.05, threshold=0.8, hysteresis=0.1, stable_sec=0.2)
+    f.update([0.9, 0.1], 0.0)
+    assert f.update([0.75, 0.25], 0.1)[2] is False  # dipped, still above 0.7
+    assert f.update([0.9, 0.1], 0.2)[2]
+    f.update([0.6, 0.4], 0.3)                        # below 0.7: leader lost
+    assert f.update([0.9, 0.1], 0.4)[2] is False
+
+
+def test_class_count_change_resets():
+    f = TemporalFilter(mode="mean", window_sec=1.0)
+    f.update([1.0, 0.0], 0.0)
+    f.update([0.0, 0.0, 1.0], 0.1)
+    np.testing.assert_allclose(f.smoothed(0.1), [0.0, 0.0, 1.0])
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        TemporalFilter(mode="median")